@@ -0,0 +1,69 @@
+"""
+Micro-benchmark for block classification.
+
+Times `block_to_block_type` against the previous implementation, which passed raw
+pattern strings to `re.findall` for every check, over a mix of typical blocks.
+
+Usage:
+    python -m benchmarks.bench_block_types [--repeat N]
+"""
+import argparse, re, timeit
+from src.htmlnode import BlockType, block_to_block_type
+
+BLOCKS = [
+    '# A heading',
+    '### A deeper heading with **bold** text',
+    '```\nfunc main(){\n    fmt.Println("Aiya, Ambar!")\n}\n```',
+    '> "I am in fact a Hobbit in all but size."\n>\n> -- J.R.R. Tolkien',
+    '\n'.join(f'- list item {index} with a [link](/item/{index})' for index in range(10)),
+    '\n'.join(f'{index}. ordered item {index}' for index in range(1, 21)),
+    '\n'.join(f'{index}. reversed item {index}' for index in range(20, 0, -1)),
+    '1. out of\n3. order\n2. list',
+    'A plain paragraph with **bold**, _italic_ and `code`, spanning\na second line of text.',
+    'Another paragraph that mentions 2. in the middle of the text and ends here.',
+]
+
+def legacy_block_to_block_type(block_text):
+    # The implementation replaced by the compiled pattern registry, kept for comparison
+    if re.findall(r'^(#{1,6} )', block_text):
+        return BlockType.HEADING
+    if re.findall(r'^```.*?```$', block_text, re.DOTALL):
+        return BlockType.CODE
+    if re.findall(r'^> (.*)', block_text, re.MULTILINE):
+        return BlockType.QUOTE
+    if re.findall(r'^- (.*)', block_text, re.MULTILINE):
+        return BlockType.ULIST
+    matches = re.findall(r'^([0-9]+\. .*)', block_text, re.MULTILINE)
+    if matches:
+        numbers = []
+        for match in matches:
+            list_num = re.findall(r'^([0-9]+)', match)
+            if len(list_num) == 1:
+                numbers.append(int(list_num[0], 10))
+            else:
+                raise Exception('Error: illegal list format')
+        if numbers == list(range(1, len(numbers)+1)) or numbers[::-1] == list(range(1, len(numbers)+1)):
+            return BlockType.OLIST
+        return BlockType.PARAGRAPH
+    return BlockType.PARAGRAPH
+
+def bench(classify, repeat):
+    return min(timeit.repeat(lambda: [classify(block) for block in BLOCKS], number=1000, repeat=repeat))
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description='Compare block classification speed')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for block in BLOCKS:
+        assert block_to_block_type(block) == legacy_block_to_block_type(block), block
+
+    legacy = bench(legacy_block_to_block_type, args.repeat)
+    current = bench(block_to_block_type, args.repeat)
+    per_block = 1e6 / (1000 * len(BLOCKS))
+    print(f'legacy:   {legacy * per_block:.2f} us per block')
+    print(f'compiled: {current * per_block:.2f} us per block')
+    print(f'speedup:  {legacy / current:.2f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Memory benchmark for markdown page trees.
+
+Builds the node trees of synthetic pages with `markdown_to_html_node` and uses
+tracemalloc to report how much memory the retained trees take per page and per node.
+The render cache is turned off while measuring, so every tree is built from scratch
+instead of sharing the cached nodes of the first page.
+
+Usage:
+    python -m benchmarks.bench_memory [--pages N] [--paragraphs N]
+"""
+import argparse, tracemalloc
+from src.transformation import markdown_to_html_node
+from src.render_cache import block_cache
+
+PARAGRAPH = 'Some **bold** words, an _italic_ one, `code`, a [link](https://example.com/{index}) and ![an image](images/{index}.png) in text.'
+
+def synthetic_page(paragraphs):
+    blocks = ['# Synthetic page']
+    for index in range(paragraphs):
+        blocks.append(PARAGRAPH.format(index=index))
+        if index % 5 == 0:
+            blocks.append('\n'.join(f'- list item {item} with [a link](/item/{item})' for item in range(5)))
+    return '\n\n'.join(blocks)
+
+def count_nodes(node):
+    return 1 + sum(count_nodes(child) for child in node.children or [])
+
+def measure(pages, paragraphs):
+    markdown = synthetic_page(paragraphs)
+    settings = (block_cache.maxsize, block_cache.directory)
+    try:
+        block_cache.configure(0)
+        markdown_to_html_node(markdown) # warm up caches outside the measurement
+        tracemalloc.start()
+        trees = [markdown_to_html_node(markdown) for _ in range(pages)]
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        block_cache.configure(*settings)
+    nodes = sum(count_nodes(tree) for tree in trees)
+    return {
+        'pages': pages,
+        'nodes': nodes,
+        'retained_bytes': current,
+        'peak_bytes': peak,
+        'bytes_per_page': current / pages,
+        'bytes_per_node': current / nodes,
+    }
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description='Measure the memory held by parsed page trees')
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--paragraphs', type=int, default=50)
+    args = parser.parse_args(argv)
+    result = measure(args.pages, args.paragraphs)
+    print(f"{result['pages']} pages, {result['nodes']} nodes")
+    print(f"retained: {result['retained_bytes'] / 2**20:.1f} MiB (peak {result['peak_bytes'] / 2**20:.1f} MiB)")
+    print(f"{result['bytes_per_page'] / 1024:.1f} KiB per page, {result['bytes_per_node']:.0f} bytes per node")
+
+if __name__ == '__main__':
+    main()
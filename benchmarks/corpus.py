@@ -0,0 +1,105 @@
+"""
+Synthetic markdown corpora for the benchmark suite.
+
+Pages are generated deterministically from a seed, so two runs with the same
+profile time exactly the same input.
+
+Classes:
+    CorpusProfile: The knobs of a synthetic corpus (page count, page size, densities, ...).
+
+Functions:
+    generate_page(profile, index): Returns the markdown of one synthetic page.
+    write_corpus(profile, content_path): Writes the whole corpus as a content tree.
+
+Constants:
+    PROFILES: Named profiles covering the shapes the generator has to handle.
+"""
+import os, random
+from collections import namedtuple
+
+CorpusProfile = namedtuple('CorpusProfile', [
+    'pages',            # number of pages in the corpus
+    'paragraphs',       # paragraphs per page (page size)
+    'words',            # words per paragraph
+    'link_density',     # probability that a word is followed by a link
+    'image_density',    # probability that a paragraph is followed by an image
+    'list_length',      # items per list; a list follows every 5th paragraph
+    'code_lines',       # lines per code block; a code block follows every 10th paragraph
+])
+
+PROFILES = {
+    'small': CorpusProfile(pages=50, paragraphs=10, words=40, link_density=0.02, image_density=0.1, list_length=5, code_lines=5),
+    'large_pages': CorpusProfile(pages=10, paragraphs=300, words=60, link_density=0.02, image_density=0.05, list_length=8, code_lines=10),
+    'link_heavy': CorpusProfile(pages=20, paragraphs=40, words=60, link_density=0.3, image_density=0.5, list_length=5, code_lines=5),
+    'long_lists': CorpusProfile(pages=20, paragraphs=20, words=30, link_density=0.05, image_density=0.0, list_length=200, code_lines=5),
+    'big_code': CorpusProfile(pages=20, paragraphs=20, words=30, link_density=0.02, image_density=0.0, list_length=5, code_lines=400),
+}
+
+WORDS = ('elf', 'hobbit', 'ring', 'mountain', 'river', 'forest', 'wizard', 'tower', 'song', 'road', 'shadow', 'light')
+
+def _paragraph(rng, profile):
+    words = []
+    for index in range(profile.words):
+        word = rng.choice(WORDS)
+        style = rng.random()
+        if style < 0.05:
+            word = f'**{word}**'
+        elif style < 0.08:
+            word = f'_{word}_'
+        elif style < 0.10:
+            word = f'`{word}`'
+        words.append(word)
+        if rng.random() < profile.link_density:
+            words.append(f'[{rng.choice(WORDS)}](/{rng.choice(WORDS)}/{index})')
+    return ' '.join(words)
+
+def generate_page(profile, index):
+    """
+    Returns the markdown of one synthetic page.
+
+    Args:
+        profile (CorpusProfile): The corpus knobs.
+        index (int): Page number, also used as the random seed.
+
+    Returns:
+        str: The markdown text.
+    """
+
+    rng = random.Random(index)
+    blocks = [f'# Page {index}', f'[< Back Home](/)']
+    for paragraph in range(profile.paragraphs):
+        blocks.append(_paragraph(rng, profile))
+        if rng.random() < profile.image_density:
+            blocks.append(f'![{rng.choice(WORDS)}](/images/{rng.choice(WORDS)}.png)')
+        if paragraph % 5 == 4:
+            blocks.append('\n'.join(f'- {rng.choice(WORDS)} [{item}](/list/{item})' for item in range(profile.list_length)))
+            blocks.append('\n'.join(f'{item}. {rng.choice(WORDS)}' for item in range(1, profile.list_length + 1)))
+        if paragraph % 10 == 9:
+            blocks.append('```\n' + '\n'.join(f'line_{line} = "{rng.choice(WORDS)}"' for line in range(profile.code_lines)) + '\n```')
+        if paragraph % 20 == 0:
+            blocks.append('> ' + _paragraph(rng, profile))
+        if paragraph % 25 == 0:
+            blocks.append(f'## Section {paragraph}')
+    return '\n\n'.join(blocks)
+
+def write_corpus(profile, content_path):
+    """
+    Writes the corpus as a content tree, one folder with an index.md per page.
+
+    Args:
+        profile (CorpusProfile): The corpus knobs.
+        content_path (str): Folder to write the content into.
+
+    Returns:
+        int: The total size of the written markdown in bytes.
+    """
+
+    size = 0
+    for index in range(profile.pages):
+        page_dir = os.path.join(content_path, f'page_{index}')
+        os.makedirs(page_dir, exist_ok=True)
+        markdown = generate_page(profile, index)
+        with open(os.path.join(page_dir, 'index.md'), 'w', encoding='utf-8') as f:
+            f.write(markdown)
+        size += len(markdown.encode('utf-8'))
+    return size
@@ -0,0 +1,155 @@
+"""
+Benchmark suite for the site generator.
+
+Times every stage of the pipeline on synthetic corpora and writes the results as
+JSON. A results file can be compared against a stored baseline; the run fails
+if any benchmark got slower than the allowed threshold.
+
+Benchmarks (per corpus profile):
+    markdown_to_blocks, text_to_text_nodes, markdown_to_html_node, to_html,
+    generate_page, generate_pages_recursive and generate_pages_pipelined, all with
+    the render cache off, and
+    markdown_to_html_node_cached with a warm render cache.
+
+See also `benchmarks.bench_memory` (tree memory) and `benchmarks.bench_block_types`
+(block classification micro-benchmark).
+
+Usage:
+    python -m benchmarks.run                                  # all profiles, print results
+    python -m benchmarks.run --profile small --output results.json
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.2
+"""
+import argparse, json, os, platform, shutil, statistics, sys, tempfile, time
+from benchmarks.corpus import PROFILES, generate_page as generate_markdown, write_corpus
+from src.transformation import markdown_to_blocks, text_to_text_nodes, markdown_to_html_node
+from src.site_operations import generate_page, generate_pages_recursive
+from src.render_cache import block_cache
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'template.html')
+
+def time_call(function, repeat):
+    """
+    Times `function()` `repeat` times.
+
+    Returns:
+        dict: The min, median and max wall time in seconds.
+    """
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return {'min': min(timings), 'median': statistics.median(timings), 'max': max(timings)}
+
+def bench_profile(name, profile, repeat, workdir):
+    """
+    Runs every benchmark on one corpus profile.
+
+    Returns:
+        dict[str, dict]: Benchmark name ('<profile>/<stage>') -> timings.
+    """
+
+    pages = [generate_markdown(profile, index) for index in range(profile.pages)]
+    blocks = [block for page in pages for block in markdown_to_blocks(page)]
+    trees = [markdown_to_html_node(page) for page in pages]
+
+    content = os.path.join(workdir, name, 'content')
+    public = os.path.join(workdir, name, 'public')
+    write_corpus(profile, content)
+    os.makedirs(public)
+    page_path = os.path.join(content, 'page_0', 'index.md')
+    page_dest = os.path.join(public, 'page_0.html')
+
+    def rebuild_site(pipeline = False):
+        shutil.rmtree(public)
+        os.makedirs(public)
+        generate_pages_recursive(content, TEMPLATE, public, pipeline = pipeline)
+
+    def parse_cached():
+        return [markdown_to_html_node(page) for page in pages]
+
+    stages = {
+        'markdown_to_blocks': lambda: [markdown_to_blocks(page) for page in pages],
+        'text_to_text_nodes': lambda: [text_to_text_nodes(block) for block in blocks],
+        'markdown_to_html_node': lambda: [markdown_to_html_node(page) for page in pages],
+        'to_html': lambda: [tree.to_html() for tree in trees],
+        'generate_page': lambda: generate_page(page_path, TEMPLATE, page_dest),
+        'generate_pages_recursive': rebuild_site,
+        'generate_pages_pipelined': lambda: rebuild_site(pipeline = True),
+    }
+    settings = (block_cache.maxsize, block_cache.directory)
+    try:
+        block_cache.configure(0)
+        results = {f'{name}/{stage}': time_call(function, repeat) for stage, function in stages.items()}
+        block_cache.configure(*settings)
+        parse_cached()
+        results[f'{name}/markdown_to_html_node_cached'] = time_call(parse_cached, repeat)
+    finally:
+        block_cache.configure(*settings)
+    return results
+
+def compare(results, baseline, threshold):
+    """
+    Compares results against a baseline.
+
+    Args:
+        results (dict): Benchmark name -> timings, as produced by this suite.
+        baseline (dict): The 'results' of a previous run.
+        threshold (float): Allowed relative slowdown, e.g. 0.2 for 20%. The fastest run
+            of each benchmark is compared, as it is the least affected by noise.
+
+    Returns:
+        list[str]: One line per benchmark that regressed beyond the threshold.
+    """
+
+    regressions = []
+    for name, timings in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        change = timings['min'] / reference['min'] - 1
+        if change > threshold:
+            regressions.append(f"{name}: {reference['min'] * 1000:.2f} ms -> {timings['min'] * 1000:.2f} ms (+{change:.0%})")
+    return regressions
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description='Run the site generator benchmarks')
+    parser.add_argument('--profile', action='append', choices=sorted(PROFILES),
+                        help='corpus profile to run (repeatable; default: all)')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark')
+    parser.add_argument('--output', help='write the results JSON to this file')
+    parser.add_argument('--save-baseline', help='write the results JSON as a new baseline')
+    parser.add_argument('--baseline', help='compare against this baseline JSON')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed slowdown against the baseline (default: 0.2)')
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.profile or sorted(PROFILES):
+            results.update(bench_profile(name, PROFILES[name], args.repeat, workdir))
+
+    for name, timings in results.items():
+        print(f"{name:45} {timings['median'] * 1000:10.2f} ms  (min {timings['min'] * 1000:.2f} ms)")
+
+    document = {'python': platform.python_version(), 'machine': platform.machine(), 'results': results}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(document, f, indent=1, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            return 1
+        print(f'No regressions beyond {args.threshold:.0%} against {args.baseline}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,3 @@
 # Local deployment
-python3 -m src.main
-cd public && python3 -m http.server 8888
+# Builds the site, serves ./public on http://localhost:8888 and rebuilds affected pages on every change
+python3 -m src.main --watch --serve --port 8888
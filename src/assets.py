@@ -0,0 +1,187 @@
+"""
+Provides the deduplication of identical assets.
+
+Byte-identical assets anywhere in the tree (e.g. the same `index.css` in every
+content folder) are grouped by content hash and emitted once, at the shallowest
+of their output paths. Optionally the emitted copy gets a content-hashed file
+name, so it can be cached forever. The `href` and `src` urls of every rendered
+page that point at a merged or renamed asset are rewritten to the emitted copy.
+
+Stylesheets with relative `url()` or `@import` references are never moved to
+another folder, as their references would then resolve elsewhere.
+
+Classes:
+    AssetLinks: Plans the deduplication and redirects asset outputs and page urls.
+
+Functions:
+    hashed_name(path, digest): Returns `path` with a content hash before its extension.
+    resolve_url(url, page_path, dest_root, base_path): Returns the output path a page url points at.
+
+Constants:
+    asset_links: The AssetLinks of the current build; empty unless deduplication is enabled.
+"""
+import hashlib, json, os, re
+from collections import defaultdict
+from src.fileio import hash_file
+
+_URL_ATTRIBUTE = re.compile(r'(href|src)="([^"?#]*)([^"]*)"')
+_RELATIVE_CSS_REFERENCE = re.compile(r'@import|url\(\s*[\'"]?(?![\'"]?(?:data:|[a-z]+://|/))', re.IGNORECASE)
+
+def hashed_name(path, digest):
+    """
+    Returns `path` with the first 12 hex digits of `digest` before its extension, e.g. 'index.3f2a9c1b7d4e.css'.
+    """
+
+    stem, extension = os.path.splitext(path)
+    return f'{stem}.{digest[:12]}{extension}'
+
+def resolve_url(url, page_path, dest_root, base_path = '/'):
+    """
+    Returns the output path `url` points at, as seen from the page at `page_path`.
+
+    Relative and root-relative (base path) urls are resolved against the page's
+    output path; for other urls (external, anchors, other sites) None is returned.
+
+    Args:
+        url (str): The url, without its query or fragment.
+        page_path (str): The page's output path.
+        dest_root (str or None): The output folder, needed for root-relative urls.
+        base_path (str): Base url the site is served from.
+
+    Returns:
+        str or None: The normalized output path.
+    """
+
+    if dest_root is not None and url.startswith(base_path):
+        return os.path.normpath(os.path.join(dest_root, url[len(base_path):]))
+    if url and not url.startswith('/') and ':' not in url:
+        return os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(page_path)), url))
+    return None
+
+def _movable(src_file):
+    if not src_file.endswith('.css'):
+        return True
+    with open(src_file, 'r', encoding='utf-8', errors='replace') as f:
+        return _RELATIVE_CSS_REFERENCE.search(f.read()) is None
+
+class AssetLinks:
+    """
+    Maps asset outputs to the output they are emitted at, and rewrites page urls accordingly.
+
+    Attributes:
+        dest_root (str or None): The output folder.
+        base_path (str): Base url the site is served from.
+        targets (dict[str, str]): Asset output path -> the output path it is emitted at, for moved assets only.
+        placed (set[str]): Targets already placed during this build.
+        planned (bool): Whether `plan` made the current plan, i.e. deduplication is enabled.
+        hashed_names (bool): Whether the current plan uses content-hashed file names.
+
+    Methods:
+        configure(dest_root, base_path, targets): Replaces the plan.
+        plan(assets, dest_root, base_path, hashed_names): Groups identical assets and plans their targets.
+        target(dest_file): Returns where an asset output is emitted.
+        signature(): Returns a digest of the plan, for the incremental build manifest.
+        rewrite(html, page_path): Points the page's asset urls at the emitted copies.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty plan: every asset stays where it is.
+        """
+
+        self.configure()
+
+    def configure(self, dest_root = None, base_path = '/', targets = None):
+        """
+        Sets the plan without grouping anything; `plan` computes it, and workers receive the parent's.
+
+        Args:
+            dest_root (str or None): The output folder.
+            base_path (str): Base url the site is served from.
+            targets (dict[str, str] or None): Asset output path -> the output path it is emitted at.
+        """
+
+        self.dest_root = dest_root
+        self.base_path = base_path
+        self.targets = targets or {}
+        self.placed = set()
+        self.planned = False
+        self.hashed_names = False
+
+    def plan(self, assets, dest_root, base_path = '/', hashed_names = False):
+        """
+        Groups the assets by content hash and plans where each group is emitted.
+
+        Args:
+            assets (list[tuple[str, str]]): (src_file, dest_file) of every asset of the build.
+            dest_root (str): The output folder.
+            base_path (str): Base url the site is served from.
+            hashed_names (bool): Emit every asset under a content-hashed file name.
+
+        Returns:
+            dict[str, str]: The planned targets, as stored in `targets`.
+        """
+
+        groups = defaultdict(list)
+        for src_file, dest_file in assets:
+            groups[hash_file(src_file)].append((src_file, dest_file))
+        targets = {}
+        for digest, members in groups.items():
+            dest_files = [dest_file for _, dest_file in members]
+            if len(members) > 1 and all(_movable(src_file) for src_file, _ in members):
+                canonical = min(dest_files, key=lambda path: (path.count(os.sep), path))
+                emitted = {dest_file: canonical for dest_file in dest_files}
+            else:
+                emitted = {dest_file: dest_file for dest_file in dest_files}
+            for dest_file, target in emitted.items():
+                if hashed_names:
+                    target = hashed_name(target, digest)
+                if target != dest_file:
+                    targets[dest_file] = target
+        self.configure(os.path.abspath(dest_root), base_path, targets)
+        self.planned = True
+        self.hashed_names = hashed_names
+        return targets
+
+    def target(self, dest_file):
+        """
+        Returns the output path an asset output is emitted at.
+        """
+
+        return self.targets.get(dest_file, dest_file)
+
+    def signature(self):
+        """
+        Returns a digest of the plan, so pages are re-rendered when it changes.
+        """
+
+        return hashlib.sha256(json.dumps(sorted(self.targets.items())).encode('utf-8')).hexdigest()
+
+    def rewrite(self, html, page_path):
+        """
+        Points the href and src urls of a rendered page at the emitted assets.
+
+        Urls are resolved with `resolve_url`; other urls are left alone.
+
+        Args:
+            html (str): The rendered page.
+            page_path (str): The page's output path.
+
+        Returns:
+            str: The page with rewritten urls.
+        """
+
+        if not self.targets:
+            return html
+
+        def replace(match):
+            attribute, url, suffix = match.groups()
+            target = self.targets.get(resolve_url(url, page_path, self.dest_root, self.base_path))
+            if target is None:
+                return match.group(0)
+            relative_url = os.path.relpath(target, self.dest_root).replace(os.sep, '/')
+            return f'{attribute}="{self.base_path}{relative_url}{suffix}"'
+
+        return _URL_ATTRIBUTE.sub(replace, html)
+
+asset_links = AssetLinks()
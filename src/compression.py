@@ -0,0 +1,158 @@
+"""
+Provides the precompressed sidecars of the build outputs.
+
+Every compressible output (html, css, js, svg, ...) gets a `.gz` sidecar, and a
+`.br` sidecar when the brotli module is importable, so a static server can send
+the precompressed file instead of compressing on every request. Sidecars are
+compressed at the highest level, and gzip ones carry no timestamp, so the same
+output always yields the same bytes. A sidecar that would not be smaller than
+its output is not written.
+
+An index next to the build manifest remembers the size, mtime and content hash
+each output had when its sidecars were written. Outputs whose stat is unchanged
+are skipped without reading them, and outputs rewritten with the same content
+(e.g. by a clean build) are skipped after hashing them, as long as their
+sidecars exist. The rest are compressed by a process pool.
+
+Functions:
+    compress_file(path): Writes the sidecars of one output.
+    remove_sidecars(path): Deletes the sidecars of an output.
+    precompress(outputs, output_root, index_path, jobs): Writes the missing or stale sidecars of a build.
+
+Constants:
+    COMPRESSIBLE_EXTENSIONS: File extensions that get sidecars.
+    ENCODINGS: Sidecar extensions written in this environment, e.g. ('.gz', '.br').
+"""
+import os, gzip, json, hashlib, logging
+from concurrent.futures import ProcessPoolExecutor
+from src.fileio import hash_file, atomic_write
+from src.reporting import stats
+try:
+    import brotli
+except ImportError: # optional: only .gz sidecars
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_INDEX_VERSION = 1
+COMPRESSIBLE_EXTENSIONS = ('.html', '.htm', '.css', '.js', '.mjs', '.json', '.svg', '.xml', '.txt', '.map')
+
+_ENCODERS = {'.gz': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+if brotli is not None:
+    _ENCODERS['.br'] = lambda data: brotli.compress(data, quality=11)
+ENCODINGS = tuple(_ENCODERS)
+
+def compress_file(path):
+    """
+    Writes the sidecars of `path`, removing any that would not be smaller than it.
+
+    Sidecars are replaced in one step with `atomic_write`, and get the output's mtime.
+
+    Args:
+        path (str): The output file.
+
+    Returns:
+        tuple[str, list[str]]: The output's content hash and the sidecars it now has.
+    """
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    output_stat = os.stat(path)
+    sidecars = []
+    for extension, encode in _ENCODERS.items():
+        sidecar = path + extension
+        compressed = encode(data)
+        if len(compressed) >= len(data):
+            if os.path.exists(sidecar):
+                os.unlink(sidecar)
+            continue
+        atomic_write(sidecar, compressed)
+        os.utime(sidecar, ns=(output_stat.st_atime_ns, output_stat.st_mtime_ns))
+        sidecars.append(sidecar)
+    return hashlib.sha256(data).hexdigest(), sidecars
+
+def remove_sidecars(path):
+    """
+    Deletes the sidecars of `path`, e.g. when the output itself is deleted.
+
+    Args:
+        path (str): The output file.
+    """
+
+    for extension in ENCODINGS:
+        if os.path.exists(path + extension):
+            os.unlink(path + extension)
+
+def _load_index(index_path, output_root):
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != COMPRESSION_INDEX_VERSION or data.get('output_root') != output_root \
+            or data.get('encodings') != list(ENCODINGS):
+        return {} # sidecars of other settings are rewritten
+    return data.get('entries', {})
+
+def _save_index(index_path, output_root, entries):
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    data = {'version': COMPRESSION_INDEX_VERSION, 'output_root': output_root, 'encodings': list(ENCODINGS), 'entries': entries}
+    atomic_write(index_path, json.dumps(data, indent=1, sort_keys=True))
+
+def precompress(outputs, output_root, index_path = None, jobs = 1):
+    """
+    Writes the missing or stale sidecars of the compressible `outputs`.
+
+    Args:
+        outputs (iterable[str]): Absolute paths of the build outputs.
+        output_root (str): The output folder.
+        index_path (str or None): The index of compressed outputs; None compresses every output.
+        jobs (int): Number of worker processes compressing outputs.
+
+    Returns:
+        list[str]: Every sidecar of the outputs, written or kept, so orphan removal keeps them.
+    """
+
+    output_root = os.path.abspath(output_root)
+    previous = _load_index(index_path, output_root) if index_path else {}
+    entries = {}
+    sidecars = []
+    pending = []
+    for path in sorted(set(outputs)):
+        if not path.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+            continue
+        try:
+            output_stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        key = os.path.relpath(path, output_root)
+        entry = previous.get(key)
+        if entry is not None and all(os.path.exists(os.path.join(output_root, sidecar)) for sidecar in entry['sidecars']):
+            unchanged = entry['size'] == output_stat.st_size and entry['mtime_ns'] == output_stat.st_mtime_ns
+            if unchanged or (entry['size'] == output_stat.st_size and entry['hash'] == hash_file(path)):
+                entries[key] = dict(entry, mtime_ns=output_stat.st_mtime_ns)
+                sidecars += [os.path.join(output_root, sidecar) for sidecar in entry['sidecars']]
+                logger.debug('Sidecars up to date: %s', path)
+                continue
+        pending.append((path, key, output_stat))
+
+    paths = [path for path, _, _ in pending]
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(compress_file, paths, chunksize=max(1, len(paths) // (jobs * 4))))
+    else:
+        results = [compress_file(path) for path in paths]
+
+    for (path, key, output_stat), (digest, written) in zip(pending, results):
+        entries[key] = {
+            'size': output_stat.st_size,
+            'mtime_ns': output_stat.st_mtime_ns,
+            'hash': digest,
+            'sidecars': [os.path.relpath(sidecar, output_root) for sidecar in written],
+        }
+        sidecars += written
+        stats.changed_outputs += written
+        logger.debug('Compressed %s: %s', path, ', '.join(os.path.basename(sidecar) for sidecar in written) or 'not compressible')
+    if index_path:
+        _save_index(index_path, output_root, entries)
+    return sidecars
@@ -0,0 +1,263 @@
+"""
+Provides the watch mode and the local development server.
+
+The watcher polls the content folder, the static folder and the template for
+changes (standard library only) and rebuilds just the affected outputs in-process,
+keeping the compiled template warm. With asset deduplication, a changed asset
+re-plans the deduplication: every asset is placed again and, if the plan moved
+any asset, every page is regenerated so its urls follow. With precompression,
+the sidecars of rewritten outputs are compressed again and those of deleted
+outputs are deleted, so a static server never sends stale content. The server
+serves the output folder from a background thread of the same process.
+
+Classes:
+    SiteWatcher: Polls the site sources and rebuilds the outputs affected by a change.
+
+Functions:
+    scan_mtimes(path): Returns the modification time of every file below a path.
+    start_server(directory, port): Serves a folder over http from a daemon thread.
+"""
+import os, time, threading, logging
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from src.site_operations import (
+    collect_page_tasks, copy_file, generate_page, render_pages, page_config, asset_tasks
+)
+from src.template import load_template
+from src.file_index import scan_files
+from src.assets import asset_links
+from src.compression import compress_file, remove_sidecars, COMPRESSIBLE_EXTENSIONS
+from src.reporting import stats
+
+logger = logging.getLogger(__name__)
+
+def scan_mtimes(path):
+    """
+    Returns the modification time of every file below `path`.
+
+    Args:
+        path (str): A file or folder.
+
+    Returns:
+        dict[str, int]: Absolute file path -> st_mtime_ns.
+    """
+
+    if os.path.isfile(path):
+        return {os.path.abspath(path): os.stat(path).st_mtime_ns}
+    try:
+        return {indexed.path: indexed.mtime_ns for indexed in scan_files(path)}
+    except FileNotFoundError:
+        return {}
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def start_server(directory, port = 8888):
+    """
+    Serves `directory` over http from a daemon thread.
+
+    Args:
+        directory (str): Folder to serve.
+        port (int): Port to listen on; 0 picks a free port.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call `shutdown()` to stop it.
+    """
+
+    server = ThreadingHTTPServer(('', port), partial(_QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info('Serving %s at http://localhost:%s/', directory, server.server_address[1])
+    return server
+
+class SiteWatcher:
+    """
+    Polls the site sources and rebuilds only the outputs affected by a change.
+
+    Attributes:
+        content_path (str): Folder with the markdown content.
+        static_path (str): Folder with the static assets.
+        template_path (str): The html template.
+        dest_path (str): The output folder.
+        base_path (str): Base url the site is served from.
+        manifest (BuildManifest or None): The incremental build manifest, kept up to date by every rebuild.
+        checksum (bool): Compare copied files by content hash instead of size and modification time.
+        strategy (str): How static files are placed: 'copy', 'reflink', 'hardlink' or 'symlink'.
+        precompress (bool): Keep the .gz/.br sidecars of the rebuilt outputs up to date.
+        interval (float): Seconds between two polls.
+
+    Methods:
+        poll(): Returns the files changed and removed since the previous poll.
+        rebuild(changed, removed): Regenerates, copies or deletes the affected outputs.
+        run(): Polls and rebuilds until interrupted.
+    """
+
+    def __init__(self, content_path, static_path, template_path, dest_path, base_path = '/', interval = 0.1,
+                 manifest = None, checksum = False, strategy = 'copy', precompress = False):
+        """
+        Initializes a SiteWatcher and takes the first snapshot of the sources.
+
+        The manifest, checksum, strategy and precompress settings are those of the
+        initial build, so rebuilt outputs are placed, recorded and compressed the same way.
+        """
+
+        self.content_path = os.path.abspath(content_path)
+        self.static_path = os.path.abspath(static_path)
+        self.template_path = os.path.abspath(template_path)
+        self.dest_path = os.path.abspath(dest_path)
+        self.base_path = base_path
+        self.manifest = manifest
+        self.checksum = checksum
+        self.strategy = strategy
+        self.precompress = precompress
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        mtimes = scan_mtimes(self.static_path)
+        mtimes.update(scan_mtimes(self.content_path))
+        mtimes.update(scan_mtimes(self.template_path))
+        return mtimes
+
+    def poll(self):
+        """
+        Returns the files changed and removed since the previous poll.
+
+        Returns:
+            tuple[list[str], list[str]]: Changed or added files, and removed files.
+        """
+
+        snapshot = self._scan()
+        changed = [path for path, mtime in snapshot.items() if self.snapshot.get(path) != mtime]
+        removed = [path for path in self.snapshot if path not in snapshot]
+        self.snapshot = snapshot
+        return changed, removed
+
+    def _dest_for(self, src_file):
+        for root in (self.content_path, self.static_path):
+            if src_file.startswith(root + os.sep):
+                dest_file = os.path.join(self.dest_path, os.path.relpath(src_file, root))
+                if root == self.content_path and dest_file[-3:] == '.md':
+                    dest_file = dest_file[:-3] + '.html'
+                return dest_file
+        return None
+
+    def _is_page(self, src_file):
+        return src_file.startswith(self.content_path + os.sep) and src_file[-3:] == '.md'
+
+    def _replan_assets(self):
+        # Plans the deduplication again; returns the assets and whether the plan moved any of them
+        before = asset_links.signature()
+        stale = set(asset_links.targets.values())
+        assets = asset_tasks(scan_files(self.static_path), scan_files(self.content_path), self.dest_path)
+        asset_links.plan(assets, self.dest_path, self.base_path, asset_links.hashed_names)
+        # outputs only the previous plan emitted, e.g. an old content-hashed name
+        for dest_file in stale - {asset_links.target(dest_file) for _, dest_file in assets}:
+            self._remove_output(dest_file)
+        return assets, asset_links.signature() != before
+
+    def _remove_output(self, dest_file):
+        # Deletes an output and its sidecars; returns whether the output existed
+        remove_sidecars(dest_file)
+        if not os.path.isfile(dest_file):
+            return False
+        os.unlink(dest_file)
+        return True
+
+    def rebuild(self, changed, removed):
+        """
+        Regenerates, copies or deletes the outputs affected by the given source files.
+
+        A template change regenerates every page; any other change only touches
+        the output produced from that file, except that with asset deduplication
+        a changed or removed asset re-plans the deduplication. Sidecars follow
+        their outputs when precompressing. With a manifest, the rebuilt outputs
+        are recorded and the manifest is saved, so the next incremental build
+        does not redo them.
+
+        Returns:
+            int: The number of outputs written or deleted.
+        """
+
+        manifest = self.manifest
+        if manifest is not None:
+            manifest.next_build()
+        generated = []
+        count = 0
+        written = len(stats.changed_outputs) # outputs written by this rebuild are appended from here
+        changed_assets = [path for path in changed + removed if self._dest_for(path) and not self._is_page(path)]
+        replanned = asset_links.planned and bool(changed_assets)
+        if replanned:
+            assets, moved = self._replan_assets()
+            for src_file, dest_file in assets:
+                os.makedirs(os.path.dirname(asset_links.target(dest_file)), exist_ok=True)
+                copy_file(src_file, dest_file, manifest, self.checksum, self.strategy)
+            count += len(changed_assets)
+            if moved and self.template_path not in changed:
+                changed = changed + [self.template_path] # the pages link to the moved assets
+        if self.template_path in changed:
+            template = load_template(self.template_path)
+            pages, _ = collect_page_tasks(self.content_path, self.dest_path)
+            render_pages(pages, self.template_path, self.base_path, template = template)
+            generated += pages
+            count += len(pages)
+
+        for src_file in changed:
+            dest_file = self._dest_for(src_file)
+            if dest_file is None or (replanned and not self._is_page(src_file)):
+                continue
+            os.makedirs(os.path.dirname(dest_file), exist_ok=True)
+            if self._is_page(src_file):
+                if self.template_path in changed:
+                    continue # already regenerated with all the other pages
+                if generate_page(src_file, self.template_path, dest_file, self.base_path, load_template(self.template_path)):
+                    stats.changed_outputs.append(dest_file)
+                generated.append((src_file, dest_file))
+            else:
+                copy_file(src_file, dest_file, manifest, self.checksum, self.strategy)
+            count += 1
+
+        for src_file in removed:
+            dest_file = self._dest_for(src_file)
+            if replanned and not self._is_page(src_file):
+                if dest_file is not None and dest_file not in asset_links.targets.values():
+                    self._remove_output(dest_file)
+                continue
+            if dest_file is not None and self._remove_output(dest_file):
+                count += 1
+
+        if self.precompress:
+            for dest_file in set(stats.changed_outputs[written:]):
+                if dest_file.lower().endswith(COMPRESSIBLE_EXTENSIONS) and os.path.isfile(dest_file):
+                    compress_file(dest_file)
+
+        if manifest is not None:
+            config = page_config(self.base_path)
+            for src_file, dest_file in generated:
+                manifest.record(dest_file, manifest.dependencies(src_file, self.template_path), config)
+            manifest.save()
+        return count
+
+    def run(self):
+        """
+        Polls and rebuilds until interrupted with Ctrl+C.
+
+        A failing rebuild is reported and the watcher keeps running.
+        """
+
+        logger.info('Watching %s, %s and %s for changes..', self.content_path, self.static_path, self.template_path)
+        try:
+            while True:
+                time.sleep(self.interval)
+                changed, removed = self.poll()
+                if not (changed or removed):
+                    continue
+                start = time.perf_counter()
+                try:
+                    count = self.rebuild(changed, removed)
+                except Exception as e:
+                    logger.error('Rebuild failed: %s', e)
+                    continue
+                logger.info('Rebuilt %d output(s) in %.0f ms', count, (time.perf_counter() - start) * 1000)
+        except KeyboardInterrupt:
+            logger.info('Stopped watching.')
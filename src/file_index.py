@@ -0,0 +1,54 @@
+"""
+Provides the single-walk file index of a source tree.
+
+The content and static folders are each walked once with `os.scandir`. The
+directory entries already tell files from folders, so every file costs a single
+cached stat call. The resulting flat, sorted index is what copying, page
+collection and change detection consume, instead of each re-walking the tree
+with `os.listdir` and per-entry `isdir`/`isfile`/`exists` calls.
+
+Classes:
+    IndexedFile: One file of the index: absolute path, path relative to the root, size and mtime.
+
+Functions:
+    scan_files(root): Walks a folder once and returns its sorted file index.
+"""
+import os
+from collections import namedtuple
+
+IndexedFile = namedtuple('IndexedFile', ['path', 'relpath', 'size', 'mtime_ns'])
+
+def scan_files(root):
+    """
+    Walks `root` once and returns every file below it.
+
+    Folders that disappear during the walk are skipped; a missing `root` raises
+    FileNotFoundError.
+
+    Args:
+        root (str): The folder to index.
+
+    Returns:
+        list[IndexedFile]: The files, sorted by path.
+    """
+
+    root = os.path.abspath(root)
+    files = []
+    pending = [(root, '')]
+    while pending:
+        dir_path, rel_dir = pending.pop()
+        try:
+            entries = os.scandir(dir_path)
+        except FileNotFoundError:
+            if dir_path == root:
+                raise
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir():
+                    pending.append((entry.path, rel_dir + entry.name + os.sep))
+                elif entry.is_file():
+                    stat = entry.stat()
+                    files.append(IndexedFile(entry.path, rel_dir + entry.name, stat.st_size, stat.st_mtime_ns))
+    files.sort()
+    return files
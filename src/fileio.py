@@ -0,0 +1,57 @@
+"""
+Provides the file helpers shared by every stage of the build.
+
+Functions:
+    hash_file(path): Returns the SHA-256 hex digest of a file's contents.
+    atomic_write(path, data): Writes a file through a temporary file that replaces it in one step.
+"""
+import hashlib, os, threading
+
+def hash_file(path):
+    """
+    Returns the SHA-256 hex digest of a file's contents.
+
+    Args:
+        path (str): Path of the file to hash.
+
+    Returns:
+        str: The hex digest.
+    """
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def atomic_write(path, data):
+    """
+    Writes `path` through a temporary file next to it that replaces it in one step.
+
+    Readers never see a half-written file, and a failed write leaves neither a
+    partial file nor the temporary one behind. The temporary name is unique per
+    process and thread.
+
+    Args:
+        path (str): The file to write.
+        data (bytes, str or callable): The content, a str being written as utf-8; or a
+            function that creates the temporary file at the path it is given and
+            returns False to leave `path` as it is.
+
+    Returns:
+        bool: True if `path` was replaced.
+    """
+
+    temp_path = os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        if callable(data):
+            if data(temp_path) is False:
+                return False
+        else:
+            with open(temp_path, 'wb') as f:
+                f.write(data.encode('utf-8') if isinstance(data, str) else data)
+        os.replace(temp_path, path)
+        return True
+    finally:
+        if os.path.lexists(temp_path):
+            os.unlink(temp_path)
@@ -16,7 +16,8 @@ Usage:
     and to parse markdown-like text into structured HTML nodes.
 """
 from enum import Enum
-import re
+import sys
+from src import patterns
 
 class BlockType(Enum):
     """
@@ -68,6 +69,10 @@ class HTMLNode:
         
         props (dict or None):
             Dictionary of HTML attributes (e.g., {'src': 'img.png', 'alt': 'desc'}).
+
+    Nodes use `__slots__` instead of a per-instance `__dict__`, and tag strings are
+    interned so that every node of a page tree shares the same tag objects.
+    Nodes without attributes keep `props` as None rather than an empty dict.
     
     Methods:
         __init__(tag=None, value=None, children=None, props=None):
@@ -75,7 +80,13 @@ class HTMLNode:
         
         to_html():
             Converts the HTMLNode instance to its HTML string representation.
+
+        iter_html():
+            Yields the HTML string representation as a stream of fragments.
             Should be implemented by subclasses. Raises NotImplementedError if called on HTMLNode.
+
+        write_html(fp):
+            Writes the HTML fragments straight into a file-like object.
         
         props_to_html():
             Converts the props dictionary to a string of HTML attributes.
@@ -87,13 +98,15 @@ class HTMLNode:
             Returns a string representation of the HTMLNode instance.
     """
 
+    __slots__ = ('tag', 'value', 'children', 'props')
+
     def __init__(self, tag = None, value = None, children = None, props = None):
         """
         Initializes an HTMLNode instance.
 
         """
 
-        self.tag = tag
+        self.tag = sys.intern(tag) if type(tag) is str else tag
         self.value = value
         self.children = children
         self.props = props
@@ -101,6 +114,19 @@ class HTMLNode:
     def to_html(self):
         """
         Converts the HTMLNode instance to its HTML string representation.
+
+        Joins the fragments yielded by `iter_html` once, so the cost is linear
+        in the size of the output.
+
+        Raises:
+            NotImplementedError: If called on the base HTMLNode class.
+        """
+
+        return ''.join(self.iter_html())
+
+    def iter_html(self):
+        """
+        Yields the HTML string representation of the node as a stream of fragments.
         
         This method should be implemented by subclasses (LeafNode or ParentNode).
         
@@ -109,6 +135,16 @@ class HTMLNode:
         """
                 
         raise NotImplementedError('Method not defined for generic html node')
+
+    def write_html(self, fp):
+        """
+        Writes the HTML representation of the node into a file-like object, fragment by fragment.
+
+        Args:
+            fp: An object with a `write(str)` method, e.g. a file opened in text mode.
+        """
+
+        fp.writelines(self.iter_html())
     
     def props_to_html(self):
         """
@@ -172,10 +208,15 @@ class LeafNode(HTMLNode):
             Dictionary of HTML attributes (e.g., {'src': 'img.png', 'alt': 'desc'}).
 
     Methods:
-        to_html(): 
+        leaf_html():
             Returns the HTML string representation of the leaf node.
 
+        iter_html(): 
+            Yields the HTML string representation of the leaf node.
+
     """
+    __slots__ = ()
+
     def __init__(self, tag = None, value = None, props = None):
         """
         Initializes a LeafNode instance.
@@ -183,9 +224,12 @@ class LeafNode(HTMLNode):
 
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def leaf_html(self):
         """
-        Converts the LeafNode instance to its HTML string representation.
+        Returns the HTML string representation of the LeafNode instance.
+
+        Parents render leaf children through this method directly, without a
+        generator per leaf.
 
         Returns:
             str: The HTML string for this leaf node.
@@ -202,6 +246,19 @@ class LeafNode(HTMLNode):
             return f'<{self.tag}{attr}>{self.value}</{self.tag}>'
         return self.value
 
+    def iter_html(self):
+        """
+        Yields the HTML string representation of the LeafNode instance.
+
+        Yields:
+            str: The HTML string for this leaf node.
+
+        Raises:
+            ValueError: If no value is provided for the leaf node (except for 'img' tags with an empty value).
+        """
+
+        yield self.leaf_html()
+
 class ParentNode(HTMLNode):
     """
     Represents an HTML node that can contain child nodes (a parent node).
@@ -226,10 +283,12 @@ class ParentNode(HTMLNode):
         __init__(tag=None, value=None, children=None, props=None):
             Initializes a ParentNode instance with the given tag, value, children, and props.
 
-        to_html():
-            Converts the ParentNode instance and its children to an HTML string representation.
+        iter_html():
+            Yields the HTML of the ParentNode instance and its children as a stream of fragments.
     """
 
+    __slots__ = ()
+
     def __init__(self, tag = None, value = None , children = None, props = None):
         """
         Initializes a ParentNode instance.
@@ -237,13 +296,13 @@ class ParentNode(HTMLNode):
 
         super().__init__(tag, value, children, props)
 
-    def to_html(self):
+    def iter_html(self):
         """
-        Converts the ParentNode instance and its children to an HTML string representation.
+        Yields the HTML of the ParentNode instance and its children as a stream of fragments.
 
-        Returns:
+        Yields:
             str: 
-                The HTML string for this parent node and its children.
+                HTML fragments for this parent node and its children, in document order.
 
         Raises:
             ValueError: If no tag or no children are provided for the parent node.
@@ -255,11 +314,16 @@ class ParentNode(HTMLNode):
             if not self.children:
                 raise ValueError('Invalid HTML: No children provided for parent node')
         attr = ' ' + self.props_to_html() if self.props else ''
-        html_text =''
+        yield f'<{self.tag}{attr}>'
+        value = self.value
         for node in self.children:
-            value = self.value if self.value else ''
-            html_text += value + node.to_html()
-        return f'<{self.tag}{attr}>{html_text}</{self.tag}>'
+            if value:
+                yield value
+            if type(node) is LeafNode:
+                yield node.leaf_html()
+            else:
+                yield from node.iter_html()
+        yield f'</{self.tag}>'
 
 def block_to_block_type(block_text):
     """
@@ -276,41 +340,32 @@ def block_to_block_type(block_text):
         BlockType: 
             The type of block detected (e.g., HEADING, CODE, QUOTE, ULIST, OLIST, PARAGRAPH).
 
-    Raises:
-        Exception: 
-            If an ordered list is detected but the numbering format is invalid.
+    Each block type is checked with one precompiled pattern, in order, and the
+    first hit wins. Lines numbered out of sequence make the block a paragraph.
     """
 
-    heading_pattern = r'^(#{1,6} )'
-    if re.findall(heading_pattern, block_text):
+    if patterns.HEADING.match(block_text):
         return BlockType.HEADING
-    
-    code_pattern = r'^```.*?```$'
-    if re.findall(code_pattern, block_text,re.DOTALL):
+    if patterns.CODE_BLOCK.match(block_text):
         return BlockType.CODE
-    
-    quote_pattern = r'^> (.*)'
-    if re.findall(quote_pattern, block_text, re.MULTILINE):
+    if patterns.QUOTE_LINE.search(block_text):
         return BlockType.QUOTE
-
-    ulist_pattern = r'^- (.*)'
-    if re.findall(ulist_pattern, block_text, re.MULTILINE):
+    if patterns.ULIST_ITEM.search(block_text):
         return BlockType.ULIST
-    
-    olist_pattern = r'^([0-9]+\. .*)'
-    matches = re.findall(olist_pattern, block_text, re.MULTILINE)
-    if matches:
-        numbers = []
-        for match in matches:
-            list_num = re.findall(r'^([0-9]+)', match)
-            if len(list_num) == 1:
-                numbers.append(int(list_num[0], 10))
-            else:
-                raise Exception('Error: illegal list format')
-        if numbers == list(range(1, len(numbers)+1)) or numbers[::-1] == list(range(1, len(numbers)+1)):
-            return BlockType.OLIST
+
+    # Ordered list: the numbers must count up from 1 or down to 1, checked while scanning
+    previous = None
+    ascending = descending = False
+    for match in patterns.OLIST_ITEM.finditer(block_text):
+        number = int(match.group(1), 10)
+        if previous is None:
+            ascending, descending = number == 1, True
         else:
-            return BlockType.PARAGRAPH
-    else:
-        return BlockType.PARAGRAPH
-    
\ No newline at end of file
+            ascending = ascending and number == previous + 1
+            descending = descending and number == previous - 1
+            if not (ascending or descending):
+                return BlockType.PARAGRAPH
+        previous = number
+    if ascending or (descending and previous == 1):
+        return BlockType.OLIST
+    return BlockType.PARAGRAPH
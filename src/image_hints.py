@@ -0,0 +1,108 @@
+"""
+Provides the image loading hints pass over a parsed page.
+
+The pass walks the page's html node tree once. The first `eager` images are
+taken to be above the fold: they keep loading eagerly, and the first of them,
+the page's hero image, gets `fetchpriority="high"` and a
+`<link rel="preload">` for the template head, so the browser fetches it before
+it has laid out the page. Every later image gets `loading="lazy"` and
+`decoding="async"`.
+
+Rendered blocks are shared between pages through the render cache, so the pass
+never modifies a node: changed images are copied together with the parents on
+their path, and untouched subtrees are reused as they are.
+
+Classes:
+    ImageHints: Adds loading hints to a page's images and returns its preload markup.
+
+Functions:
+    preload_link(src): Returns the head markup preloading an image.
+
+Constants:
+    image_hints: The ImageHints of the current build; disabled unless configured.
+"""
+from src.htmlnode import LeafNode, ParentNode
+
+def preload_link(src):
+    """
+    Returns the `<link rel="preload">` line for the head that fetches the image at `src` early.
+    """
+
+    return f'    <link rel="preload" href="{src}" as="image" fetchpriority="high" />\n'
+
+class ImageHints:
+    """
+    Adds loading hints to the images of a page.
+
+    Attributes:
+        enabled (bool): Whether pages are passed through `apply`.
+        eager (int): Number of leading images treated as above the fold.
+
+    Methods:
+        configure(enabled, eager): Replaces the settings.
+        apply(html_node): Returns the hinted node tree and the page's head markup.
+    """
+
+    def __init__(self):
+        """
+        Initializes a disabled pass.
+        """
+
+        self.configure()
+
+    def configure(self, enabled = False, eager = 1):
+        """
+        Turns the pass on or off.
+
+        Args:
+            enabled (bool): Whether pages get loading hints.
+            eager (int): Number of leading images treated as above the fold.
+        """
+
+        self.enabled = enabled
+        self.eager = eager
+
+    def apply(self, html_node):
+        """
+        Adds loading hints to every image below `html_node`.
+
+        Attributes already set on an image are kept.
+
+        Args:
+            html_node (HTMLNode): The parsed page; it is not modified.
+
+        Returns:
+            tuple[HTMLNode, str]: The hinted tree (sharing every unchanged node with
+                `html_node`) and the head markup preloading the hero image, or ''.
+        """
+
+        images = []
+
+        def visit(node):
+            if node.tag == 'img':
+                position = len(images)
+                images.append(node)
+                if position == 0:
+                    hints = {'loading': 'eager', 'fetchpriority': 'high'} if self.eager > 0 else {'loading': 'lazy', 'decoding': 'async'}
+                elif position < self.eager:
+                    hints = {'loading': 'eager'}
+                else:
+                    hints = {'loading': 'lazy', 'decoding': 'async'}
+                props = dict(node.props or {})
+                for name, value in hints.items():
+                    props.setdefault(name, value)
+                return LeafNode(node.tag, node.value, props) if props != node.props else node
+            if not node.children:
+                return node
+            children = [visit(child) for child in node.children]
+            if all(new is old for new, old in zip(children, node.children)):
+                return node
+            return ParentNode(node.tag, node.value, children, node.props)
+
+        hinted = visit(html_node)
+        head = ''
+        if images and self.eager > 0 and (images[0].props or {}).get('src'):
+            head = preload_link(images[0].props['src'])
+        return hinted, head
+
+image_hints = ImageHints()
@@ -0,0 +1,317 @@
+"""
+Provides the responsive image stage.
+
+PNG and JPEG assets are measured while they are copied. For every configured
+width below the original's, a downscaled and recompressed variant is emitted
+next to the image, e.g. `tolkien.480w.png`. Every `<img>` of a rendered page
+that points at a processed image then gets `width` and `height`, so the browser
+reserves its space before it loads, `loading="lazy"`, and `srcset`/`sizes`
+listing the variants.
+
+Processing is cached by source content hash: the dimensions and variants of an
+image are kept in the cache folder under that hash, so an unchanged image is
+never decoded or resized again, whichever path or build it comes from.
+
+Resizing needs Pillow. Without it images are only measured from their PNG or
+JPEG header, and pages get `width`, `height` and `loading` but no `srcset`.
+
+Classes:
+    ImageInfo: The dimensions and variants of one processed image.
+    ImagePipeline: Processes images during the copy phase and annotates the pages' img tags.
+
+Functions:
+    image_size(path): Reads the pixel dimensions of a PNG or JPEG file from its header.
+
+Constants:
+    IMAGE_EXTENSIONS: File extensions the stage processes.
+    image_pipeline: The ImagePipeline of the current build; disabled unless configured.
+"""
+import os, re, json, struct, hashlib, logging
+from collections import namedtuple
+from src.fileio import hash_file, atomic_write
+from src.placement import place_file
+from src.reporting import stats
+from src.assets import resolve_url
+try:
+    from PIL import Image
+except ImportError: # optional: images are measured, not resized
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+IMAGE_CACHE_VERSION = 1
+DEFAULT_WIDTHS = (480, 960)
+DEFAULT_SIZES = '(max-width: 800px) 100vw, 800px' # the article column is at most 800px wide
+DEFAULT_QUALITY = 82
+
+ImageInfo = namedtuple('ImageInfo', ['width', 'height', 'variants']) # variants: ((path, width), ...), smallest first
+
+_IMG_TAG = re.compile(r'<img\b([^>]*?)(\s*/?)>')
+_SRC_ATTRIBUTE = re.compile(r'\ssrc="([^"?#]*)[^"]*"')
+_PRELOAD_TAG = re.compile(r'<link\b([^>]*\srel="preload"[^>]*?)(\s*/?)>')
+_HREF_ATTRIBUTE = re.compile(r'\shref="([^"?#]*)[^"]*"')
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# JPEG start-of-frame markers, which carry the dimensions (DHT, JPG and DAC share the range)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def image_size(path):
+    """
+    Reads the pixel dimensions of a PNG or JPEG file from its header, without decoding it.
+
+    Args:
+        path (str): The image file.
+
+    Returns:
+        tuple[int, int] or None: (width, height), or None if the file is neither a PNG nor a JPEG.
+    """
+
+    with open(path, 'rb') as f:
+        header = f.read(24)
+        if header[:8] == _PNG_SIGNATURE and header[12:16] == b'IHDR':
+            return struct.unpack('>II', header[16:24])
+        if header[:2] != b'\xff\xd8':
+            return None
+        f.seek(2)
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            if marker[1] == 0xFF: # fill byte
+                f.seek(-1, os.SEEK_CUR)
+                continue
+            if marker[1] in (0x01, *range(0xD0, 0xD8)): # markers without a segment
+                continue
+            segment = f.read(2)
+            if len(segment) < 2:
+                return None
+            length, = struct.unpack('>H', segment)
+            if marker[1] in _JPEG_SOF:
+                height, width = struct.unpack('>xHH', f.read(5))
+                return width, height
+            f.seek(length - 2, os.SEEK_CUR)
+
+def _write_variant(image, width, height, path, quality, extension):
+    resized = image.resize((width, height), Image.LANCZOS)
+    if extension.lower() == '.png':
+        resized.save(path, 'PNG', optimize=True)
+    else:
+        if resized.mode not in ('RGB', 'L'):
+            resized = resized.convert('RGB')
+        resized.save(path, 'JPEG', quality=quality, optimize=True, progressive=True)
+
+def _up_to_date(cached_file, dest_file):
+    # placed variants keep the mtime of their cached copy
+    try:
+        cached_stat, dest_stat = os.stat(cached_file), os.stat(dest_file)
+    except FileNotFoundError:
+        return False
+    return (cached_stat.st_size, cached_stat.st_mtime_ns) == (dest_stat.st_size, dest_stat.st_mtime_ns)
+
+class ImagePipeline:
+    """
+    Processes images during the copy phase and annotates the img tags of rendered pages.
+
+    Attributes:
+        widths (tuple[int] or None): Variant widths in pixels; None disables the stage.
+        directory (str or None): Cache folder for dimensions and variants; without it nothing is resized.
+        dest_root (str or None): The output folder.
+        base_path (str): Base url the site is served from.
+        sizes (str): The `sizes` attribute emitted with a `srcset`.
+        quality (int): JPEG quality of the variants.
+        images (dict[str, ImageInfo]): Output path -> the processed image placed there during this build.
+
+    Methods:
+        configure(widths, directory, dest_root, base_path, sizes, quality, images): Replaces the settings.
+        process(src_file, dest_file, strategy): Measures an image and places its variants next to it.
+        outputs(dest_file): Returns the variant paths placed for an image output.
+        signature(): Returns a digest of the processed images, for the incremental build manifest.
+        rewrite(html, page_path): Adds dimensions, lazy loading and srcset to the page's img tags and image preloads.
+    """
+
+    def __init__(self):
+        """
+        Initializes a disabled pipeline.
+        """
+
+        self.configure()
+
+    @property
+    def enabled(self):
+        return self.widths is not None
+
+    def configure(self, widths = None, directory = None, dest_root = None, base_path = '/',
+                  sizes = DEFAULT_SIZES, quality = DEFAULT_QUALITY, images = None):
+        """
+        Enables the pipeline with the variant `widths`, or disables it with None.
+
+        Workers are configured with the parent's settings, including the
+        `images` it already processed, so pages rendered there are rewritten alike.
+        Enabling the stage without Pillow logs a warning, once in the parent.
+        """
+
+        if widths is not None and Image is None and images is None:
+            logger.warning('Pillow is not installed: images get width, height and loading, but no variants or srcset')
+        self.widths = tuple(sorted(widths)) if widths is not None else None
+        self.directory = directory
+        self.dest_root = dest_root
+        self.base_path = base_path
+        self.sizes = sizes
+        self.quality = quality
+        self.images = images or {}
+
+    def _entry_dir(self, digest):
+        # The cache folder of an image with content hash `digest`, for the current settings
+        if not self.directory:
+            return None
+        key = hashlib.sha256(f'{IMAGE_CACHE_VERSION}\0{digest}\0{self.widths}\0{self.quality}\0{Image is not None}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], key)
+
+    def _entry(self, src_file, digest):
+        # Returns the cached {'width', 'height', 'variants': [[name, width], ...]} of an image, creating it on a miss
+        entry_dir = self._entry_dir(digest)
+        if entry_dir is not None:
+            try:
+                with open(os.path.join(entry_dir, 'image.json'), 'r', encoding='utf-8') as f:
+                    return entry_dir, json.load(f)
+            except (OSError, ValueError):
+                pass
+        size = image_size(src_file)
+        if size is None:
+            return entry_dir, None
+        width, height = size
+        entry = {'width': width, 'height': height, 'variants': []}
+        if entry_dir is None:
+            return entry_dir, entry
+        os.makedirs(entry_dir, exist_ok=True)
+        if Image is not None:
+            extension = os.path.splitext(src_file)[1]
+            with Image.open(src_file) as image:
+                for variant_width in self.widths:
+                    if variant_width >= width:
+                        break
+                    name = f'{variant_width}w{extension}'
+                    variant_height = max(1, round(height * variant_width / width))
+                    atomic_write(os.path.join(entry_dir, name), lambda temp_path: _write_variant(
+                        image, variant_width, variant_height, temp_path, self.quality, extension))
+                    entry['variants'].append([name, variant_width])
+        atomic_write(os.path.join(entry_dir, 'image.json'), json.dumps(entry))
+        logger.debug('Processed %s: %sx%s, %d variant(s)', src_file, width, height, len(entry['variants']))
+        return entry_dir, entry
+
+    def process(self, src_file, dest_file, strategy = 'copy'):
+        """
+        Measures the image placed at `dest_file` and places its variants next to it.
+
+        Unchanged variants are left alone; others are placed from the cache with
+        `strategy` (symlinks become copies, the cache is not a source tree).
+        Files that are not images are ignored.
+
+        Args:
+            src_file (str): The source image.
+            dest_file (str): Its output path.
+            strategy (str): How variants are placed, see src.placement.
+
+        Returns:
+            ImageInfo or None: The processed image, or None if `src_file` is not a readable image.
+        """
+
+        if not self.enabled or not dest_file.lower().endswith(IMAGE_EXTENSIONS):
+            return None
+        entry_dir, entry = self._entry(src_file, hash_file(src_file))
+        if entry is None:
+            return None
+        stem, extension = os.path.splitext(dest_file)
+        variants = []
+        for name, width in entry['variants']:
+            cached_file = os.path.join(entry_dir, name)
+            variant_file = f'{stem}.{width}w{extension}'
+            if not _up_to_date(cached_file, variant_file):
+                place_file(cached_file, variant_file, 'copy' if strategy == 'symlink' else strategy)
+                stats.copies += 1
+                stats.changed_outputs.append(variant_file)
+                logger.debug('Placed variant %s', variant_file)
+            variants.append((variant_file, width))
+        info = ImageInfo(entry['width'], entry['height'], tuple(variants))
+        self.images[dest_file] = info
+        return info
+
+    def outputs(self, dest_file):
+        """
+        Returns the variant paths placed next to the image output `dest_file`.
+        """
+
+        info = self.images.get(dest_file)
+        return [path for path, _ in info.variants] if info else []
+
+    def signature(self):
+        """
+        Returns a digest of the processed images, so pages are re-rendered when one changes.
+        """
+
+        return hashlib.sha256(json.dumps(sorted((path, list(info)) for path, info in self.images.items())).encode('utf-8')).hexdigest()
+
+    def rewrite(self, html, page_path):
+        """
+        Adds `width`, `height`, `loading="lazy"` and, with variants, `srcset` and `sizes`
+        to the img tags of a rendered page that point at a processed image.
+
+        Attributes already present on a tag are kept. Variant urls are siblings of
+        the `src` url, so they follow it whether it is relative or not. Image
+        preloads in the head get the same candidates as `imagesrcset`/`imagesizes`.
+
+        Args:
+            html (str): The rendered page.
+            page_path (str): The page's output path.
+
+        Returns:
+            str: The page with annotated img tags.
+        """
+
+        if not self.images:
+            return html
+
+        def lookup(url_attribute, attributes):
+            url = url_attribute.search(attributes)
+            if url is None:
+                return None, None
+            return url.group(1), self.images.get(resolve_url(url.group(1), page_path, self.dest_root, self.base_path))
+
+        def srcset(url, info):
+            prefix = url[:url.rfind('/') + 1]
+            candidates = [f'{prefix}{os.path.basename(path)} {width}w' for path, width in info.variants]
+            candidates.append(f'{url} {info.width}w')
+            return ', '.join(candidates)
+
+        def replace_img(match):
+            attributes, end = match.groups()
+            url, info = lookup(_SRC_ATTRIBUTE, attributes)
+            if info is None:
+                return match.group(0)
+            added = []
+            if ' width=' not in attributes and ' height=' not in attributes:
+                added.append(f'width="{info.width}" height="{info.height}"')
+            if info.variants and ' srcset=' not in attributes:
+                added.append(f'srcset="{srcset(url, info)}" sizes="{self.sizes}"')
+            if ' loading=' not in attributes:
+                added.append('loading="lazy"')
+            if not added:
+                return match.group(0)
+            return f'<img{attributes} {" ".join(added)}{end}>'
+
+        def replace_preload(match):
+            # a preload must name the same candidates as the img, or the browser fetches the image twice
+            attributes, end = match.groups()
+            if ' as="image"' not in attributes or ' imagesrcset=' in attributes:
+                return match.group(0)
+            url, info = lookup(_HREF_ATTRIBUTE, attributes)
+            if info is None or not info.variants:
+                return match.group(0)
+            return f'<link{attributes} imagesrcset="{srcset(url, info)}" imagesizes="{self.sizes}"{end}>'
+
+        html = _IMG_TAG.sub(replace_img, html)
+        if '"preload"' in html:
+            html = _PRELOAD_TAG.sub(replace_preload, html)
+        return html
+
+image_pipeline = ImagePipeline()
@@ -1,30 +1,144 @@
-import os, sys
+import os, time, argparse, logging
 from src.site_operations import (
     create_dest_folder, copy_contents, generate_page,
-    generate_pages_recursive
+    generate_pages_recursive, remove_orphans, asset_tasks
 )
+from src.manifest import BuildManifest
+from src.dev_server import SiteWatcher, start_server
+from src.profiler import BuildProfiler
+from src.reporting import configure_logging, stats
+from src.render_cache import block_cache
+from src.placement import STRATEGIES
+from src.file_index import scan_files
+from src.assets import asset_links
+from src.images import image_pipeline, DEFAULT_WIDTHS
+from src.image_hints import image_hints
+from src.minify import minifier
+from src.compression import precompress, ENCODINGS
 
+logger = logging.getLogger('src.main')
+
+def _widths(value):
+    try:
+        return tuple(int(width) for width in value.split(',') if width)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'not a comma separated list of widths: {value}')
+
+def parse_args(argv = None):
+    parser = argparse.ArgumentParser(description='Generate the static site into ./public')
+    parser.add_argument('base_path', nargs='?', default='/',
+                        help='base url the site is served from (default: /)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only rebuild outputs whose sources, template or base path changed')
+    parser.add_argument('--explain', action='store_true',
+                        help='print why each output is rebuilt (implies --incremental)')
+    parser.add_argument('--clean', action='store_true',
+                        help='empty ./public before building instead of syncing it')
+    parser.add_argument('--checksum', action='store_true',
+                        help='compare copied files by content hash instead of size and modification time')
+    parser.add_argument('--assets', choices=STRATEGIES, default='copy',
+                        help='how static files are placed in ./public (default: copy); '
+                             'unsupported strategies fall back to copying')
+    parser.add_argument('--dedupe-assets', action='store_true',
+                        help='emit byte-identical assets once and point the pages at that copy')
+    parser.add_argument('--hash-asset-names', action='store_true',
+                        help='emit assets under content-hashed file names (implies --dedupe-assets)')
+    parser.add_argument('--responsive-images', action='store_true',
+                        help='emit downscaled variants of png/jpeg images (needs Pillow) and give img tags '
+                             'width, height, srcset and loading="lazy"; processing is cached in .ssg-cache/images')
+    parser.add_argument('--image-widths', type=_widths, default=','.join(map(str, DEFAULT_WIDTHS)), metavar='W,W,...',
+                        help='variant widths in pixels for --responsive-images (default: %(default)s)')
+    parser.add_argument('--image-hints', action='store_true',
+                        help='preload the first image of every page and lazy-load the images below it')
+    parser.add_argument('--eager-images', type=int, default=1, metavar='N',
+                        help='with --image-hints, number of leading images loaded eagerly (default: 1)')
+    parser.add_argument('--minify', action='store_true',
+                        help='collapse insignificant whitespace in pages (code blocks are kept) and minify stylesheets; '
+                             'results are cached in .ssg-cache/minify')
+    parser.add_argument('--precompress', action='store_true',
+                        help=f'write {"/".join(ENCODINGS)} sidecars of compressible outputs for static servers; '
+                             'unchanged outputs keep theirs')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of worker processes rendering pages (0: one per cpu)')
+    parser.add_argument('--render-cache-size', type=int, default=4096, metavar='N',
+                        help='rendered markdown blocks kept in memory (0: off, default: 4096)')
+    parser.add_argument('--persist-render-cache', action='store_true',
+                        help='also keep rendered blocks in .ssg-cache/blocks across builds')
+    parser.add_argument('--changed-list', metavar='PATH',
+                        help='write the outputs this build changed, relative to ./public, one per line to PATH')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='overlap reading, rendering and writing pages; reads and writes run in threads, '
+                             'rendering in this process or, with -j, in the worker pool')
+    parser.add_argument('--profile', action='store_true',
+                        help='time every pipeline stage and print a report (renders serially)')
+    parser.add_argument('--profile-top', type=int, default=10, metavar='N',
+                        help='number of slowest pages in the --profile report (default: 10)')
+    parser.add_argument('--profile-trace', metavar='PATH',
+                        help='with --profile, also write a Chrome trace-event JSON to PATH')
+    parser.add_argument('--watch', action='store_true',
+                        help='after building, rebuild affected outputs whenever content, static files or the template change')
+    parser.add_argument('--serve', action='store_true',
+                        help='serve ./public over http from this process')
+    parser.add_argument('--port', type=int, default=8888,
+                        help='port for --serve (default: 8888)')
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('-q', '--quiet', dest='verbosity', action='store_const', const='quiet',
+                           default='summary', help='only report warnings and errors')
+    verbosity.add_argument('-v', '--verbose', dest='verbosity', action='store_const', const='verbose',
+                           help='log every file copied, skipped or generated')
+    return parser.parse_args(argv)
+
+
+def main(argv = None):
+    args = parse_args(argv)
+    configure_logging(args.verbosity)
+    stats.reset()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    block_cache.configure(
+        args.render_cache_size,
+        os.path.abspath(os.path.join(script_dir, '../.ssg-cache/blocks')) if args.persist_render_cache else None,
+    )
+
+    image_hints.configure(args.image_hints, args.eager_images)
+    minifier.configure(args.minify, os.path.abspath(os.path.join(script_dir, '../.ssg-cache/minify')) if args.minify else None)
+
+    pipeline = args.pipeline
+    profiler = None
+    if args.profile:
+        # worker processes would keep their timings to themselves, and the pipeline bypasses generate_page
+        jobs = 1
+        pipeline = False
+        profiler = BuildProfiler(trace = args.profile_trace is not None).install()
 
-if __name__ == "__main__":
     # ------------------------------------------------------------------------
-    # Copy static assets into the public folder
+    # Sync static assets into the public folder
     # ------------------------------------------------------------------------
     # Resolve filapaths irrespective of where the script is run from
     # ----------------
-    print('''
--------------------------------------------
-Copying static files..
-___________________________________________        
-''')
-    script_dir = os.path.dirname(os.path.abspath(__file__))
+    logger.debug('Copying static files..')
     dest_path = os.path.join(script_dir, '../public')
     dest_path = os.path.abspath(dest_path)
 
     src_path = os.path.join(script_dir, './static')
     src_path = os.path.abspath(src_path)
-    
-    create_dest_folder(dest_path)
-    copy_contents(src_path, dest_path)
+
+    manifest = None
+    if args.incremental or args.explain:
+        manifest_path = os.path.abspath(os.path.join(script_dir, '../.ssg-cache/manifest.json'))
+        manifest = BuildManifest.load(manifest_path, dest_path, args.explain)
+
+    create_dest_folder(dest_path, clean = args.clean)
+    # each source tree is walked once; copying and rendering share the index
+    static_files = scan_files(src_path)
+    content_files = scan_files(os.path.join(script_dir, '../content'))
+    if args.dedupe_assets or args.hash_asset_names:
+        asset_links.plan(asset_tasks(static_files, content_files, dest_path), dest_path, args.base_path, args.hash_asset_names)
+    if args.responsive_images:
+        image_pipeline.configure(args.image_widths, os.path.abspath(os.path.join(script_dir, '../.ssg-cache/images')),
+                                 dest_path, args.base_path)
+    outputs = copy_contents(src_path, dest_path, manifest, args.checksum, args.assets, static_files)
     # -----------------------------------
     # or use,
     # shutil.copytree(src_path, dest_path, dirs_exist_ok=True)
@@ -32,11 +146,7 @@ ___________________________________________
     # ------------------------------------------------------------------------
     # Generate the Html docuemnt from the markdown file recursively
     # ------------------------------------------------------------------------
-    print('''
--------------------------------------------
-Generating html..
-___________________________________________        
-''')
+    logger.debug('Generating html..')
     curr_dir = os.path.dirname(__file__)
 
     dir_path_content = os.path.join(curr_dir, '../content/')
@@ -48,11 +158,53 @@ ___________________________________________
     dest_dir_path = os.path.join(curr_dir, '../public/')
     dest_dir_path = os.path.abspath(dest_dir_path)
 
-    base_path = '/'
-    if len(sys.argv) > 1:
-        base_path = sys.argv[1]
-    
-    print(f'Base url changed to: {base_path}')
+    base_path = args.base_path
 
-    generate_pages_recursive(dir_path_content, template_path, dest_dir_path, base_path)
-    
+    logger.debug('Base url changed to: %s', base_path)
+
+    outputs += generate_pages_recursive(
+        dir_path_content, template_path, dest_dir_path, base_path, manifest, jobs, args.checksum, args.assets, content_files, pipeline
+    )
+
+    if manifest is not None:
+        manifest.removed_outputs() # explains the removals; remove_orphans deletes the files
+        manifest.save()
+    # sidecars are outputs too, or orphan removal would delete them
+    if args.precompress:
+        outputs += precompress(outputs, dest_path, os.path.abspath(os.path.join(script_dir, '../.ssg-cache/compression.json')), jobs)
+    remove_orphans(dest_path, outputs)
+
+    if args.changed_list:
+        with open(args.changed_list, 'w', encoding='utf-8') as f:
+            for changed in sorted(stats.changed_outputs):
+                f.write(os.path.relpath(changed, dest_path) + '\n')
+
+    logger.info(stats.summary())
+
+    if profiler is not None:
+        profiler.uninstall()
+        print(profiler.report(args.profile_top))
+        if args.profile_trace:
+            profiler.write_trace(args.profile_trace)
+            print(f'Trace written to {args.profile_trace}')
+
+    # ------------------------------------------------------------------------
+    # Local development: serve and/or watch for changes
+    # ------------------------------------------------------------------------
+    server = start_server(dest_path, args.port) if args.serve else None
+    if args.watch:
+        SiteWatcher(dir_path_content, src_path, template_path, dest_dir_path, base_path,
+                    manifest = manifest, checksum = args.checksum, strategy = args.assets,
+                    precompress = args.precompress).run()
+    elif server is not None:
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Provides the persistent build dependency graph used for incremental site builds.
+
+For every generated or copied output the manifest records the inputs it was
+produced from (the markdown or asset source, and the template for pages) with
+their content hashes, and the configuration used (e.g. the base path). On the
+next build an output is reused only if none of its recorded inputs or settings
+changed, and the reasons for every rebuild and every removed output can be
+reported. Removing the outputs themselves is left to the build's orphan removal.
+
+Classes:
+    BuildManifest: Loads, queries, updates and saves the dependency graph.
+"""
+import json, os, logging
+from src.fileio import hash_file, atomic_write
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 2
+
+class BuildManifest:
+    """
+    Represents the dependency graph of a build: output -> inputs and configuration.
+
+    Attributes:
+        path (str): Location of the manifest JSON file.
+        output_root (str): Root of the output tree; outputs are stored relative to it.
+        explain (bool): Log why each stale output is rebuilt.
+        previous (dict): Graph loaded from the last build, keyed by relative output path.
+        entries (dict): Graph recorded during the current build.
+
+    Methods:
+        load(path, output_root, explain=False): Creates a manifest populated from `path` if it exists.
+        file_hash(path): Returns the (memoised) content hash of a file.
+        dependencies(source, template=None): Returns the hashed inputs of an output.
+        stale_reasons(dest, inputs, config=None): Lists why `dest` has to be rebuilt.
+        is_fresh(dest, inputs, config=None): Checks whether `dest` can be reused, explaining if not.
+        record(dest, inputs, config=None): Records the inputs and configuration of `dest`.
+        next_build(): Starts another build on top of the graph recorded so far.
+        removed_outputs(): Lists outputs of the previous build that were not produced this time.
+        save(): Writes the current graph to disk.
+    """
+
+    def __init__(self, path, output_root, explain = False):
+        """
+        Initializes an empty BuildManifest instance.
+        """
+
+        self.path = path
+        self.output_root = os.path.abspath(output_root)
+        self.explain = explain
+        self.previous = {}
+        self.entries = {}
+        self._hashes = {}
+
+    @classmethod
+    def load(cls, path, output_root, explain = False):
+        """
+        Creates a manifest populated from the file at `path`.
+
+        A missing, unreadable or outdated manifest is treated as empty, which
+        simply results in a full build.
+        """
+
+        manifest = cls(path, output_root, explain)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        if data.get('version') == MANIFEST_VERSION and data.get('output_root') == manifest.output_root:
+            manifest.previous = data.get('entries', {})
+        return manifest
+
+    def _key(self, dest):
+        return os.path.relpath(os.path.abspath(dest), self.output_root)
+
+    def file_hash(self, path):
+        """
+        Returns the content hash of a file, hashing each path at most once per build.
+        """
+
+        path = os.path.abspath(path)
+        if path not in self._hashes:
+            self._hashes[path] = hash_file(path)
+        return self._hashes[path]
+
+    def dependencies(self, source, template = None):
+        """
+        Returns the hashed inputs an output is produced from.
+
+        Args:
+            source (str): The markdown or asset file.
+            template (str or None): The html template, for generated pages.
+
+        Returns:
+            dict[str, dict]: Absolute input path -> {'kind': 'source' or 'template', 'hash': str}.
+        """
+
+        inputs = {os.path.abspath(source): {'kind': 'source', 'hash': self.file_hash(source)}}
+        if template is not None:
+            inputs[os.path.abspath(template)] = {'kind': 'template', 'hash': self.file_hash(template)}
+        return inputs
+
+    def stale_reasons(self, dest, inputs, config = None):
+        """
+        Lists why `dest` has to be rebuilt.
+
+        Args:
+            dest (str): The output path.
+            inputs (dict): The output's current inputs, as returned by `dependencies`.
+            config (dict or None): Settings the output depends on, e.g. {'base_path': '/'}.
+
+        Returns:
+            list[str]: Human readable reasons; empty if the output is up to date.
+        """
+
+        entry = self.previous.get(self._key(dest))
+        if entry is None:
+            return ['new output']
+        reasons = []
+        for path, current in inputs.items():
+            recorded = entry['inputs'].get(path)
+            if recorded is None:
+                reasons.append(f"new {current['kind']}: {path}")
+            elif recorded['hash'] != current['hash']:
+                reasons.append(f"{current['kind']} changed: {path}")
+        for path, recorded in entry['inputs'].items():
+            if path not in inputs:
+                reasons.append(f"{recorded['kind']} no longer used: {path}")
+        config = config or {}
+        for name in sorted(set(config) | set(entry['config'])):
+            if config.get(name) != entry['config'].get(name):
+                reasons.append(f"{name} changed: {entry['config'].get(name)!r} -> {config.get(name)!r}")
+        if not reasons and not os.path.isfile(dest):
+            reasons.append('output missing')
+        return reasons
+
+    def is_fresh(self, dest, inputs, config = None):
+        """
+        Checks whether `dest` was produced from exactly these inputs and still exists.
+
+        With `explain` set, the reasons for a rebuild are logged.
+
+        Returns:
+            bool: True if the output can be reused as is, False otherwise.
+        """
+
+        reasons = self.stale_reasons(dest, inputs, config)
+        if reasons and self.explain:
+            logger.info('Rebuilding %s: %s', self._key(dest), '; '.join(reasons))
+        return not reasons
+
+    def record(self, dest, inputs, config = None):
+        """
+        Records the inputs and configuration `dest` was produced from during the current build.
+        """
+
+        self.entries[self._key(dest)] = {'inputs': inputs, 'config': config or {}}
+
+    def next_build(self):
+        """
+        Starts another build on top of the graph recorded so far, e.g. a watch mode rebuild.
+
+        The recorded graph becomes the previous one and is kept for outputs the
+        new build does not touch; file hashes are computed afresh.
+        """
+
+        self.previous = self.entries
+        self.entries = dict(self.entries)
+        self._hashes = {}
+
+    def removed_outputs(self):
+        """
+        Lists the outputs of the previous build that this build no longer produces.
+
+        Their source may be gone, or the output merged into another or renamed,
+        e.g. by asset deduplication. Nothing is deleted here; with `explain` set,
+        each output that goes away is logged.
+
+        Returns:
+            list[str]: Absolute paths of the outputs not produced by this build.
+        """
+
+        removed = []
+        for key in self.previous:
+            if key not in self.entries:
+                removed.append(os.path.join(self.output_root, key))
+                if self.explain:
+                    logger.info('Removing %s: no longer produced by this build', key)
+        return removed
+
+    def save(self):
+        """
+        Writes the graph recorded during the current build to disk.
+        """
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        data = {
+            'version': MANIFEST_VERSION,
+            'output_root': self.output_root,
+            'entries': self.entries,
+        }
+        atomic_write(self.path, json.dumps(data, indent=1, sort_keys=True))
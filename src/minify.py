@@ -0,0 +1,186 @@
+"""
+Provides the minification of html pages and stylesheets.
+
+Html minification collapses insignificant whitespace: every whitespace run
+becomes one space, and whitespace around block-level tags is dropped. The
+contents of `pre`, `textarea`, `script` and `style` elements are kept
+byte for byte, so code blocks render exactly as written. Css minification drops
+comments and the whitespace around punctuation, leaving strings alone.
+
+Results are cached by content hash on disk across builds, so an unchanged page
+or stylesheet is not minified again. Stylesheets are also kept in memory, as
+the same one is often copied into many folders.
+
+Classes:
+    Minifier: Minifies pages and stylesheets of the build through the cache.
+
+Functions:
+    minify_html(html): Returns `html` without insignificant whitespace.
+    minify_css(css): Returns `css` without comments and insignificant whitespace.
+
+Constants:
+    minifier: The Minifier of the current build; disabled unless configured.
+"""
+import os, re, hashlib
+from src.fileio import atomic_write
+
+MINIFY_CACHE_VERSION = 1
+
+_BLOCK_TAGS = ('!doctype|html|head|body|title|meta|link|article|aside|section|header|footer|nav|main|div|p|'
+               'h[1-6]|ul|ol|li|dl|dt|dd|blockquote|pre|hr|br|table|thead|tbody|tfoot|tr|th|td|figure|figcaption|form')
+_PRESERVED = re.compile(r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.IGNORECASE | re.DOTALL)
+_WHITESPACE = re.compile(r'\s+')
+_AROUND_BLOCK_TAG = re.compile(rf'\s*(</?(?:{_BLOCK_TAGS})\b[^>]*>)\s*', re.IGNORECASE)
+
+_CSS_STRING_OR_COMMENT = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/)', re.DOTALL)
+_CSS_AROUND_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+_CSS_AFTER_COLON = re.compile(r':\s+')
+
+def minify_html(html):
+    """
+    Returns `html` without insignificant whitespace.
+
+    Args:
+        html (str): The page.
+
+    Returns:
+        str: The minified page; `pre`, `textarea`, `script` and `style` contents are unchanged.
+    """
+
+    parts = _PRESERVED.split(html)
+    minified = []
+    # split() yields text, preserved element, tag name, text, ...
+    for index in range(0, len(parts), 3):
+        text = _AROUND_BLOCK_TAG.sub(r'\1', _WHITESPACE.sub(' ', parts[index]))
+        if index + 2 < len(parts) and parts[index + 2].lower() == 'pre':
+            text = text.rstrip() # pre is a block; textarea is inline-block and keeps the space around it
+        if index > 0 and parts[index - 1].lower() == 'pre':
+            text = text.lstrip()
+        minified.append(text)
+        if index + 1 < len(parts):
+            minified.append(parts[index + 1])
+    return ''.join(minified).strip()
+
+def minify_css(css):
+    """
+    Returns `css` without comments and insignificant whitespace.
+
+    Spaces that can change a selector (e.g. before ':') or an expression
+    (e.g. around '+' in calc()) are kept.
+
+    Args:
+        css (str): The stylesheet.
+
+    Returns:
+        str: The minified stylesheet.
+    """
+
+    def squeeze(code):
+        code = _CSS_AROUND_PUNCTUATION.sub(r'\1', _WHITESPACE.sub(' ', code))
+        return _CSS_AFTER_COLON.sub(':', code).replace(';}', '}')
+
+    minified = []
+    code = []
+    # split() yields code, string or comment, code, ...; a comment only separates the code around it
+    for index, part in enumerate(_CSS_STRING_OR_COMMENT.split(css)):
+        if index % 2 == 0:
+            code.append(part)
+        elif part.startswith('/*'):
+            code.append(' ')
+        else:
+            minified.append(squeeze(''.join(code)))
+            minified.append(part)
+            code = []
+    minified.append(squeeze(''.join(code)))
+    return ''.join(minified).strip()
+
+_MINIFIERS = {'html': minify_html, 'css': minify_css}
+
+class Minifier:
+    """
+    Minifies the pages and stylesheets of a build, caching the results by content hash.
+
+    Attributes:
+        enabled (bool): Whether pages and stylesheets are minified.
+        directory (str or None): Folder of the on-disk cache; None caches stylesheets in memory only.
+
+    Methods:
+        configure(enabled, directory): Replaces the settings and empties the in-memory cache.
+        minify(text, kind): Returns the minified 'html' or 'css' text.
+        write_css(src_file, dest_file): Writes the minified stylesheet unless it is already up to date.
+    """
+
+    def __init__(self):
+        """
+        Initializes a disabled minifier.
+        """
+
+        self.configure()
+
+    def configure(self, enabled = False, directory = None):
+        """
+        Turns minification on or off and empties the in-memory stylesheet cache.
+
+        Args:
+            enabled (bool): Whether pages and stylesheets are minified.
+            directory (str or None): Folder of the on-disk cache.
+        """
+
+        self.enabled = enabled
+        self.directory = directory
+        self._memory = {}
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def minify(self, text, kind):
+        """
+        Returns the minified `text`, from the cache if the same content was minified before.
+
+        Args:
+            text (str): The page or stylesheet.
+            kind (str): 'html' or 'css'.
+
+        Returns:
+            str: The minified text.
+        """
+
+        key = hashlib.sha256(f'{MINIFY_CACHE_VERSION}\0{kind}\0{text}'.encode('utf-8')).hexdigest()
+        minified = self._memory.get(key)
+        if minified is not None:
+            return minified
+        if self.directory is not None:
+            try:
+                with open(self._path(key), 'r', encoding='utf-8') as f:
+                    minified = f.read()
+            except OSError:
+                pass
+        if minified is None:
+            minified = _MINIFIERS[kind](text)
+            if self.directory is not None:
+                path = self._path(key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                atomic_write(path, minified)
+        if kind == 'css':
+            self._memory[key] = minified
+        return minified
+
+    def write_css(self, src_file, dest_file):
+        """
+        Writes the minified `src_file` to `dest_file` unless it already holds exactly that.
+
+        Returns:
+            bool: True if the file was written, False if it was already up to date.
+        """
+
+        with open(src_file, 'r', encoding='utf-8') as f:
+            data = self.minify(f.read(), 'css').encode('utf-8')
+        try:
+            with open(dest_file, 'rb') as f:
+                if not os.path.islink(dest_file) and f.read() == data:
+                    return False
+        except FileNotFoundError:
+            pass
+        return atomic_write(dest_file, data)
+
+minifier = Minifier()
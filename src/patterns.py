@@ -0,0 +1,45 @@
+"""
+Registry of the compiled regular expressions used to parse markdown.
+
+Every pattern is compiled once at import time instead of being looked up in
+the `re` module's small internal cache on every call. Block patterns that
+only need to test the start of a block are meant to be used with `match`;
+line-based patterns are compiled with `re.MULTILINE`.
+
+Block patterns:
+    HEADING: A heading marker ('#' to '######' followed by a space) at the start of a block.
+    HEADING_TEXT: Captures the marker and the text of a heading line.
+    CODE_BLOCK: A block fenced by ``` at its start and end; captures the code.
+    QUOTE_LINE: A line starting with '> '; captures the quoted text.
+    ULIST_ITEM: A line starting with '- '; captures the item text.
+    OLIST_ITEM: A line starting with 'N. '; captures the number and the item text.
+    OLIST_MARKER: The 'N. ' marker at the start of a single line; captures the number.
+    TITLE: The first '# ' heading of a document, after leading blank lines.
+
+Inline patterns:
+    INLINE_DELIMITER: Any of the inline delimiters '**', '_' and '`'.
+    IMAGE: A markdown image '![alt](url)', matched from the '['.
+    LINK: A markdown link '[text](url)' not preceded by '!'.
+    INLINE_MARKUP: Any character that can start inline markup; text without one is plain.
+"""
+import re
+
+# ------------------------------------------------------------------------
+# Block patterns
+# ------------------------------------------------------------------------
+HEADING = re.compile(r'#{1,6} ')
+HEADING_TEXT = re.compile(r'(#+) (.*)')
+CODE_BLOCK = re.compile(r'```(.*?)```$', re.DOTALL)
+QUOTE_LINE = re.compile(r'^> (.*)', re.MULTILINE)
+ULIST_ITEM = re.compile(r'^- (.*)', re.MULTILINE)
+OLIST_ITEM = re.compile(r'^([0-9]+)\. (.*)', re.MULTILINE)
+OLIST_MARKER = re.compile(r'([0-9]+)\. ')
+TITLE = re.compile(r'\n*# (.*)')
+
+# ------------------------------------------------------------------------
+# Inline patterns
+# ------------------------------------------------------------------------
+INLINE_DELIMITER = re.compile(r'\*\*|_|`')
+IMAGE = re.compile(r'(?<=!)\[([\s\S]+?)\]\(([\s\S]+?)\)')
+LINK = re.compile(r'(?<!!)\[([\s\S]+?)\]\(([\s\S]+?)\)')
+INLINE_MARKUP = re.compile(r'[*_`\[]')
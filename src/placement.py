@@ -0,0 +1,123 @@
+"""
+Provides the strategies for placing asset files in the output folder.
+
+Strategies:
+    copy: Copies the bytes (kernel-side where the platform allows) and keeps the source mtime.
+    reflink: Clones the file on copy-on-write filesystems (FICLONE), or copies it
+        in the kernel with copy_file_range; falls back to copy.
+    hardlink: Links the output to the source inode; falls back to reflink.
+    symlink: Points the output at the source file; falls back to copy.
+
+Every strategy writes to a temporary name next to the output and renames it
+into place, so an output that is still a link to its source is replaced, never
+written through.
+
+Functions:
+    place_file(src_file, dest_file, strategy): Places one file and returns the strategy that succeeded.
+    matches_strategy(src_file, dest_file, strategy): Checks whether an output was placed with a strategy.
+
+Constants:
+    STRATEGIES: The strategy names, cheapest first.
+"""
+import os, shutil, logging
+from src.fileio import atomic_write
+try:
+    import fcntl
+except ImportError: # not on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('symlink', 'hardlink', 'reflink', 'copy')
+
+_FALLBACK = {'symlink': 'copy', 'hardlink': 'reflink', 'reflink': 'copy'}
+_FICLONE = 0x40049409 # linux/fs.h: _IOW(0x94, 9, int)
+
+# (strategy, source device, destination device) pairs that failed before
+_unsupported = set()
+
+def _copy(src_file, temp_path):
+    shutil.copyfile(src_file, temp_path)
+    src_stat = os.stat(src_file)
+    os.utime(temp_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+
+def _reflink(src_file, temp_path):
+    with open(src_file, 'rb') as src, open(temp_path, 'wb') as dest:
+        try:
+            if fcntl is None:
+                raise OSError('FICLONE is not available')
+            fcntl.ioctl(dest.fileno(), _FICLONE, src.fileno())
+        except OSError:
+            if not hasattr(os, 'copy_file_range'):
+                raise
+            remaining = os.fstat(src.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(src.fileno(), dest.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+    src_stat = os.stat(src_file)
+    os.utime(temp_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+
+def _hardlink(src_file, temp_path):
+    os.link(src_file, temp_path)
+
+def _symlink(src_file, temp_path):
+    os.symlink(os.path.abspath(src_file), temp_path)
+
+def _devices(src_file, dest_file):
+    return os.stat(src_file).st_dev, os.stat(os.path.dirname(dest_file)).st_dev
+
+_PLACERS = {'copy': _copy, 'reflink': _reflink, 'hardlink': _hardlink, 'symlink': _symlink}
+
+def place_file(src_file, dest_file, strategy = 'copy'):
+    """
+    Places `src_file` at `dest_file` with `strategy`, falling back to cheaper-to-support strategies.
+
+    A strategy that fails once for a pair of devices is not tried again for it.
+
+    Args:
+        src_file (str): The source file.
+        dest_file (str): The output path; an existing file is replaced.
+        strategy (str): One of STRATEGIES.
+
+    Returns:
+        str: The strategy that placed the file.
+    """
+
+    if strategy not in _PLACERS:
+        raise ValueError(f'unknown placement strategy: {strategy}')
+    devices = _devices(src_file, dest_file)
+    while True:
+        if strategy == 'copy' or (strategy, *devices) not in _unsupported:
+            placer = _PLACERS[strategy]
+            try:
+                atomic_write(dest_file, lambda temp_path: placer(src_file, temp_path))
+                return strategy
+            except OSError as e:
+                if strategy == 'copy':
+                    raise
+                logger.debug('Cannot %s %s (%s), falling back to %s', strategy, src_file, e, _FALLBACK[strategy])
+                _unsupported.add((strategy, *devices))
+        strategy = _FALLBACK[strategy]
+
+def matches_strategy(src_file, dest_file, strategy):
+    """
+    Checks whether `dest_file` is laid out the way `strategy` places it.
+
+    A symlinked output only matches 'symlink', and an output sharing the source
+    inode only matches 'hardlink', so switching strategies re-places the affected
+    outputs. A plain copy also matches a link strategy that cannot be used for the
+    file's devices.
+    """
+
+    if os.path.islink(dest_file):
+        return strategy == 'symlink'
+    if os.path.samefile(src_file, dest_file):
+        return strategy == 'hardlink'
+    if strategy in ('symlink', 'hardlink'):
+        devices = _devices(src_file, dest_file)
+        if strategy == 'hardlink' and devices[0] != devices[1]:
+            return True # links cannot cross devices
+        return (strategy, *devices) in _unsupported
+    return True
@@ -0,0 +1,188 @@
+"""
+Provides a per-stage build profiler.
+
+The profiler instruments the pipeline by temporarily replacing the stage
+functions in `src.site_operations` and `src.transformation` with timed wrappers.
+Nothing is patched unless a profiler is installed, so the instrumentation costs
+nothing when profiling is off.
+
+Classes:
+    BuildProfiler: Collects stage timings, counters and per-page timings, and reports them.
+
+Constants:
+    STAGES: The instrumented stages as (stage name, module, function name), outermost first.
+"""
+import json, os, time
+from collections import Counter
+from src import site_operations, transformation
+from src.render_cache import block_cache
+
+STAGES = (
+    ('page', site_operations, 'generate_page'),
+    ('read', site_operations, 'read_markdown'),
+    ('parse', site_operations, 'markdown_to_html_node'),
+    ('parse_blocks', transformation, 'parse_blocks'),
+    ('render_block', transformation, 'render_block'),
+    ('inline', transformation, 'tokenize_inline_spans'),
+    ('render + write', site_operations, 'write_page'),
+    ('copy', site_operations, 'copy_file'),
+)
+
+# How the result of a stage feeds the counters
+def _count_block_types(counters, args, result):
+    for block in result:
+        counters[f'blocks: {block.type.name.lower()}'] += 1
+
+def _count_inline_nodes(counters, args, result):
+    counters['text nodes'] += sum(len(nodes) for nodes in result)
+
+def _count_html_nodes(counters, args, result):
+    # every node of the page tree; walked iteratively, as the profiler is opt-in
+    count = 0
+    pending = [result]
+    while pending:
+        node = pending.pop()
+        count += 1
+        if node.children:
+            pending.extend(node.children)
+    counters['html nodes'] += count
+
+def _count_bytes_read(counters, args, result):
+    counters['bytes read'] += len(result.encode('utf-8'))
+
+def _count_bytes_written(counters, args, result):
+    counters['bytes written'] += os.path.getsize(args[0])
+
+_COUNTERS = {
+    'read': _count_bytes_read,
+    'parse': _count_html_nodes,
+    'parse_blocks': _count_block_types,
+    'inline': _count_inline_nodes,
+    'render + write': _count_bytes_written,
+}
+
+class BuildProfiler:
+    """
+    Collects stage timings, counters and per-page timings of a build.
+
+    Timings are inclusive: the 'page' stage contains 'read', 'parse' and
+    'render + write', and 'parse' contains the block and inline stages.
+
+    Attributes:
+        stages (dict[str, list]): Stage name -> [calls, total seconds].
+        counters (Counter): Blocks per type, nodes allocated, bytes read and written, render cache hits and misses.
+        pages (list[tuple[float, str]]): (seconds, source path) per generated page.
+        events (list[dict] or None): Chrome trace events, if tracing is enabled.
+
+    Methods:
+        install(): Patches the stage functions with timed wrappers.
+        uninstall(): Restores the original functions.
+        report(top=10): Returns the per-stage and slowest-pages report as text.
+        write_trace(path): Writes the Chrome trace-event JSON.
+    """
+
+    def __init__(self, trace = False):
+        """
+        Initializes a BuildProfiler; with `trace` set every call is kept as a trace event.
+        """
+
+        self.stages = {name: [0, 0.0] for name, _, _ in STAGES}
+        self.counters = Counter()
+        self.pages = []
+        self.events = [] if trace else None
+        self._originals = []
+        self._origin = time.perf_counter()
+
+    def _wrap(self, stage, function):
+        totals = self.stages[stage]
+        count = _COUNTERS.get(stage)
+        counters, pages, events = self.counters, self.pages, self.events
+        origin, clock = self._origin, time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            result = function(*args, **kwargs)
+            elapsed = clock() - start
+            totals[0] += 1
+            totals[1] += elapsed
+            if count is not None:
+                count(counters, args, result)
+            if stage == 'page':
+                pages.append((elapsed, args[0]))
+            if events is not None:
+                events.append({
+                    'name': stage, 'cat': 'build', 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                    'ts': (start - origin) * 1e6, 'dur': elapsed * 1e6,
+                    'args': {'path': args[0]} if stage in ('page', 'copy') else {},
+                })
+            return result
+
+        timed.__wrapped__ = function
+        return timed
+
+    def install(self):
+        """
+        Patches the stage functions with timed wrappers.
+
+        The render cache is emptied, so the report always describes a cold build.
+
+        Returns:
+            BuildProfiler: The profiler itself.
+        """
+
+        block_cache.clear()
+        for stage, module, name in STAGES:
+            original = getattr(module, name)
+            self._originals.append((module, name, original))
+            setattr(module, name, self._wrap(stage, original))
+        return self
+
+    def uninstall(self):
+        """
+        Restores the original stage functions and records the render cache hits and misses.
+        """
+
+        if self._originals:
+            self.counters['render cache hits'] += block_cache.hits
+            self.counters['render cache misses'] += block_cache.misses
+
+        for module, name, original in reversed(self._originals):
+            setattr(module, name, original)
+        self._originals = []
+
+    def report(self, top = 10):
+        """
+        Returns the per-stage and slowest-pages report.
+
+        Args:
+            top (int): Number of slowest pages to list.
+
+        Returns:
+            str: The report.
+        """
+
+        lines = [f"{'stage':24}{'calls':>10}{'total ms':>12}{'avg us':>12}"]
+        for stage, (calls, total) in self.stages.items():
+            if calls:
+                lines.append(f'{stage:24}{calls:>10}{total * 1000:>12.2f}{total / calls * 1e6:>12.1f}')
+        if self.counters:
+            lines.append('')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'{name:34}{value:>12}')
+        if self.pages:
+            lines.append('')
+            lines.append(f'{min(top, len(self.pages))} slowest pages:')
+            for elapsed, path in sorted(self.pages, reverse=True)[:top]:
+                lines.append(f'{elapsed * 1000:>10.2f} ms  {path}')
+        return '\n'.join(lines)
+
+    def write_trace(self, path):
+        """
+        Writes the recorded events in Chrome trace-event format (chrome://tracing, Perfetto).
+
+        Args:
+            path (str): The JSON file to write.
+        """
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events or [], 'displayTimeUnit': 'ms'}, f)
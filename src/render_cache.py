@@ -0,0 +1,163 @@
+"""
+Provides the content-addressed cache of rendered markdown blocks.
+
+Pages often share identical blocks (footers, notices, repeated code samples).
+`markdown_to_html_node` looks every parsed block up here before rendering it,
+so an unchanged block skips building its node tree and inline parsing
+entirely. The block parser derives a block's type from its text alone, so the
+text is the whole key.
+
+The in-memory store is a bounded LRU keyed by the block text itself. The
+optional on-disk store keeps one JSON file per block, named by the SHA-256 of
+the block text, so results persist across builds and are shared by worker
+processes. The cached nodes are shared between pages and must not be mutated.
+
+Classes:
+    RenderCache: Bounded LRU of rendered blocks with an optional on-disk store.
+
+Functions:
+    block_key(block): Returns the content hash a block is stored under on disk.
+    node_to_data(node): Converts an HTMLNode tree to JSON-serialisable data.
+    node_from_data(data): Rebuilds an HTMLNode tree from `node_to_data` output.
+
+Constants:
+    RENDER_CACHE_VERSION: Bump when the block renderer changes, to invalidate stored blocks.
+    block_cache: The RenderCache used by `markdown_to_html_node`.
+"""
+import hashlib, json, os
+from collections import OrderedDict
+from src.htmlnode import LeafNode, ParentNode
+from src.fileio import atomic_write
+
+RENDER_CACHE_VERSION = 3
+
+def block_key(block):
+    """
+    Returns the hex digest a block is stored under, salted with the renderer version.
+    """
+
+    return hashlib.sha256(f'{RENDER_CACHE_VERSION}\0{block}'.encode('utf-8')).hexdigest()
+
+def node_to_data(node):
+    """
+    Converts a LeafNode or ParentNode tree to JSON-serialisable data.
+    """
+
+    if isinstance(node, ParentNode):
+        return {'tag': node.tag, 'value': node.value, 'props': node.props,
+                'children': [node_to_data(child) for child in node.children]}
+    return {'tag': node.tag, 'value': node.value, 'props': node.props}
+
+def node_from_data(data):
+    """
+    Rebuilds a LeafNode or ParentNode tree from `node_to_data` output.
+    """
+
+    if 'children' in data:
+        return ParentNode(data['tag'], data['value'], [node_from_data(child) for child in data['children']], data['props'])
+    return LeafNode(data['tag'], data['value'], data['props'])
+
+class RenderCache:
+    """
+    Bounded LRU of rendered blocks with an optional on-disk store.
+
+    Attributes:
+        maxsize (int): Blocks kept in memory; 0 disables the in-memory store.
+        directory (str or None): Folder of the on-disk store, or None to keep results in memory only.
+        hits (int): Lookups answered from memory or disk.
+        misses (int): Lookups that had to render the block.
+
+    Methods:
+        configure(maxsize, directory): Changes the limits and empties the in-memory store.
+        get(block): Returns the cached nodes of a block, or None.
+        put(block, nodes): Stores the rendered nodes of a block.
+        clear(): Empties the in-memory store and resets the counters.
+    """
+
+    def __init__(self, maxsize = 4096, directory = None):
+        """
+        Initializes an empty RenderCache.
+        """
+
+        self.maxsize = maxsize
+        self.directory = directory
+        self._blocks = OrderedDict()
+        self.hits = self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0 or self.directory is not None
+
+    def configure(self, maxsize = 4096, directory = None):
+        """
+        Changes the limits and empties the in-memory store.
+
+        Args:
+            maxsize (int): Blocks kept in memory; 0 disables the in-memory store.
+            directory (str or None): Folder of the on-disk store.
+        """
+
+        self.maxsize = maxsize
+        self.directory = directory
+        self.clear()
+
+    def clear(self):
+        """
+        Empties the in-memory store and resets the hit and miss counters.
+        """
+
+        self._blocks.clear()
+        self.hits = self.misses = 0
+
+    def _path(self, block):
+        key = block_key(block)
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def get(self, block):
+        """
+        Returns the cached nodes of `block`, or None on a miss.
+
+        Returns:
+            tuple[HTMLNode] or None: The rendered nodes, shared with other pages.
+        """
+
+        nodes = self._blocks.get(block)
+        if nodes is not None:
+            self._blocks.move_to_end(block)
+            self.hits += 1
+            return nodes
+        if self.directory is not None:
+            try:
+                with open(self._path(block), 'r', encoding='utf-8') as f:
+                    nodes = tuple(node_from_data(data) for data in json.load(f))
+            except (OSError, ValueError):
+                pass
+            else:
+                self.hits += 1
+                self._remember(block, nodes)
+                return nodes
+        self.misses += 1
+        return None
+
+    def put(self, block, nodes):
+        """
+        Stores the rendered nodes of `block` in memory and, if configured, on disk.
+        """
+
+        nodes = tuple(nodes)
+        self._remember(block, nodes)
+        if self.directory is not None:
+            path = self._path(block)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # a concurrent reader never sees a partial file
+            atomic_write(path, json.dumps([node_to_data(node) for node in nodes]))
+        return nodes
+
+    def _remember(self, block, nodes):
+        if self.maxsize <= 0:
+            return
+        self._blocks[block] = nodes
+        if len(self._blocks) > self.maxsize:
+            self._blocks.popitem(last=False)
+
+block_cache = RenderCache()
@@ -0,0 +1,97 @@
+"""
+Provides levelled build logging and the end-of-build summary.
+
+The build modules log per-file detail at debug level through the standard
+`logging` module, so by default it costs no terminal I/O. A build prints a
+single summary line with counts and throughput instead.
+
+Classes:
+    BuildStats: Counts the outputs of a build and formats the summary line.
+
+Functions:
+    configure_logging(verbosity): Sets up the 'src' logger for 'quiet', 'summary' or 'verbose' output.
+
+Constants:
+    stats: The BuildStats instance of the current build.
+"""
+import logging, sys, time
+
+VERBOSITY_LEVELS = {
+    'quiet': logging.WARNING,   # warnings and errors only
+    'summary': logging.INFO,    # one summary line per build
+    'verbose': logging.DEBUG,   # every file
+}
+
+def configure_logging(verbosity = 'summary'):
+    """
+    Sets up the 'src' logger, which all build modules log through.
+
+    Args:
+        verbosity (str): 'quiet', 'summary' or 'verbose'.
+    """
+
+    logger = logging.getLogger('src')
+    logger.setLevel(VERBOSITY_LEVELS[verbosity])
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    logger.propagate = False
+
+class BuildStats:
+    """
+    Counts the outputs of a build.
+
+    Attributes:
+        pages (int): Pages generated.
+        copies (int): Files copied.
+        unchanged (int): Outputs reused from the previous build.
+        removed (int): Stale outputs deleted.
+        failed (int): Pages that failed to generate.
+        cache_hits (int): Markdown blocks taken from the render cache.
+        cache_misses (int): Markdown blocks rendered.
+        changed_outputs (list[str]): Outputs whose content was written or placed this build.
+
+    Methods:
+        reset(): Zeroes the counters and restarts the clock.
+        summary(): Returns the one-line build summary.
+    """
+
+    def __init__(self):
+        """
+        Initializes zeroed counters.
+        """
+
+        self.reset()
+
+    def reset(self):
+        """
+        Zeroes the counters and restarts the clock.
+        """
+
+        self.pages = self.copies = self.unchanged = self.removed = self.failed = 0
+        self.cache_hits = self.cache_misses = 0
+        self.changed_outputs = []
+        self.start = time.perf_counter()
+
+    def summary(self):
+        """
+        Returns the one-line build summary, e.g.
+        'Built 5 pages, copied 9 files, 0 unchanged, 0 removed in 0.05 s (280 files/s); 11 outputs changed'.
+        """
+
+        elapsed = time.perf_counter() - self.start
+        outputs = self.pages + self.copies + self.unchanged
+        line = (
+            f'Built {self.pages} pages, copied {self.copies} files, {self.unchanged} unchanged, '
+            f'{self.removed} removed in {elapsed:.2f} s ({outputs / elapsed if elapsed else 0:.0f} files/s)'
+        )
+        if self.failed:
+            line += f', {self.failed} failed'
+        line += f'; {len(self.changed_outputs)} outputs changed'
+        lookups = self.cache_hits + self.cache_misses
+        if lookups:
+            line += f'; render cache {self.cache_hits}/{lookups} blocks hit ({self.cache_hits / lookups:.0%})'
+        return line
+
+stats = BuildStats()
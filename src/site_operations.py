@@ -1,94 +1,558 @@
-import os, shutil, re
+import os, io, shutil, hashlib, logging, queue, threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from src.transformation import markdown_to_html_node
 from src.htmlnode import HTMLNode
+from src.template import load_template
+from src import patterns
+from src.reporting import stats
+from src.render_cache import block_cache
+from src.fileio import hash_file, atomic_write
+from src.placement import place_file, matches_strategy
+from src.file_index import IndexedFile, scan_files
+from src.assets import asset_links
+from src.images import image_pipeline
+from src.image_hints import image_hints
+from src.minify import minifier
 
-def create_dest_folder(dest_path):
+logger = logging.getLogger(__name__)
+
+def create_dest_folder(dest_path, clean = True):
     # Create /public if it does not already exist
     if not os.path.exists(dest_path):
         os.makedirs(dest_path)
-        print(f'Destination folder created at: {dest_path}')
+        logger.debug('Destination folder created at: %s', dest_path)
+
+    # Synced and incremental builds keep the previous outputs; orphans are removed after the build
+    if not clean:
+        return
 
     # Delete folder contents
     for filename in os.listdir(dest_path):
-        print(filename)
+        logger.debug('Deleting: %s', filename)
         file_path = os.path.join(dest_path, filename)
         if os.path.isfile(file_path) or os.path.islink(file_path):
             os.unlink(file_path)
         elif os.path.isdir(file_path):
             shutil.rmtree(file_path)
 
-def copy_contents(src_path, dest_path):
-    print(f'Source path is: {src_path}')
-    src_file_names = os.listdir(src_path)
-    print(f'File names at source path: {src_file_names}')
-    for file_name in src_file_names:
-        src_file = os.path.abspath(os.path.join(src_path, file_name))
-        if os.path.isdir(src_file):
-            print(f'Copying directory: {src_file}')
-            dest_dir = os.path.abspath(os.path.join(dest_path, file_name))
-            print(f'Destination directory: {dest_dir}')
-            if not os.path.exists(dest_dir):
-                os.makedirs(dest_dir)
-            copy_contents(src_file, dest_dir)
-        elif os.path.isfile(src_file):
-            print(f'Coyping file: {src_file}')
-            dest_file = os.path.abspath(os.path.join(dest_path, file_name))
-            print(f'Destination path: {dest_file}')
-            paste_path = shutil.copy(src_file, dest_file)
-            print(f'New file at: {paste_path}')
+def copy_contents(src_path, dest_path, manifest = None, checksum = False, strategy = 'copy', files = None):
+    # Returns the destination path of every file below src_path; `files` is its index if already scanned
+    logger.debug('Source path is: %s', src_path)
+    files = scan_files(src_path) if files is None else files
+    dest_path = os.path.abspath(dest_path)
+    dest_dirs = set()
+    outputs = []
+    for indexed in files:
+        dest_file = os.path.join(dest_path, indexed.relpath)
+        dest_dir = os.path.dirname(dest_file)
+        if dest_dir not in dest_dirs:
+            os.makedirs(dest_dir, exist_ok=True)
+            dest_dirs.add(dest_dir)
+        copy_file(indexed.path, dest_file, manifest, checksum, strategy, indexed)
+        outputs.append(asset_links.target(dest_file))
+        outputs += image_pipeline.outputs(outputs[-1])
+    return outputs
+
+def asset_tasks(static_files, content_files, dest_path):
+    """
+    Returns (src_file, dest_file) of every asset of the build: the static files and the non-markdown content files.
+
+    Args:
+        static_files (list[IndexedFile]): The index of the static folder.
+        content_files (list[IndexedFile]): The index of the content folder.
+        dest_path (str): The output folder.
+    """
+
+    assets = [(indexed.path, os.path.join(dest_path, indexed.relpath)) for indexed in static_files]
+    assets += [(indexed.path, os.path.join(dest_path, indexed.relpath)) for indexed in content_files if indexed.relpath[-3:] != '.md']
+    return assets
+
+def file_unchanged(src_file, dest_file, checksum = False, indexed = None):
+    """
+    Checks whether `dest_file` is already an up to date copy of `src_file`.
+
+    Like rsync, files match if their size and modification time are equal,
+    or with `checksum` set, if their size and content hash are equal.
+    The source is only stat'ed if its IndexedFile is not passed in.
+    """
+
+    try:
+        dest_stat = os.stat(dest_file)
+    except FileNotFoundError:
+        return False
+    if indexed is None:
+        src_stat = os.stat(src_file)
+        indexed = IndexedFile(src_file, None, src_stat.st_size, src_stat.st_mtime_ns)
+    if indexed.size != dest_stat.st_size:
+        return False
+    if checksum:
+        return hash_file(src_file) == hash_file(dest_file)
+    return indexed.mtime_ns == dest_stat.st_mtime_ns
+
+def copy_file(src_file, dest_file, manifest = None, checksum = False, strategy = 'copy', indexed = None):
+    # `strategy` is how the file is placed: 'copy', 'reflink', 'hardlink' or 'symlink' (see src.placement)
+    # Deduplicated assets are placed once, at the target planned by src.assets
+    if asset_links.targets:
+        target = asset_links.target(dest_file)
+        if target in asset_links.placed:
+            logger.debug('Deduplicated %s into %s', src_file, target)
+            return
+        asset_links.placed.add(target)
+        if target != dest_file:
+            # the target may sit in a content folder that collect_page_tasks has not created yet
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+        dest_file = target
+    # Responsive variants are placed even when the image itself is unchanged; processing is cached by content hash
+    image_pipeline.process(src_file, dest_file, strategy)
+    # Minified stylesheets differ from their source, so they are compared by content once minified;
+    # other files are recorded with their strategy, so switching --assets re-places them
+    minify = minifier.enabled and dest_file[-4:] == '.css'
+    config = {'minify': True} if minify else {'assets': strategy}
+    if manifest is not None:
+        inputs = manifest.dependencies(src_file)
+        if manifest.is_fresh(dest_file, inputs, config):
+            manifest.record(dest_file, inputs, config)
+            stats.unchanged += 1
+            logger.debug('Unchanged, skipped: %s', dest_file)
+            return
+    elif not minify and file_unchanged(src_file, dest_file, checksum, indexed) and matches_strategy(src_file, dest_file, strategy):
+        stats.unchanged += 1
+        logger.debug('Unchanged, skipped: %s', dest_file)
+        return
+    if minify:
+        if not minifier.write_css(src_file, dest_file):
+            stats.unchanged += 1
+            logger.debug('Identical, not rewritten: %s', dest_file)
+        else:
+            stats.copies += 1
+            stats.changed_outputs.append(dest_file)
+            logger.debug('Minified %s into %s', src_file, dest_file)
+    else:
+        # Copies keep the source mtime, so the next sync can skip the file
+        placed = place_file(src_file, dest_file, strategy)
+        stats.copies += 1
+        stats.changed_outputs.append(dest_file)
+        logger.debug('Placed %s at %s (%s)', src_file, dest_file, placed)
+    if manifest is not None:
+        manifest.record(dest_file, inputs, config)
 
 def extract_title(markdown):
-    heading = re.findall(r'^[\n]*# (.*)', markdown)
+    heading = patterns.TITLE.match(markdown)
     if heading:
-        [heading] = heading
-        return heading
+        return heading.group(1)
     else:
         raise ValueError("no title found")
 
-def generate_page(from_path, template_path, dest_path,base_path = '/'):
-    print(f'Base path is: {base_path}')
-    print(f'Generating page from {from_path} to {dest_path} using {template_path}.')
+def read_markdown(from_path):
     with open(from_path, 'r', encoding='utf-8') as f:
-        markdown = f.read()
-    with open(template_path, 'r', encoding='utf-8') as f:
-        template = f.read()
+        return f.read()
+
+class _HashingWriter:
+    # File-like object that encodes the page fragments into a binary file and hashes them on the way;
+    # fragments are gathered into ~64 KiB writes
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.pending = []
+        self.pending_size = 0
+
+    def write(self, text):
+        self.pending.append(text)
+        self.pending_size += len(text)
+        if self.pending_size >= 1 << 16:
+            self.flush()
+
+    def writelines(self, texts):
+        for text in texts:
+            self.write(text)
+
+    def flush(self):
+        data = ''.join(self.pending).encode('utf-8')
+        self.pending.clear()
+        self.pending_size = 0
+        self.digest.update(data)
+        self.size += len(data)
+        self.f.write(data)
+
+def _holds(dest_path, size, digest):
+    # Whether dest_path already has exactly this content
+    try:
+        return os.path.getsize(dest_path) == size and hash_file(dest_path) == digest
+    except FileNotFoundError:
+        return False
+
+def write_page(dest_path, template, title, html_node, base_path = '/', head = ''):
+    # Covers both to_html and the write; returns whether the file changed
+    if asset_links.targets or image_pipeline.images or minifier.enabled:
+        # url rewriting and minification work on the whole page, so it is rendered into memory first
+        page = io.StringIO()
+        template.write(page, title, html_node, base_path, head)
+        return write_output(dest_path, page.getvalue())
+
+    # Otherwise the page is streamed into the temporary file and only kept if its hash differs
+    def stream(temp_path):
+        with open(temp_path, 'wb') as f:
+            writer = _HashingWriter(f)
+            template.write(writer, title, html_node, base_path, head)
+            writer.flush()
+        if _holds(dest_path, writer.size, writer.digest.hexdigest()):
+            logger.debug('Identical, not rewritten: %s', dest_path)
+            return False
+
+    return atomic_write(dest_path, stream)
 
+def render_page(markdown, template, base_path = '/'):
+    # Returns the whole page as a string, so a writer only has to store it
     title = extract_title(markdown)
-    html = markdown_to_html_node(markdown).to_html()
-
-    template = template.replace('{{ Title }}', title)
-    template = template.replace('{{ Content }}', html)
-    template = template.replace('href="/', f'href="{base_path}')
-    template = template.replace('src="/', f'href="{base_path}')
-    
-    with open(dest_path, 'w', encoding='utf-8') as f:
-        f.write(template)
-    print(f"Html generated at {dest_path}")
-
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, base_path = '/'):
-    print(f'Source path is: {dir_path_content}')
-    src_file_names = os.listdir(dir_path_content)
-    print(f'File names at source path: {src_file_names}')
-    for file_name in src_file_names:
-        src_file = os.path.abspath(os.path.join(dir_path_content, file_name))
-        if os.path.isdir(src_file):
-            print(f'Copying directory: {src_file}')
-            dest_dir = os.path.abspath(os.path.join(dest_dir_path, file_name))
-            print(f'Destination directory: {dest_dir}')
-            if not os.path.exists(dest_dir):
-                os.makedirs(dest_dir)
-            generate_pages_recursive(src_file, template_path, dest_dir, base_path)
-        if os.path.isfile(src_file):
-            print(f'Copying file: {src_file}')
-            if file_name[-3:] == '.md':
-                file_name = file_name[:-3] + '.html'
-                dest_file = os.path.abspath(os.path.join(dest_dir_path, file_name))
-                print(f'Destination path: {dest_file}')
-                generate_page(src_file, template_path, dest_file, base_path)
+    html_node = markdown_to_html_node(markdown)
+    head = ''
+    if image_hints.enabled:
+        html_node, head = image_hints.apply(html_node)
+    return template.render(title, html_node.to_html(), base_path, head)
+
+def write_output(dest_path, html):
+    """
+    Writes `html` to `dest_path` unless the file already holds exactly that content.
+
+    Identical outputs keep their mtime, so rsync and CDN caches stay valid. A
+    changed output is written to a temporary file that replaces it in one step,
+    so readers never see a half-written page.
+
+    Returns:
+        bool: True if the file was written, False if it was already up to date.
+    """
+
+    html = image_pipeline.rewrite(asset_links.rewrite(html, dest_path), dest_path)
+    if minifier.enabled:
+        html = minifier.minify(html, 'html')
+    data = html.encode('utf-8')
+    if _holds(dest_path, len(data), hashlib.sha256(data).hexdigest()):
+        logger.debug('Identical, not rewritten: %s', dest_path)
+        return False
+    return atomic_write(dest_path, data)
+
+def generate_page(from_path, template_path, dest_path,base_path = '/', template = None):
+    logger.debug('Generating page from %s to %s using %s, base path %s', from_path, dest_path, template_path, base_path)
+    markdown = read_markdown(from_path)
+    if template is None:
+        template = load_template(template_path)
+
+    title = extract_title(markdown)
+    html_node = markdown_to_html_node(markdown)
+    head = ''
+    if image_hints.enabled:
+        html_node, head = image_hints.apply(html_node)
+
+    return write_page(dest_path, template, title, html_node, base_path, head)
+
+
+def _worker_state():
+    return (
+        (block_cache.maxsize, block_cache.directory),
+        (asset_links.dest_root, asset_links.base_path, asset_links.targets),
+        (image_pipeline.widths, image_pipeline.directory, image_pipeline.dest_root, image_pipeline.base_path,
+         image_pipeline.sizes, image_pipeline.quality, image_pipeline.images),
+        (image_hints.enabled, image_hints.eager),
+        (minifier.enabled, minifier.directory),
+    )
+
+def _init_worker(cache_settings, link_settings, image_settings, hint_settings, minify_settings):
+    # workers start with the parent's cache settings, an empty in-memory cache, the parent's asset plan and processed images
+    block_cache.configure(*cache_settings)
+    asset_links.configure(*link_settings)
+    image_pipeline.configure(*image_settings)
+    image_hints.configure(*hint_settings)
+    minifier.configure(*minify_settings)
+
+def _generate_page_task(task):
+    # Runs in a worker process: exceptions are returned as text so every page reports its own error,
+    # and whether the page changed and the render cache lookups are returned so the parent can report them
+    from_path, template_path, dest_path, base_path, template = task
+    hits, misses = block_cache.hits, block_cache.misses
+    error = None
+    changed = False
+    try:
+        changed = generate_page(from_path, template_path, dest_path, base_path, template)
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+    return from_path, error, changed, block_cache.hits - hits, block_cache.misses - misses
+
+def render_pages(pages, template_path, base_path = '/', jobs = 1, template = None):
+    """
+    Generates the html for every (from_path, dest_path) pair in `pages`.
+
+    With `jobs` > 1 the pages are rendered by a process pool in chunked batches.
+    A failing page does not stop the others and every failure is reported.
+    The serial build raises on the first failure, as before.
+    The compiled `template` is loaded once here unless the caller passes it in.
+
+    Returns:
+        list[tuple[str, str]]: (from_path, error) for every page that failed.
+    """
+
+    if template is None:
+        template = load_template(template_path)
+
+    if jobs <= 1 or len(pages) <= 1:
+        hits, misses = block_cache.hits, block_cache.misses
+        try:
+            for from_path, dest_path in pages:
+                if generate_page(from_path, template_path, dest_path, base_path, template):
+                    stats.changed_outputs.append(dest_path)
+                stats.pages += 1
+        finally:
+            stats.cache_hits += block_cache.hits - hits
+            stats.cache_misses += block_cache.misses - misses
+        return []
+
+    tasks = [(from_path, template_path, dest_path, base_path, template) for from_path, dest_path in pages]
+    chunksize = max(1, len(tasks) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=_worker_state()) as pool:
+        results = list(pool.map(_generate_page_task, tasks, chunksize=chunksize))
+
+    for (_, dest_path), (_, _, changed, hits, misses) in zip(pages, results):
+        if changed:
+            stats.changed_outputs.append(dest_path)
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+    failures = [(from_path, error) for from_path, error, _, _, _ in results if error]
+    for from_path, error in failures:
+        logger.error('Failed to generate %s: %s', from_path, error)
+    stats.pages += len(tasks) - len(failures)
+    stats.failed += len(failures)
+    return failures
+
+def _render_page_task(task):
+    # Runs in a worker process of the pipelined build: only the CPU-bound part, no file I/O
+    from_path, markdown, template, base_path = task
+    hits, misses = block_cache.hits, block_cache.misses
+    html = error = None
+    try:
+        html = render_page(markdown, template, base_path)
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+    return html, error, block_cache.hits - hits, block_cache.misses - misses
+
+_DONE = object() # closes a pipeline queue
+
+def render_pages_pipelined(pages, template_path, base_path = '/', jobs = 1, template = None, readers = 2, writers = 2, depth = 16):
+    """
+    Generates the html for every (from_path, dest_path) pair in `pages` in three overlapping stages.
+
+    Reader threads load the markdown, the render stage turns it into pages in this
+    process (or in a process pool with `jobs` > 1) and writer threads store them,
+    so disk latency hides behind rendering. The stages are connected by queues
+    holding at most `depth` pages, and at most `depth` renders are in flight in
+    the pool: a slow stage makes the others wait instead of buffering the site
+    in memory. Like the pool build, a failing page does not stop the others.
+
+    Returns:
+        list[tuple[str, str]]: (from_path, error) for every page that failed.
+    """
+
+    if template is None:
+        template = load_template(template_path)
+
+    tasks = queue.SimpleQueue()
+    for page in pages:
+        tasks.put(page)
+    for _ in range(readers):
+        tasks.put(_DONE)
+    read_queue = queue.Queue(depth)
+    write_queue = queue.Queue(depth)
+    failures = []
+
+    def read():
+        while (task := tasks.get()) is not _DONE:
+            from_path, dest_path = task
+            try:
+                read_queue.put((from_path, dest_path, read_markdown(from_path)))
+            except Exception as e:
+                failures.append((from_path, f'{type(e).__name__}: {e}'))
+        read_queue.put(_DONE)
+
+    def write():
+        while (item := write_queue.get()) is not _DONE:
+            from_path, dest_path, html = item
+            try:
+                if write_output(dest_path, html):
+                    stats.changed_outputs.append(dest_path)
+            except Exception as e:
+                failures.append((from_path, f'{type(e).__name__}: {e}'))
+
+    # readers are daemons: they can only be left blocked if the render stage is interrupted
+    for _ in range(readers):
+        threading.Thread(target=read, daemon=True).start()
+    writer_threads = [threading.Thread(target=write) for _ in range(writers)]
+    for thread in writer_threads:
+        thread.start()
+
+    pool = None
+    if jobs > 1:
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=_worker_state())
+    in_flight = deque()
+
+    def hand_over(limit):
+        # passes finished pool renders on to the writers until at most `limit` are in flight
+        while len(in_flight) > limit:
+            from_path, dest_path, future = in_flight.popleft()
+            html, error, hits, misses = future.result()
+            stats.cache_hits += hits
+            stats.cache_misses += misses
+            if error:
+                failures.append((from_path, error))
+            else:
+                write_queue.put((from_path, dest_path, html))
+
+    hits, misses = block_cache.hits, block_cache.misses
+    try:
+        finished_readers = 0
+        while finished_readers < readers:
+            item = read_queue.get()
+            if item is _DONE:
+                finished_readers += 1
+                continue
+            from_path, dest_path, markdown = item
+            if pool is not None:
+                in_flight.append((from_path, dest_path, pool.submit(_render_page_task, (from_path, markdown, template, base_path))))
+                hand_over(depth)
+                continue
+            try:
+                html = render_page(markdown, template, base_path)
+            except Exception as e:
+                failures.append((from_path, f'{type(e).__name__}: {e}'))
+                continue
+            write_queue.put((from_path, dest_path, html))
+        hand_over(0)
+    finally:
+        for _ in writer_threads:
+            write_queue.put(_DONE)
+        for thread in writer_threads:
+            thread.join()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        stats.cache_hits += block_cache.hits - hits
+        stats.cache_misses += block_cache.misses - misses
+
+    for from_path, error in failures:
+        logger.error('Failed to generate %s: %s', from_path, error)
+    stats.pages += len(pages) - len(failures)
+    stats.failed += len(failures)
+    return failures
+
+def collect_page_tasks(dir_path_content, dest_dir_path, files = None):
+    """
+    Splits the content index into pages and assets, creating the destination folders on the way.
+
+    Args:
+        dir_path_content (str): The content folder.
+        dest_dir_path (str): The output folder.
+        files (list[IndexedFile] or None): The index of the content folder; scanned here if not given.
+
+    Returns:
+        tuple[list, list]: (from_path, dest_path) pairs of markdown pages to render, and
+            (indexed, dest_path) pairs of other files to copy, with their IndexedFile; both sorted by path.
+    """
+
+    logger.debug('Source path is: %s', dir_path_content)
+    files = scan_files(dir_path_content) if files is None else files
+    dest_dir_path = os.path.abspath(dest_dir_path)
+    dest_dirs = set()
+    pages = []
+    copies = []
+    for indexed in files:
+        dest_file = os.path.join(dest_dir_path, indexed.relpath)
+        dest_dir = os.path.dirname(dest_file)
+        if dest_dir not in dest_dirs:
+            os.makedirs(dest_dir, exist_ok=True)
+            dest_dirs.add(dest_dir)
+        if dest_file[-3:] == '.md':
+            pages.append((indexed.path, dest_file[:-3] + '.html'))
+        else:
+            copies.append((indexed, dest_file))
+    return pages, copies
+
+def page_config(base_path = '/'):
+    """
+    Returns the settings a generated page depends on, as recorded in the incremental build manifest.
+    """
+
+    config = {'base_path': base_path}
+    if asset_links.targets:
+        config['assets'] = asset_links.signature()
+    if image_pipeline.images:
+        config['images'] = image_pipeline.signature()
+    if image_hints.enabled:
+        config['image_hints'] = image_hints.eager
+    if minifier.enabled:
+        config['minify'] = True
+    return config
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, base_path = '/', manifest = None, jobs = 1, checksum = False, strategy = 'copy', files = None, pipeline = False):
+    # Returns the destination path of every page and file below dir_path_content; `files` is its index if already scanned
+    pages, copies = collect_page_tasks(dir_path_content, dest_dir_path, files)
+    outputs = [dest_file for _, dest_file in pages]
+    template = load_template(template_path)
+
+    for indexed, dest_file in copies:
+        copy_file(indexed.path, dest_file, manifest, checksum, strategy, indexed)
+        outputs.append(asset_links.target(dest_file))
+        outputs += image_pipeline.outputs(outputs[-1])
+
+    if manifest is not None:
+        config = page_config(base_path)
+        stale = []
+        for src_file, dest_file in pages:
+            inputs = manifest.dependencies(src_file, template_path)
+            if manifest.is_fresh(dest_file, inputs, config):
+                logger.debug('Unchanged, skipped: %s', dest_file)
+                stats.unchanged += 1
+                manifest.record(dest_file, inputs, config)
             else:
-                print(f'Coyping file: {src_file}')
-                dest_file = os.path.abspath(os.path.join(dest_dir_path, file_name))
-                print(f'Destination path: {dest_file}')
-                paste_path = shutil.copy(src_file, dest_file)
-                print(f'New file at: {paste_path}')
+                stale.append((src_file, dest_file))
+        pages = stale
+
+    if pipeline:
+        failures = render_pages_pipelined(pages, template_path, base_path, jobs, template)
+    else:
+        failures = render_pages(pages, template_path, base_path, jobs, template)
+
+    # Failed pages are not recorded, so they are retried on the next build
+    if manifest is not None:
+        failed = {from_path for from_path, _ in failures}
+        for src_file, dest_file in pages:
+            if src_file not in failed:
+                manifest.record(dest_file, manifest.dependencies(src_file, template_path), config)
+    if failures:
+        raise Exception(f'Error: {len(failures)} of {len(pages)} page(s) failed to generate')
+    return outputs
+
+def remove_orphans(dest_path, outputs):
+    """
+    Deletes every file below `dest_path` that is not one of this build's outputs.
+
+    Directories left empty by the removal are deleted as well.
+
+    Args:
+        dest_path (str): The output folder.
+        outputs (iterable[str]): Absolute paths of the outputs to keep.
+
+    Returns:
+        list[str]: Absolute paths of the removed files.
+    """
+
+    keep = set(outputs)
+    removed = []
+    for dir_path, dir_names, file_names in os.walk(os.path.abspath(dest_path), topdown=False):
+        for file_name in file_names:
+            file_path = os.path.join(dir_path, file_name)
+            if file_path not in keep:
+                os.unlink(file_path)
+                removed.append(file_path)
+                logger.debug('Removed orphan: %s', file_path)
+        if dir_path != os.path.abspath(dest_path) and not os.listdir(dir_path):
+            os.rmdir(dir_path)
+    stats.removed += len(removed)
+    return removed
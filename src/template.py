@@ -0,0 +1,174 @@
+"""
+Provides a compiled representation of the html page template.
+
+The template is read once and split into literal segments and placeholder slots,
+so rendering a page is a single join instead of repeated `str.replace` passes
+over the finished page.
+
+Classes:
+    Template: A template split into literal segments and named slots.
+
+Functions:
+    load_template(template_path): Returns the compiled template, cached by path and mtime.
+    rebase_urls(html, base_path): Prefixes root-relative href/src urls with the base path.
+"""
+import os, re
+
+# Placeholder text in the template -> slot name
+PLACEHOLDERS = {
+    '{{ Title }}': 'title',
+    '{{ Content }}': 'content',
+    '{{ Head }}': 'head',
+}
+_PLACEHOLDER_PATTERN = re.compile('|'.join(re.escape(placeholder) for placeholder in PLACEHOLDERS))
+_ROOT_URL_PATTERN = re.compile(r'(href|src)="/')
+
+_template_cache = {}
+
+def rebase_urls(html, base_path):
+    """
+    Prefixes root-relative `href="/` and `src="/` urls with the base path.
+
+    Args:
+        html (str): The html to rewrite.
+        base_path (str): The base url the site is served from, e.g. '/blog/'.
+
+    Returns:
+        str: The rewritten html; `html` itself if the base path is the root.
+    """
+
+    if base_path == '/':
+        return html
+    return _ROOT_URL_PATTERN.sub(lambda match: f'{match.group(1)}="{base_path}', html)
+
+class Template:
+    """
+    Represents an html template split into literal segments and placeholder slots.
+
+    Attributes:
+        segments (list[str]): Literal text; slot `i` sits between segments `i` and `i + 1`.
+        slots (list[str]): Names of the slots ('title', 'content' or 'head').
+
+    Head markup (e.g. preload hints) fills the '{{ Head }}' slots; a template
+    without one gets it right before its '</head>'.
+
+    Methods:
+        render(title, content, base_path='/', head=''): Returns the page with the slots filled in.
+        write(fp, title, content_node, base_path='/', head=''): Streams the page into a file-like object.
+    """
+
+    def __init__(self, text):
+        """
+        Compiles the template text.
+        """
+
+        self.segments = []
+        self.slots = []
+        position = 0
+        for match in _PLACEHOLDER_PATTERN.finditer(text):
+            self.segments.append(text[position:match.start()])
+            self.slots.append(PLACEHOLDERS[match.group(0)])
+            position = match.end()
+        self.segments.append(text[position:])
+        self._rebased = {'/': self.segments}
+
+    def _segments_for(self, base_path):
+        # The literal segments are rebased once per base path instead of once per page
+        if base_path not in self._rebased:
+            self._rebased[base_path] = [rebase_urls(segment, base_path) for segment in self.segments]
+        return self._rebased[base_path]
+
+    def _layout(self, base_path, head):
+        # The (segments, slots) to render; without a '{{ Head }}' slot, head markup goes right before '</head>'
+        segments = self._segments_for(base_path)
+        if not head or 'head' in self.slots:
+            return segments, self.slots
+        for index, segment in enumerate(segments):
+            position = segment.find('</head>')
+            if position != -1:
+                return (segments[:index] + [segment[:position], segment[position:]] + segments[index + 1:],
+                        self.slots[:index] + ['head'] + self.slots[index:])
+        return segments, self.slots
+
+    def render(self, title, content, base_path = '/', head = ''):
+        """
+        Renders a page.
+
+        Args:
+            title (str): Text for the '{{ Title }}' slots.
+            content (str): Html for the '{{ Content }}' slots.
+            base_path (str): Base url that root-relative urls are prefixed with.
+            head (str): Html for the '{{ Head }}' slots.
+
+        Returns:
+            str: The rendered page.
+        """
+
+        values = {'title': title, 'content': rebase_urls(content, base_path), 'head': rebase_urls(head, base_path)}
+        segments, slots = self._layout(base_path, head)
+        parts = [segments[0]]
+        for slot, segment in zip(slots, segments[1:]):
+            parts.append(values[slot])
+            parts.append(segment)
+        return ''.join(parts)
+
+    def write(self, fp, title, content_node, base_path = '/', head = ''):
+        """
+        Writes a page into a file-like object.
+
+        With the root base path the content node's HTML fragments are streamed
+        straight into `fp` without building the page string; otherwise the content
+        is rendered once so its urls can be rebased.
+
+        Args:
+            fp: An object with a `write(str)` method.
+            title (str): Text for the '{{ Title }}' slots.
+            content_node (HTMLNode): Node rendered into the '{{ Content }}' slots.
+            base_path (str): Base url that root-relative urls are prefixed with.
+            head (str): Html for the '{{ Head }}' slots.
+        """
+
+        content = None if base_path == '/' else rebase_urls(content_node.to_html(), base_path)
+        segments, slots = self._layout(base_path, head)
+        fp.write(segments[0])
+        for slot, segment in zip(slots, segments[1:]):
+            if slot == 'title':
+                fp.write(title)
+            elif slot == 'head':
+                fp.write(rebase_urls(head, base_path))
+            elif content is None:
+                content_node.write_html(fp)
+            else:
+                fp.write(content)
+            fp.write(segment)
+
+    def __getstate__(self):
+        return {'segments': self.segments, 'slots': self.slots}
+
+    def __setstate__(self, state):
+        self.segments = state['segments']
+        self.slots = state['slots']
+        self._rebased = {'/': self.segments}
+
+def load_template(template_path):
+    """
+    Returns the compiled template at `template_path`.
+
+    The compiled template is cached and only re-read when the file's mtime changes.
+
+    Args:
+        template_path (str): Path of the html template.
+
+    Returns:
+        Template: The compiled template.
+    """
+
+    template_path = os.path.abspath(template_path)
+    mtime = os.stat(template_path).st_mtime_ns
+    cached = _template_cache.get(template_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(template_path, 'r', encoding='utf-8') as f:
+        template = Template(f.read())
+    _template_cache[template_path] = (mtime, template)
+    return template
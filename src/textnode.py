@@ -58,6 +58,9 @@ class TextNode:
         text_type (TextType): The formatting type of the text (e.g., plain, bold, italic, code, link, image).
         url (str or None): The URL associated with the text (used for links and images).
 
+    Instances use `__slots__` instead of a per-instance `__dict__`: a page creates
+    one TextNode per inline fragment, so the per-node overhead adds up.
+
     Methods:
         __init__(text, text_type=TextType.TEXT, url=None):
             Initializes a TextNode with the given text, type, and optional URL.
@@ -67,6 +70,8 @@ class TextNode:
             Returns a string representation of the TextNode instance.
     """
 
+    __slots__ = ('text', 'text_type', 'url')
+
     def __init__(self, text, text_type = TextType.TEXT, url = None):
         """
         Initializes a TextNode instance.
@@ -20,19 +20,49 @@ Functions:
     split_text_links_into_text_nodes(old_nodes):
         Splits text nodes into separate nodes for links and surrounding text.
 
+    tokenize_inline(text):
+        Tokenizes a markdown string into TextNode objects in a single scan.
+
+    tokenize_inline_spans(text, spans):
+        Tokenizes several spans of a markdown string, each on its own, in a single scan.
+
     text_to_text_nodes(text):
         Converts a markdown string into a list of TextNode objects, handling formatting, images, and links.
 
+    parse_blocks(markdown_text):
+        Parses markdown text into typed blocks in a single pass over its lines.
+
     markdown_to_blocks(markdown_text):
-        Splits markdown text into blocks separated by double newlines.
+        Splits markdown text into the text of its blocks.
+
+    block_to_html_node(block, block_type):
+        Builds the html subtree of one markdown block, parsing inline markdown only in its text.
+
+    render_block(block, block_type):
+        Renders one markdown block into its html nodes.
+
+    markdown_to_html_node(markdown):
+        Converts a markdown document into a div of html nodes, reusing cached blocks.
 
 Usage:
     Use these functions to parse markdown content, extract formatting, and convert it into a structure suitable for HTML rendering.
 """
 
 from src.textnode import TextType, TextNode, get_text_type_from_delimiter
-from src.htmlnode import ParentNode, LeafNode, block_to_block_type, BlockType, HTMLTag
-import re
+from src.htmlnode import ParentNode, LeafNode, BlockType, HTMLTag
+from src import patterns
+from src.render_cache import block_cache
+from bisect import bisect_left
+from collections import namedtuple
+
+# Inline delimiters in the order they take precedence: text inside bold is never split for italic, etc.
+INLINE_DELIMITERS = ('**', '_', '`')
+_INLINE_TEXT_TYPES = tuple(get_text_type_from_delimiter(delimiter) for delimiter in INLINE_DELIMITERS)
+
+# One block of a markdown document: its BlockType and its markdown text
+Block = namedtuple('Block', ['type', 'text'])
+_BLOCK_TYPES = (BlockType.PARAGRAPH, BlockType.HEADING, BlockType.CODE, BlockType.QUOTE, BlockType.ULIST, BlockType.OLIST)
+_OLIST_MARKER = patterns.OLIST_MARKER.match
 
 def text_node_to_html_leaf_node(text_node):
     """
@@ -109,8 +139,7 @@ def extract_markdown_links(text):
         list[tuple[str, str]]: List of (link_text, url) tuples.
     """
     # pattern =  r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    pattern = r'(?<!!)\[([\s\S]+?)\]\(([\s\S]+?)\)'
-    return re.findall(pattern, text)
+    return patterns.LINK.findall(text)
 
 def extract_markdown_images(text):
     """
@@ -124,8 +153,7 @@ def extract_markdown_images(text):
     """
 
     # pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    pattern = r'(?<=!)\[([\s\S]+?)\]\(([\s\S]+?)\)'
-    return re.findall(pattern, text)
+    return patterns.IMAGE.findall(text)
 
 def split_text_image_into_text_nodes(old_nodes):
     """
@@ -213,6 +241,106 @@ def split_text_links_into_text_nodes(old_nodes):
     else:
         raise Exception('Error: No nodes passed')
     
+def _emit_links(text, nodes):
+    position = 0
+    for match in patterns.LINK.finditer(text):
+        if match.start() > position:
+            nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
+        nodes.append(TextNode(match.group(1), TextType.LINK, match.group(2)))
+        position = match.end()
+    if position < len(text):
+        nodes.append(TextNode(text[position:], TextType.TEXT))
+
+def _emit_images_and_links(text, nodes):
+    if '](' not in text: # fast path: no image or link can start here
+        nodes.append(TextNode(text, TextType.TEXT))
+        return
+    position = 0
+    for match in patterns.IMAGE.finditer(text):
+        if match.start() - 1 > position: # the image starts at the '!' before the match
+            _emit_links(text[position:match.start() - 1], nodes)
+        nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        position = match.end()
+    if position < len(text):
+        _emit_links(text[position:], nodes)
+
+def _emit_run(text, start, end, level, delimiters, nodes):
+    # Splits text[start:end] on the delimiter of this level, exactly like split_text_into_nodes_delimiter.
+    # Delimited spans become formatted nodes, the text in between descends to the next level.
+    if start >= end:
+        return
+    while True: # levels without a delimiter pair in the run are skipped
+        if level == len(INLINE_DELIMITERS):
+            _emit_images_and_links(text[start:end], nodes)
+            return
+        delimiter = INLINE_DELIMITERS[level]
+        positions = delimiters[delimiter]
+        first = bisect_left(positions, start)
+        last = bisect_left(positions, end, first)
+        if (last - first) % 2: # unclosed delimiter: the whole run is literal text for this delimiter
+            last = first
+        if last > first:
+            break
+        level += 1
+    text_type = _INLINE_TEXT_TYPES[level]
+    position = start
+    for index in range(first, last):
+        piece_end = positions[index]
+        if piece_end > position:
+            if (index - first) % 2 == 0:
+                _emit_run(text, position, piece_end, level + 1, delimiters, nodes)
+            else:
+                nodes.append(TextNode(text[position:piece_end], text_type))
+        position = piece_end + len(delimiter)
+    if end > position:
+        _emit_run(text, position, end, level + 1, delimiters, nodes)
+
+def tokenize_inline(text):
+    """
+    Tokenizes a markdown string into TextNode objects in a single scan.
+
+    The delimiters are located with one pass of a compiled alternation regex and
+    resolved by precedence ('**', then '_', then '`'); images and links are then
+    matched in the remaining plain text. The result is the same as chaining
+    `split_text_into_nodes_delimiter`, `split_text_image_into_text_nodes` and
+    `split_text_links_into_text_nodes`, including leaving unbalanced delimiters as
+    literal text, without building intermediate node lists.
+
+    Args:
+        text (str): The markdown text to tokenize.
+
+    Returns:
+        list[TextNode]: List of TextNode objects representing the parsed text.
+    """
+
+    return tokenize_inline_spans(text, ((0, len(text)),))[0]
+
+def tokenize_inline_spans(text, spans):
+    """
+    Tokenizes the `spans` of a markdown string, each as if it were a string of its own.
+
+    The delimiters of the whole string are located once; a span only pairs the
+    delimiters inside it, so e.g. '**' opened in one list item is never closed by
+    the next. Spans must not contain part of a delimiter at their edges.
+
+    Args:
+        text (str): The markdown text holding the spans.
+        spans (iterable[tuple[int, int]]): (start, end) offsets of the spans in `text`.
+
+    Returns:
+        list[list[TextNode]]: The TextNode objects of each span, as `tokenize_inline` returns them.
+    """
+
+    delimiters = {delimiter: [] for delimiter in INLINE_DELIMITERS}
+    for match in patterns.INLINE_DELIMITER.finditer(text):
+        delimiters[match.group(0)].append(match.start())
+    tokenized = []
+    for start, end in spans:
+        nodes = []
+        _emit_run(text, start, end, 0, delimiters, nodes)
+        tokenized.append(nodes)
+    return tokenized
+
 def text_to_text_nodes(text):
     """
     Converts a markdown string into a list of TextNode objects, handling formatting, images, and links.
@@ -228,18 +356,119 @@ def text_to_text_nodes(text):
     """
         
     if text:
-        text_nodes =  [TextNode(text, TextType.TEXT)]
-        for delimiter in ['**', '_', '`']:
-            text_nodes = split_text_into_nodes_delimiter(text_nodes, delimiter)
-        text_nodes = split_text_image_into_text_nodes(text_nodes)
-        text_nodes = split_text_links_into_text_nodes(text_nodes)
+        text_nodes = tokenize_inline(text)
+        if not text_nodes: # e.g. '****': only empty delimited spans
+            raise Exception('Error: No nodes passed')
         return text_nodes
     else:
         raise Exception('Error: No text passed')
     
+def parse_blocks(markdown_text):
+    """
+    Parses markdown text into typed blocks in a single pass over its lines.
+
+    The parser is a state machine over the open block, so each line is looked at
+    once and no block has to be classified afterwards:
+        - Blank lines end the open block, except inside fenced code.
+        - A line starting with ``` opens fenced code, which runs through the next
+          line ending with ``` (blank lines included).
+        - A heading line ('#' to '######' and a space) is a block of its own.
+        - Consecutive quote ('> ', '>>' or '>'), unordered ('- ') and ordered ('N. ')
+          lines form a quote or list; lines indented below a list item belong to it.
+        - Any other line continues an open paragraph or starts one.
+    Headings, fences, quotes and unordered items end the open block without a
+    blank line; an ordered item only ends a paragraph if it is numbered 1. An
+    ordered list whose numbers do not count up from 1 or down to 1 is a
+    paragraph, and so is an unclosed fence.
+
+    Args:
+        markdown_text (str): The markdown document.
+
+    Returns:
+        list[Block]: The blocks, in document order.
+
+    Raises:
+        Exception: If the input is empty or only whitespace.
+    """
+
+    text = markdown_text.strip()
+    if not text:
+        raise Exception('Error: Empty block!')
+    PARAGRAPH, HEADING, CODE, QUOTE, ULIST, OLIST = _BLOCK_TYPES
+    blocks = []
+    open_type = None # type of the block being collected, None between blocks
+    lines = []
+    ascending = descending = False # numbering of an open ordered list
+    previous = 0
+
+    def close():
+        if open_type is CODE or (open_type is OLIST and not (ascending or (descending and previous == 1))):
+            blocks.append(Block(PARAGRAPH, '\n'.join(lines))) # unclosed fence or misnumbered list
+        else:
+            blocks.append(Block(open_type, '\n'.join(lines)))
+
+    for line in text.split('\n'):
+        if open_type is ULIST and line[:2] == '- ': # the common case inside a list, checked first
+            lines.append(line)
+            continue
+        if open_type is CODE:
+            lines.append(line)
+            if line.endswith('```'):
+                blocks.append(Block(CODE, '\n'.join(lines)))
+                open_type = None
+            continue
+        if not line or line.isspace():
+            if open_type is not None:
+                close()
+                open_type = None
+            continue
+        first = line[0]
+        if first == '`' and line.startswith('```'):
+            if open_type is not None:
+                close()
+            if len(line) >= 6 and line.endswith('```'):
+                blocks.append(Block(CODE, line))
+                open_type = None
+            else:
+                open_type, lines = CODE, [line]
+            continue
+        if first == '#' and patterns.HEADING.match(line):
+            if open_type is not None:
+                close()
+            blocks.append(Block(HEADING, line))
+            open_type = None
+            continue
+        if first == '>' and (line == '>' or line[1] in ' >'):
+            line_type = QUOTE
+        elif first == '-' and line[1:2] == ' ':
+            line_type = ULIST
+        elif first.isdigit() and (marker := _OLIST_MARKER(line)) and (open_type is not PARAGRAPH or marker.group(1) == '1'):
+            number = int(marker.group(1), 10)
+            if open_type is OLIST:
+                ascending = ascending and number == previous + 1
+                descending = descending and number == previous - 1
+                previous = number
+                lines.append(line)
+                continue
+            line_type = OLIST
+            ascending, descending, previous = number == 1, True, number
+        elif first == ' ' and (open_type is ULIST or open_type is OLIST):
+            lines.append(line) # indented below a list item
+            continue
+        else:
+            line_type = PARAGRAPH
+        if line_type is not open_type:
+            if open_type is not None:
+                close()
+            open_type, lines = line_type, []
+        lines.append(line)
+    if open_type is not None:
+        close()
+    return blocks
+
 def markdown_to_blocks(markdown_text):
     """
-    Splits markdown text into blocks separated by double newlines.
+    Splits markdown text into the text of its blocks, as parsed by `parse_blocks`.
 
     Args:
         markdown_text (str): The markdown text to split.
@@ -250,76 +479,167 @@ def markdown_to_blocks(markdown_text):
     Raises:
         Exception: If the input is empty or only whitespace.
     """
-        
-    text = markdown_text.strip()
-    if text.isspace() or text == "":
-        raise Exception('Error: Empty block!')
-    else:
-        return text.split('\n\n')
 
-def process_heading(block):
-    md_heading_level = re.findall(r'^([#]+) ', block)
-    [block] = re.findall(r'^[#]+ (.*)', block)
-    level = len(*md_heading_level)
-    return f'<h{level}>{block}</h{level}>'
+    return [block.text for block in parse_blocks(markdown_text)]
+
+# Parses the content nested in a list item; not the instrumented parse_blocks, so profiles count top-level blocks only
+_parse_nested_blocks = parse_blocks
+
+# Spacer rendered around every block and between list items and quote lines; one shared instance serves every page
+_BLOCK_SPACER = LeafNode(None, '\n')
+
+_has_inline_markup = patterns.INLINE_MARKUP.search
+
+def _inline_nodes(text):
+    # The html leaves of a run of inline markdown; none if it renders to nothing (e.g. '' or '****')
+    if not _has_inline_markup(text):
+        return [LeafNode(None, text)] if text else []
+    return [text_node_to_html_leaf_node(text_node) for text_node in tokenize_inline(text)]
+
+def _element(tag, children):
+    # ParentNode requires children; an element without any is emitted as literal markup
+    return ParentNode(tag, '', children) if children else LeafNode(None, f'<{tag}></{tag}>')
+
+def _join_lines(nodes_per_line):
+    # Joins the nodes of consecutive lines with newline leaves
+    children = []
+    for nodes in nodes_per_line:
+        if children:
+            children.append(_BLOCK_SPACER)
+        children.extend(nodes)
+    return children
+
+def _quote_node(lines):
+    # Lines are the quote's, one '>' level removed; deeper lines form nested quotes, bare '>' lines are dropped
+    children = []
+    text = []
+    nested = []
+
+    def flush():
+        if text:
+            children.append(_inline_nodes('\n'.join(text)))
+            text.clear()
+        if nested:
+            children.append([_quote_node(nested[:])])
+            nested.clear()
+
+    for line in lines:
+        if line.startswith('>'):
+            if text:
+                flush()
+            nested.append(line[2:] if line[1:2] == ' ' else line[1:])
+        elif line:
+            if nested:
+                flush()
+            text.append(line)
+    flush()
+    return _element('blockquote', _join_lines(children))
+
+def _list_node(block, block_type):
+    # <ul>/<ol> with one <li> per item; lines below an item render inside it, plain text without a <p>
+    spans = [] # (start, end) of each item's text in the block
+    below = {} # item index -> the lines indented below it
+    start = 0
+    for line in block.split('\n'):
+        if line[:1] == ' ':
+            below.setdefault(len(spans) - 1, []).append(line)
+        else:
+            marker = 2 if block_type is BlockType.ULIST else _OLIST_MARKER(line).end()
+            spans.append((start + marker, start + len(line)))
+        start += len(line) + 1
+
+    children = [_BLOCK_SPACER]
+    for index, text_nodes in enumerate(tokenize_inline_spans(block, spans)):
+        if index not in below and len(text_nodes) == 1 and text_nodes[0].text_type is TextType.TEXT:
+            children.append(LeafNode('li', text_nodes[0].text)) # plain item: no child nodes needed
+            children.append(_BLOCK_SPACER)
+            continue
+        item = [text_node_to_html_leaf_node(text_node) for text_node in text_nodes]
+        if index in below:
+            lines = below[index]
+            indent = min(len(line) - len(line.lstrip(' ')) for line in lines)
+            for nested_type, nested in _parse_nested_blocks('\n'.join(line[indent:] for line in lines)):
+                item.append(_BLOCK_SPACER)
+                if nested_type is BlockType.PARAGRAPH:
+                    item.extend(_inline_nodes(nested))
+                else:
+                    item.append(block_to_html_node(nested, nested_type))
+                    item.append(_BLOCK_SPACER)
+        children.append(_element('li', item))
+        children.append(_BLOCK_SPACER)
+    return ParentNode(block_type.value, '', children)
+
+def block_to_html_node(block, block_type):
+    """
+    Builds the html subtree of one markdown block.
+
+    Inline markdown is parsed only in the text of headings, paragraphs, quote
+    lines and list items, never in generated markup; code is kept verbatim.
+    Lists nest by indenting items below an item, and quotes by repeating '>'.
+
+    Args:
+        block (str): The block's markdown text.
+        block_type (BlockType): Its type, as parsed.
+
+    Returns:
+        HTMLNode: The block's element, e.g. a ParentNode('ul') of ParentNode('li') items.
+
+    Raises:
+        ValueError: If a heading or code block is malformed.
+    """
 
-def process_code(block):
-    [block] = re.findall(r'^```(.*?)```$', block, re.DOTALL)
-    return f'<pre><code>{block}</code></pre>'
+    match block_type:
+        case BlockType.HEADING:
+            heading = patterns.HEADING_TEXT.match(block)
+            if not heading:
+                raise ValueError('Markdown error: Invalid heading')
+            return _element(f'h{len(heading.group(1))}', _inline_nodes(heading.group(2)))
+        case BlockType.CODE:
+            fence = patterns.CODE_BLOCK.match(block)
+            if not fence:
+                raise ValueError('Markdown error: Invalid code block')
+            code = fence.group(1)
+            return ParentNode('pre', '', [LeafNode('code', code)]) if code else LeafNode(None, '<pre><code></code></pre>')
+        case BlockType.QUOTE:
+            return _quote_node([line[2:] if line[1:2] == ' ' else line[1:] for line in block.split('\n')])
+        case BlockType.ULIST | BlockType.OLIST:
+            return _list_node(block, block_type)
+        case _:
+            return _element('p', _inline_nodes(block))
 
-def process_quotes(block):
-    block_quote = re.findall(r'^> (.*)', block, re.MULTILINE) # multiline matches ^& $ for each line
-    block_quote = '\n'.join(block_quote)
-    return f'<blockquote>{block_quote}</blockquote>'
+def render_block(block, block_type = None):
+    """
+    Renders one markdown block into its html nodes, framed by newline spacers.
 
-def process_ulist(block):
-    ulist_items = re.findall(r'^- (.*)', block, re.MULTILINE)
-    ulist = [f'<li>{item}</li>\n' for item in ulist_items]
-    ulist.insert(0, '<ul>\n')
-    ulist.append('</ul>')
-    return ''.join(ulist)
+    The builders rely on the line shapes `parse_blocks` produces, so untyped text
+    is parsed first; it renders like the same text on a page, one or more blocks.
 
-def process_olist(block):
-    olist_items = re.findall(r'^[0-9]+\. (.*)', block, re.MULTILINE)
-    olist = [f'<li>{item}</li>\n' for item in olist_items]
-    olist.insert(0, '<ol>\n')
-    olist.append('</ol>')
-    return ''.join(olist)
+    Args:
+        block (str): The block's markdown text.
+        block_type (BlockType or None): Its type as parsed; parsed from the text if not given.
 
-def process_paragraph(block):
-    return f'<p>{block}</p>'
+    Returns:
+        list[HTMLNode]: The nodes the block contributes to the page's div.
+    """
 
+    blocks = parse_blocks(block) if block_type is None else [(block_type, block)]
+    nodes = []
+    for block_type, text in blocks:
+        nodes += (_BLOCK_SPACER, block_to_html_node(text, block_type), _BLOCK_SPACER)
+    return nodes
 
 def markdown_to_html_node(markdown):
-    blank_node = TextNode('\n', TextType.TEXT)
     children_nodes = []
     if markdown:
-        blocks = markdown_to_blocks(markdown)
-        for block in blocks:
-            block_type = block_to_block_type(block)
-            if block_type == BlockType.CODE:
-                block = process_code(block)
-                text_nodes = [TextNode(block, TextType.TEXT)]
-            else:
-                match block_type:
-                    case BlockType.HEADING:
-                        block = process_heading(block)
-                    case BlockType.QUOTE:
-                        block = process_quotes(block)
-                    case BlockType.ULIST:
-                        block = process_ulist(block)
-                    case BlockType.OLIST:
-                        block = process_olist(block)
-                    case BlockType.PARAGRAPH:
-                        block = process_paragraph(block)
-                    case _:
-                        block = process_paragraph(block)
-                text_nodes = text_to_text_nodes(block)
-            text_nodes.insert(0, blank_node)
-            text_nodes.append(blank_node)
-            for text_node in text_nodes:
-                leafnode = text_node_to_html_leaf_node(text_node)
-                children_nodes.append(leafnode)
+        blocks = parse_blocks(markdown)
+        if block_cache.enabled:
+            for block_type, block in blocks:
+                nodes = block_cache.get(block)
+                if nodes is None:
+                    nodes = block_cache.put(block, render_block(block, block_type))
+                children_nodes.extend(nodes)
+        else:
+            for block_type, block in blocks:
+                children_nodes.extend(render_block(block, block_type))
         html_node = ParentNode('div', '', children_nodes)
     return html_node
-
@@ -0,0 +1,65 @@
+"""
+Provides the fixtures shared by the build tests.
+
+Classes:
+    TempDirTestCase: A TestCase with a temporary folder and a helper writing files into it.
+    SiteTestCase: A TempDirTestCase with content and public folders and a page template.
+
+Constants:
+    TEMPLATE: A minimal page template with the title and the content.
+"""
+import os, tempfile, unittest
+
+TEMPLATE = '<html><title>{{ Title }}</title><body>{{ Content }}</body></html>'
+
+class TempDirTestCase(unittest.TestCase):
+    """
+    A TestCase with a temporary folder, `self.tmp`, removed after every test.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, data):
+        """
+        Writes `data` (str as utf-8, or bytes) to `path`, creating its folders.
+
+        Args:
+            path (str): The file; relative paths are below the temporary folder.
+            data (str or bytes): The content.
+
+        Returns:
+            str: The absolute path of the file.
+        """
+
+        path = os.path.join(self.tmp.name, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(data, bytes):
+            with open(path, 'wb') as f:
+                f.write(data)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(data)
+        return path
+
+class SiteTestCase(TempDirTestCase):
+    """
+    A TempDirTestCase with a site below the temporary folder.
+
+    `self.content` and `self.public` are created empty, and `self.template`
+    holds the class's TEMPLATE.
+    """
+
+    TEMPLATE = TEMPLATE
+
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, 'content')
+        self.public = os.path.join(self.tmp.name, 'public')
+        self.template = os.path.join(self.tmp.name, 'template.html')
+        os.makedirs(self.content)
+        os.makedirs(self.public)
+        self.write(self.template, self.TEMPLATE)
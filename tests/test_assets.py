@@ -0,0 +1,85 @@
+import os, unittest
+from src.assets import AssetLinks, asset_links, hashed_name
+from src.fileio import hash_file
+from src.site_operations import copy_contents, generate_pages_recursive, asset_tasks
+from src.file_index import scan_files
+from tests.helpers import SiteTestCase
+
+class Test_Assets(SiteTestCase):
+    TEMPLATE = '<html><head><link href="index.css" rel="stylesheet" /></head><body>{{ Content }}</body></html>'
+
+    def setUp(self):
+        super().setUp()
+        for section in ['', 'blog', 'contact']:
+            self.write(os.path.join(self.content, section, 'index.md'), f'# {section or "Home"}\n\n![logo](/logo.png)')
+            self.write(os.path.join(self.content, section, 'index.css'), 'body { color: red }')
+        self.write(os.path.join(self.content, 'logo.png'), 'png')
+        self.write(os.path.join(self.content, 'blog', 'other.css'), 'p {}')
+
+    def tearDown(self):
+        asset_links.configure()
+        super().tearDown()
+
+    def assets(self):
+        assets = []
+        for root, _, files in os.walk(self.content):
+            for name in files:
+                if not name.endswith('.md'):
+                    src_file = os.path.join(root, name)
+                    assets.append((src_file, os.path.join(self.public, os.path.relpath(src_file, self.content))))
+        return assets
+
+    def test_identical_assets_share_the_shallowest_output(self):
+        targets = AssetLinks().plan(self.assets(), self.public)
+        canonical = os.path.join(self.public, 'index.css')
+        self.assertEqual(targets, {
+            os.path.join(self.public, 'blog', 'index.css'): canonical,
+            os.path.join(self.public, 'contact', 'index.css'): canonical,
+        })
+
+    def test_hashed_names(self):
+        self.assertEqual(hashed_name('/a/index.css', 'abcdef0123456789'), '/a/index.abcdef012345.css')
+        targets = AssetLinks().plan(self.assets(), self.public, hashed_names = True)
+        digest = hash_file(os.path.join(self.content, 'logo.png'))
+        self.assertEqual(targets[os.path.join(self.public, 'logo.png')], hashed_name(os.path.join(self.public, 'logo.png'), digest))
+        self.assertEqual(len(set(targets.values())), 3)
+
+    def test_css_with_relative_references_stays_in_place(self):
+        for section in ['', 'blog', 'contact']:
+            self.write(os.path.join(self.content, section, 'index.css'), 'body { background: url(bg.png) }')
+        self.assertEqual(AssetLinks().plan(self.assets(), self.public), {})
+
+    def test_rewrite(self):
+        links = AssetLinks()
+        links.plan(self.assets(), self.public, '/site/')
+        page = os.path.join(self.public, 'blog', 'index.html')
+        html = ('<link href="index.css?v=1" /><a href="other.css"></a><img src="/site/blog/index.css">'
+                '<a href="https://example.com/index.css"></a><a href="#top"></a>')
+        self.assertEqual(links.rewrite(html, page), (
+            '<link href="/site/index.css?v=1" /><a href="other.css"></a><img src="/site/index.css">'
+            '<a href="https://example.com/index.css"></a><a href="#top"></a>'))
+
+    def test_build_emits_one_copy(self):
+        asset_links.plan(self.assets(), self.public, hashed_names = True)
+        outputs = generate_pages_recursive(self.content, self.template, self.public, jobs = 2)
+        css = sorted({path for path in outputs if path.endswith('.css') and os.path.dirname(path) == self.public})
+        self.assertEqual(len(css), 1)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.public, 'contact'))), ['index.html'])
+        with open(os.path.join(self.public, 'contact', 'index.html'), encoding='utf-8') as f:
+            html = f.read()
+        self.assertIn(f'href="/{os.path.basename(css[0])}"', html)
+        self.assertRegex(html, r'src="/logo\.[0-9a-f]{12}\.png"')
+
+    def test_static_copied_before_the_content_folder_exists(self):
+        static = os.path.join(self.tmp.name, 'static')
+        self.write(os.path.join(static, 'deep', 'a', 'x.css'), 'a {}')
+        self.write(os.path.join(self.content, 'b', 'x.css'), 'a {}')
+        asset_links.plan(asset_tasks(scan_files(static), scan_files(self.content), self.public), self.public)
+        outputs = copy_contents(static, self.public)
+        self.assertEqual(outputs[0], os.path.join(self.public, 'b', 'x.css'))
+        self.assertTrue(os.path.isfile(outputs[0]))
+        generate_pages_recursive(self.content, self.template, self.public)
+        self.assertFalse(os.path.exists(os.path.join(self.public, 'deep', 'a', 'x.css')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+from benchmarks.corpus import PROFILES, CorpusProfile, generate_page
+from benchmarks.run import compare
+from src.transformation import markdown_to_html_node
+from src.site_operations import extract_title
+
+class Test_Benchmarks(unittest.TestCase):
+    def test_corpus_is_deterministic(self):
+        profile = PROFILES['small']
+        self.assertEqual(generate_page(profile, 3), generate_page(profile, 3))
+        self.assertNotEqual(generate_page(profile, 3), generate_page(profile, 4))
+
+    def test_corpus_pages_render(self):
+        profile = CorpusProfile(pages=1, paragraphs=25, words=20, link_density=0.3, image_density=0.5, list_length=4, code_lines=3)
+        markdown = generate_page(profile, 0)
+        self.assertEqual(extract_title(markdown), 'Page 0')
+        html = markdown_to_html_node(markdown).to_html()
+        for tag in ['<a href=', '<img src=', '<ul>', '<ol>', '<pre><code>', '<blockquote>', '<h2>']:
+            self.assertIn(tag, html)
+
+    def test_compare_flags_regressions(self):
+        baseline = {'a': {'min': 1.0}, 'b': {'min': 1.0}}
+        results = {'a': {'min': 1.1}, 'b': {'min': 1.5}, 'c': {'min': 9.0}}
+        regressions = compare(results, baseline, 0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('b:'))
+
+
+if __name__ == '__main__':
+    unittest.main()
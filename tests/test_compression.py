@@ -0,0 +1,72 @@
+import gzip, os, tempfile, unittest
+from src import compression
+from src.compression import compress_file, precompress
+from src.site_operations import remove_orphans
+
+PAGE = '<html><body>' + '<p>Some repeated text</p>\n' * 50 + '</body></html>'
+
+class Test_Compression(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, 'public')
+        self.index = os.path.join(self.tmp.name, 'cache', 'compression.json')
+        os.makedirs(os.path.join(self.public, 'blog'))
+        self.outputs = [
+            self.write('index.html', PAGE),
+            self.write(os.path.join('blog', 'index.html'), PAGE.replace('Some', 'Other')),
+            self.write('tiny.css', 'a{}'),
+            self.write('image.png', 'png' * 100),
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.public, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_gzip_sidecar_is_reproducible(self):
+        path = self.outputs[0]
+        _, sidecars = compress_file(path)
+        self.assertIn(path + '.gz', sidecars)
+        with open(path + '.gz', 'rb') as f:
+            data = f.read()
+        self.assertEqual(gzip.decompress(data).decode('utf-8'), PAGE)
+        self.assertEqual(data[4:8], b'\0\0\0\0') # no timestamp
+        self.assertEqual(os.stat(path + '.gz').st_mtime_ns, os.stat(path).st_mtime_ns)
+        compress_file(path)
+        with open(path + '.gz', 'rb') as f:
+            self.assertEqual(f.read(), data)
+
+    def test_only_compressible_outputs_that_shrink(self):
+        sidecars = precompress(self.outputs, self.public, self.index, jobs = 2)
+        self.assertEqual(sorted(sidecars), sorted(path + extension for path in self.outputs[:2] for extension in compression.ENCODINGS))
+        self.assertFalse(os.path.exists(self.outputs[2] + '.gz'))
+        self.assertFalse(os.path.exists(self.outputs[3] + '.gz'))
+        self.assertEqual(remove_orphans(self.public, self.outputs + sidecars), [])
+
+    def test_unchanged_outputs_are_skipped(self):
+        first = precompress(self.outputs, self.public, self.index)
+        original = compression.compress_file
+        compressed = []
+        compression.compress_file = lambda path: (compressed.append(path), original(path))[1]
+        try:
+            self.assertEqual(sorted(precompress(self.outputs, self.public, self.index)), sorted(first))
+            self.assertEqual(compressed, [])
+            self.write('index.html', PAGE) # rewritten with the same content
+            precompress(self.outputs, self.public, self.index)
+            self.assertEqual(compressed, [])
+            self.write('index.html', PAGE + '<!-- changed -->')
+            os.unlink(self.outputs[1] + '.gz')
+            precompress(self.outputs, self.public, self.index)
+            self.assertEqual(sorted(compressed), sorted(self.outputs[:2]))
+        finally:
+            compression.compress_file = original
+        with open(self.outputs[0] + '.gz', 'rb') as f:
+            self.assertTrue(gzip.decompress(f.read()).endswith(b'<!-- changed -->'))
+
+
+if __name__ == '__main__':
+    unittest.main()
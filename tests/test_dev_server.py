@@ -0,0 +1,119 @@
+import os, gzip, unittest
+from urllib.request import urlopen
+from src.dev_server import SiteWatcher, scan_mtimes, start_server
+from src.assets import asset_links
+from src.manifest import BuildManifest
+from src.site_operations import asset_tasks, copy_contents, generate_pages_recursive, page_config
+from src.file_index import scan_files
+from src.compression import precompress
+from tests.helpers import SiteTestCase
+
+class Test_Dev_Server(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, 'static')
+        self.write(os.path.join(self.content, 'index.md'), '# Home\n\nWelcome')
+        self.write(os.path.join(self.content, 'blog', 'index.md'), '# Blog\n\nPosts')
+        self.write(os.path.join(self.static, 'index.css'), 'body {}')
+        generate_pages_recursive(self.content, self.template, self.public)
+        self.watcher = SiteWatcher(self.content, self.static, self.template, self.public)
+
+    def tearDown(self):
+        asset_links.configure()
+        super().tearDown()
+
+    def write(self, path, text):
+        path = super().write(path, text)
+        # make the change visible even on filesystems with a coarse mtime resolution
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        return path
+
+    def read(self, *parts):
+        with open(os.path.join(self.public, *parts), encoding='utf-8') as f:
+            return f.read()
+
+    def test_scan_mtimes(self):
+        self.assertEqual(set(scan_mtimes(self.content)), {
+            os.path.join(self.content, 'index.md'),
+            os.path.join(self.content, 'blog', 'index.md'),
+        })
+
+    def test_poll_without_changes(self):
+        self.assertEqual(self.watcher.poll(), ([], []))
+
+    def test_page_change_rebuilds_only_that_page(self):
+        self.write(os.path.join(self.content, 'index.md'), '# Home\n\nWelcome back')
+        changed, removed = self.watcher.poll()
+        self.assertEqual(self.watcher.rebuild(changed, removed), 1)
+        self.assertIn('Welcome back', self.read('index.html'))
+
+    def test_template_change_rebuilds_all_pages(self):
+        self.write(self.template, '<main>{{ Content }}</main>')
+        changed, removed = self.watcher.poll()
+        self.assertEqual(self.watcher.rebuild(changed, removed), 2)
+        self.assertTrue(self.read('blog', 'index.html').startswith('<main>'))
+
+    def test_static_added_and_removed(self):
+        self.write(os.path.join(self.static, 'site.js'), 'let a;')
+        self.watcher.rebuild(*self.watcher.poll())
+        self.assertEqual(self.read('site.js'), 'let a;')
+        os.unlink(os.path.join(self.static, 'site.js'))
+        self.watcher.rebuild(*self.watcher.poll())
+        self.assertFalse(os.path.exists(os.path.join(self.public, 'site.js')))
+
+    def test_rebuilds_use_the_build_settings(self):
+        manifest = BuildManifest.load(os.path.join(self.tmp.name, 'manifest.json'), self.public)
+        generate_pages_recursive(self.content, self.template, self.public, '/', manifest)
+        manifest.save()
+        copy_contents(self.static, self.public, manifest)
+        watcher = SiteWatcher(self.content, self.static, self.template, self.public,
+                              manifest = manifest, strategy = 'hardlink')
+        self.write(os.path.join(self.static, 'index.css'), 'body { margin: 0 }')
+        self.write(os.path.join(self.content, 'index.md'), '# Home\n\nWelcome back')
+        self.assertEqual(watcher.rebuild(*watcher.poll()), 2)
+        self.assertTrue(os.path.samefile(os.path.join(self.static, 'index.css'), os.path.join(self.public, 'index.css')))
+        # the next incremental build finds both outputs up to date
+        manifest = BuildManifest.load(manifest.path, self.public)
+        page = os.path.join(self.public, 'index.html')
+        self.assertTrue(manifest.is_fresh(page, manifest.dependencies(os.path.join(self.content, 'index.md'), self.template), page_config()))
+        css = os.path.join(self.public, 'index.css')
+        self.assertTrue(manifest.is_fresh(css, manifest.dependencies(os.path.join(self.static, 'index.css')), {'assets': 'hardlink'}))
+
+    def test_deduplicated_asset_change_replans(self):
+        self.write(os.path.join(self.content, 'blog', 'index.css'), 'body {}')
+        asset_links.plan(asset_tasks(scan_files(self.static), scan_files(self.content), self.public), self.public)
+        copy_contents(self.static, self.public)
+        generate_pages_recursive(self.content, self.template, self.public)
+        self.assertFalse(os.path.exists(os.path.join(self.public, 'blog', 'index.css'))) # merged into /index.css
+        watcher = SiteWatcher(self.content, self.static, self.template, self.public)
+        self.write(os.path.join(self.static, 'index.css'), 'body { margin: 0 }')
+        watcher.rebuild(*watcher.poll())
+        self.assertEqual(self.read('index.css'), 'body { margin: 0 }')
+        self.assertEqual(self.read('blog', 'index.css'), 'body {}')
+
+    def test_rebuilds_keep_sidecars_current(self):
+        self.write(os.path.join(self.static, 'site.css'), 'body { margin: 0 }\n' * 20)
+        outputs = copy_contents(self.static, self.public)
+        outputs += [os.path.join(self.public, 'index.html'), os.path.join(self.public, 'blog', 'index.html')]
+        precompress(outputs, self.public)
+        watcher = SiteWatcher(self.content, self.static, self.template, self.public, precompress = True)
+        self.write(os.path.join(self.content, 'index.md'), '# Home\n\n' + 'Welcome back ' * 20)
+        os.unlink(os.path.join(self.static, 'site.css'))
+        watcher.rebuild(*watcher.poll())
+        with gzip.open(os.path.join(self.public, 'index.html.gz'), 'rt', encoding='utf-8') as f:
+            self.assertEqual(f.read(), self.read('index.html'))
+        self.assertFalse(os.path.exists(os.path.join(self.public, 'site.css.gz')))
+
+    def test_server_serves_public(self):
+        server = start_server(self.public, 0)
+        try:
+            with urlopen(f'http://localhost:{server.server_address[1]}/index.html') as response:
+                self.assertIn('Welcome', response.read().decode('utf-8'))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
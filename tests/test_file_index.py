@@ -0,0 +1,58 @@
+import os, tempfile, unittest
+from unittest import mock
+from src.file_index import IndexedFile, scan_files
+from src.site_operations import collect_page_tasks, generate_pages_recursive
+
+class Test_File_Index(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'content')
+        for rel_path, text in [('index.md', '# Home'), ('blog/b/index.md', '# B'), ('blog/a/index.md', '# A'),
+                               ('blog/a/style.css', 'body {}'), ('z.txt', '')]:
+            path = os.path.join(self.root, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        os.makedirs(os.path.join(self.root, 'empty'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_flat_sorted_index(self):
+        files = scan_files(self.root)
+        self.assertEqual([indexed.relpath for indexed in files], [
+            os.path.join('blog', 'a', 'index.md'), os.path.join('blog', 'a', 'style.css'),
+            os.path.join('blog', 'b', 'index.md'), 'index.md', 'z.txt',
+        ])
+        self.assertTrue(all(isinstance(indexed, IndexedFile) for indexed in files))
+
+    def test_cached_stat(self):
+        indexed = scan_files(self.root)[1]
+        stat = os.stat(os.path.join(self.root, 'blog', 'a', 'style.css'))
+        self.assertEqual(indexed.path, os.path.join(os.path.abspath(self.root), 'blog', 'a', 'style.css'))
+        self.assertEqual((indexed.size, indexed.mtime_ns), (stat.st_size, stat.st_mtime_ns))
+
+    def test_missing_root(self):
+        with self.assertRaises(FileNotFoundError):
+            scan_files(os.path.join(self.tmp.name, 'missing'))
+
+    def test_collect_page_tasks_uses_index(self):
+        public = os.path.join(self.tmp.name, 'public')
+        files = scan_files(self.root)
+        pages, copies = collect_page_tasks(self.root, public, files[:2])
+        self.assertEqual(pages, [(files[0].path, os.path.join(public, 'blog', 'a', 'index.html'))])
+        self.assertEqual(copies, [(files[1], os.path.join(public, 'blog', 'a', 'style.css'))])
+        self.assertTrue(os.path.isdir(os.path.join(public, 'blog', 'a')))
+
+    def test_content_copies_reuse_index(self):
+        public = os.path.join(self.tmp.name, 'public')
+        template = os.path.join(self.tmp.name, 'template.html')
+        with open(template, 'w', encoding='utf-8') as f:
+            f.write('{{ Content }}')
+        files = scan_files(self.root)
+        with mock.patch('src.site_operations.copy_file') as copy_file:
+            generate_pages_recursive(self.root, template, public, files = files)
+        self.assertEqual([call.args[5] for call in copy_file.call_args_list], [files[1], files[4]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import os, tempfile, unittest
+from src.fileio import atomic_write, hash_file
+
+class Test_File_IO(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hash_file(self):
+        first, second = os.path.join(self.tmp.name, 'a.txt'), os.path.join(self.tmp.name, 'b.txt')
+        atomic_write(first, 'a')
+        atomic_write(second, 'b')
+        self.assertEqual(hash_file(first), hash_file(first))
+        self.assertNotEqual(hash_file(first), hash_file(second))
+
+    def test_atomic_write(self):
+        path = os.path.join(self.tmp.name, 'out.txt')
+        self.assertTrue(atomic_write(path, 'text'))
+        self.assertTrue(atomic_write(path, b'bytes'))
+        self.assertFalse(atomic_write(path, lambda temp_path: False))
+        def fail(temp_path):
+            with open(temp_path, 'w') as f:
+                f.write('partial')
+            raise OSError('disk full')
+        with self.assertRaises(OSError):
+            atomic_write(path, fail)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'bytes')
+        self.assertEqual([name for name in os.listdir(self.tmp.name) if name.endswith('.tmp')], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,4 @@
-import unittest
+import io, unittest
 from src.htmlnode import HTMLNode, LeafNode, ParentNode, HTMLTag
 from src.textnode import TextType
 
@@ -161,6 +161,44 @@ class Test_HTMLNode(unittest.TestCase):
         )
         self.assertEqual(node.to_html(), '<img src="http://link.com" alt="alt_text">This is a <b>bolded</b> text</img>')
 
+    # ------------------------------------------------------------------------
+    # Compact nodes
+    # ------------------------------------------------------------------------
+    def test_nodes_have_no_dict(self):
+        for node in [HTMLNode('p', 'text'), LeafNode('b', 'text'), ParentNode('div', children = [LeafNode('b', 'text')])]:
+            self.assertFalse(hasattr(node, '__dict__'))
+
+    def test_tags_are_interned(self):
+        tag = ''.join(['s', 'pan'])
+        self.assertIs(LeafNode(tag, 'a').tag, LeafNode('span', 'b').tag)
+
+    # ------------------------------------------------------------------------
+    # Streaming html
+    # ------------------------------------------------------------------------
+    def test_iter_html_fragments(self):
+        node = ParentNode('p', children = [LeafNode('b', 'Bold text'), LeafNode(None, 'Normal text')])
+        self.assertEqual(list(node.iter_html()), ['<p>', '<b>Bold text</b>', 'Normal text', '</p>'])
+        self.assertEqual(node.to_html(), ''.join(node.iter_html()))
+
+    def test_write_html(self):
+        node = ParentNode('ul', '\n', children = [LeafNode('li', f'item {index}') for index in range(3)])
+        fp = io.StringIO()
+        node.write_html(fp)
+        self.assertEqual(fp.getvalue(), '<ul>\n<li>item 0</li>\n<li>item 1</li>\n<li>item 2</li></ul>')
+
+    def test_leaf_html(self):
+        self.assertEqual(LeafNode('li', 'item').leaf_html(), '<li>item</li>')
+        with self.assertRaises(ValueError):
+            ParentNode('ul', children = [LeafNode('li', '')]).to_html()
+
+    def test_iter_html_generic_node(self):
+        with self.assertRaises(NotImplementedError):
+            HTMLNode('p', 'text').to_html()
+
+    def test_to_html_many_leaves(self):
+        node = ParentNode('div', children = [LeafNode(None, 'x') for _ in range(50000)])
+        self.assertEqual(node.to_html(), '<div>' + 'x' * 50000 + '</div>')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+import os, tempfile, unittest
+from src.htmlnode import LeafNode, ParentNode
+from src.image_hints import ImageHints, image_hints, preload_link
+from src.render_cache import block_cache
+from src.site_operations import generate_page
+from src.transformation import markdown_to_html_node
+
+MARKDOWN = '# Title\n\n![hero](/images/hero.png)\n\nSome text\n\n![second](b.png) and ![third](c.png)'
+
+class Test_Image_Hints(unittest.TestCase):
+    def setUp(self):
+        self.settings = (block_cache.maxsize, block_cache.directory)
+
+    def tearDown(self):
+        block_cache.configure(*self.settings)
+        image_hints.configure()
+
+    def images(self, node):
+        if node.tag == 'img':
+            return [node.props]
+        return [props for child in node.children or [] for props in self.images(child)]
+
+    def test_hero_is_preloaded_and_the_rest_lazy(self):
+        node, head = ImageHints().apply(markdown_to_html_node(MARKDOWN))
+        self.assertEqual(head, preload_link('/images/hero.png'))
+        self.assertEqual(self.images(node), [
+            {'src': '/images/hero.png', 'alt': 'hero', 'loading': 'eager', 'fetchpriority': 'high'},
+            {'src': 'b.png', 'alt': 'second', 'loading': 'lazy', 'decoding': 'async'},
+            {'src': 'c.png', 'alt': 'third', 'loading': 'lazy', 'decoding': 'async'},
+        ])
+
+    def test_eager_count(self):
+        hints = ImageHints()
+        hints.configure(True, 2)
+        node, _ = hints.apply(markdown_to_html_node(MARKDOWN))
+        self.assertEqual([props['loading'] for props in self.images(node)], ['eager', 'eager', 'lazy'])
+        hints.configure(True, 0)
+        node, head = hints.apply(markdown_to_html_node(MARKDOWN))
+        self.assertEqual(head, '')
+        self.assertEqual([props['loading'] for props in self.images(node)], ['lazy'] * 3)
+
+    def test_existing_attributes_are_kept(self):
+        page = ParentNode('div', '', [LeafNode('img', '', {'src': 'a.png', 'loading': 'lazy'})])
+        node, _ = ImageHints().apply(page)
+        self.assertEqual(self.images(node), [{'src': 'a.png', 'loading': 'lazy', 'fetchpriority': 'high'}])
+
+    def test_nodes_are_copied_not_modified(self):
+        inner = ParentNode('p', '', [LeafNode(None, 'text'), LeafNode('img', '', {'src': 'a.png'})])
+        untouched = ParentNode('p', '', [LeafNode(None, 'plain')])
+        page = ParentNode('div', '', [untouched, inner])
+        node, _ = ImageHints().apply(page)
+        self.assertEqual(inner.children[1].props, {'src': 'a.png'})
+        self.assertIs(node.children[0], untouched)
+        self.assertIsNot(node.children[1], inner)
+        self.assertIs(node.children[1].children[0], inner.children[0])
+
+    def test_cached_blocks_stay_clean(self):
+        block_cache.configure(16)
+        image_hints.configure(True)
+        with tempfile.TemporaryDirectory() as tmp:
+            source, template = os.path.join(tmp, 'index.md'), os.path.join(tmp, 'template.html')
+            with open(source, 'w', encoding='utf-8') as f:
+                f.write(MARKDOWN)
+            with open(template, 'w', encoding='utf-8') as f:
+                f.write('<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>')
+            generate_page(source, template, os.path.join(tmp, 'index.html'))
+            with open(os.path.join(tmp, 'index.html'), encoding='utf-8') as f:
+                html = f.read()
+        self.assertIn('</title>' + preload_link('/images/hero.png') + '</head>', html)
+        self.assertIn('<img src="b.png" alt="second" loading="lazy" decoding="async"></img>', html)
+        self.assertEqual(self.images(ParentNode('div', '', block_cache.get('![hero](/images/hero.png)'))),
+                         [{'src': '/images/hero.png', 'alt': 'hero'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
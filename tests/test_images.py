@@ -0,0 +1,101 @@
+import json, os, struct, unittest, zlib
+from unittest import mock
+from src import images
+from src.images import ImagePipeline, image_pipeline, image_size
+from src.fileio import hash_file
+from src.site_operations import generate_pages_recursive
+from tests.helpers import SiteTestCase
+
+def png_bytes(width, height):
+    # a valid 8-bit grayscale png of one colour
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    rows = b''.join(b'\x00' + b'\x80' * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b''))
+
+def jpeg_bytes(width, height):
+    # the markers image_size walks: SOI, an APP0 segment and a baseline SOF0
+    app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x00' * 9
+    sof0 = b'\xff\xc0' + struct.pack('>HBHHB', 11, 8, height, width, 1) + b'\x01\x11\x00'
+    return b'\xff\xd8' + app0 + sof0 + b'\xff\xd9'
+
+class Test_Images(SiteTestCase):
+    TEMPLATE = '<html><body>{{ Content }}</body></html>'
+
+    def setUp(self):
+        super().setUp()
+        self.cache = os.path.join(self.tmp.name, 'cache')
+        self.write(os.path.join(self.content, 'photo.png'), png_bytes(64, 32))
+        self.write(os.path.join(self.content, 'blog', 'index.md'),
+                   '# Blog\n\n![a photo](../photo.png)\n\n![elsewhere](https://example.com/x.png)')
+
+    def tearDown(self):
+        image_pipeline.configure()
+        super().tearDown()
+
+    def test_image_size(self):
+        self.assertEqual(image_size(self.write('a.png', png_bytes(3, 2))), (3, 2))
+        self.assertEqual(image_size(self.write('a.jpg', jpeg_bytes(640, 480))), (640, 480))
+        self.assertIsNone(image_size(self.write('a.txt', b'not an image')))
+
+    def test_pages_get_dimensions(self):
+        image_pipeline.configure((16,), self.cache, self.public)
+        generate_pages_recursive(self.content, self.template, self.public)
+        with open(os.path.join(self.public, 'blog', 'index.html'), encoding='utf-8') as f:
+            html = f.read()
+        self.assertIn('<img src="../photo.png" alt="a photo" width="64" height="32"', html)
+        self.assertIn('<img src="https://example.com/x.png" alt="elsewhere">', html)
+        if images.Image is None:
+            self.assertIn('loading="lazy"></img>', html)
+
+    def test_processing_is_cached_by_content(self):
+        pipeline = ImagePipeline()
+        pipeline.configure((16,), self.cache, self.public)
+        src_file = os.path.join(self.content, 'photo.png')
+        pipeline.process(src_file, os.path.join(self.public, 'photo.png'))
+        copy = self.write('copy.png', png_bytes(64, 32))
+        original = images.image_size
+        images.image_size = None # any call would fail
+        try:
+            info = pipeline.process(copy, os.path.join(self.public, 'copy.png'))
+        finally:
+            images.image_size = original
+        self.assertEqual((info.width, info.height), (64, 32))
+
+    def test_cached_variants_are_placed_and_listed(self):
+        pipeline = ImagePipeline()
+        pipeline.configure((16, 32), self.cache, self.public)
+        src_file = os.path.join(self.content, 'photo.png')
+        entry_dir = pipeline._entry_dir(hash_file(src_file))
+        self.write(os.path.join(entry_dir, '16w.png'), png_bytes(16, 8))
+        self.write(os.path.join(entry_dir, 'image.json'), json.dumps({'width': 64, 'height': 32, 'variants': [['16w.png', 16]]}))
+        dest_file = os.path.join(self.public, 'photo.png')
+        pipeline.process(src_file, dest_file)
+        self.assertEqual(image_size(os.path.join(self.public, 'photo.16w.png')), (16, 8))
+        self.assertEqual(pipeline.outputs(dest_file), [os.path.join(self.public, 'photo.16w.png')])
+        html = pipeline.rewrite('<p><img src="photo.png" alt="" loading="eager" /></p>', os.path.join(self.public, 'index.html'))
+        self.assertEqual(html, '<p><img src="photo.png" alt="" loading="eager" width="64" height="32" '
+                               f'srcset="photo.16w.png 16w, photo.png 64w" sizes="{pipeline.sizes}" /></p>')
+        head = pipeline.rewrite('<link rel="preload" href="photo.png" as="image" />', os.path.join(self.public, 'index.html'))
+        self.assertEqual(head, '<link rel="preload" href="photo.png" as="image" '
+                               f'imagesrcset="photo.16w.png 16w, photo.png 64w" imagesizes="{pipeline.sizes}" />')
+
+    @unittest.skipIf(images.Image is None, 'Pillow is not installed')
+    def test_variants_are_resized(self):
+        image_pipeline.configure((16, 128), self.cache, self.public)
+        outputs = generate_pages_recursive(self.content, self.template, self.public)
+        variant = os.path.join(self.public, 'photo.16w.png')
+        self.assertIn(variant, outputs)
+        self.assertEqual(image_size(variant), (16, 8))
+        self.assertFalse(os.path.exists(os.path.join(self.public, 'photo.128w.png')))
+
+    def test_missing_pillow_is_reported(self):
+        with mock.patch('src.images.Image', None):
+            with self.assertLogs('src.images', 'WARNING'):
+                ImagePipeline().configure((16,), self.cache, self.public)
+            with self.assertNoLogs('src.images', 'WARNING'):
+                ImagePipeline().configure((16,), self.cache, self.public, images = {}) # a worker
+
+if __name__ == '__main__':
+    unittest.main()
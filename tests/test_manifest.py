@@ -0,0 +1,119 @@
+import os, unittest
+from src.manifest import BuildManifest
+from src.site_operations import generate_pages_recursive, remove_orphans, asset_tasks
+from src.assets import asset_links
+from src.file_index import scan_files
+from tests.helpers import SiteTestCase, TEMPLATE
+
+class Test_Manifest(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest_path = os.path.join(self.tmp.name, 'cache', 'manifest.json')
+        self.write(os.path.join(self.content, 'index.md'), '# Home\n\nWelcome')
+        self.write(os.path.join(self.content, 'blog', 'index.md'), '# Blog\n\nPosts')
+        self.write(os.path.join(self.content, 'blog', 'index.css'), 'body {}')
+
+    def build(self, base_path = '/', strategy = 'copy'):
+        manifest = BuildManifest.load(self.manifest_path, self.public)
+        outputs = generate_pages_recursive(self.content, self.template, self.public, base_path, manifest, strategy = strategy)
+        manifest.save()
+        remove_orphans(self.public, outputs)
+        return manifest
+
+    def mtimes(self):
+        outputs = ['index.html', os.path.join('blog', 'index.html'), os.path.join('blog', 'index.css')]
+        return {name: os.stat(os.path.join(self.public, name)).st_mtime_ns for name in outputs}
+
+    # ------------------------------------------------------------------------
+    # Freshness
+    # ------------------------------------------------------------------------
+    def test_missing_manifest_is_empty(self):
+        manifest = BuildManifest.load(self.manifest_path, self.public)
+        self.assertEqual(manifest.previous, {})
+
+    def test_stale_reasons(self):
+        self.build()
+        manifest = BuildManifest.load(self.manifest_path, self.public)
+        page = os.path.join(self.public, 'index.html')
+        source = os.path.join(self.content, 'index.md')
+        inputs = manifest.dependencies(source, self.template)
+        self.assertEqual(manifest.stale_reasons(page, inputs, {'base_path': '/'}), [])
+        self.assertEqual(manifest.stale_reasons(page, inputs, {'base_path': '/site/'}), ["base_path changed: '/' -> '/site/'"])
+        self.assertEqual(manifest.stale_reasons(os.path.join(self.public, 'new.html'), inputs), ['new output'])
+
+        self.write(self.template, TEMPLATE + '\n')
+        manifest = BuildManifest.load(self.manifest_path, self.public)
+        inputs = manifest.dependencies(source, self.template)
+        self.assertEqual(manifest.stale_reasons(page, inputs, {'base_path': '/'}), [f'template changed: {self.template}'])
+
+    # ------------------------------------------------------------------------
+    # Incremental builds
+    # ------------------------------------------------------------------------
+    def test_unchanged_outputs_are_skipped(self):
+        self.build()
+        before = self.mtimes()
+        self.build()
+        self.assertEqual(self.mtimes(), before)
+
+    def test_changed_source_is_rebuilt(self):
+        self.build()
+        before = self.mtimes()
+        self.write(os.path.join(self.content, 'index.md'), '# Home\n\nWelcome back')
+        self.build()
+        after = self.mtimes()
+        self.assertNotEqual(after['index.html'], before['index.html'])
+        self.assertEqual(after[os.path.join('blog', 'index.html')], before[os.path.join('blog', 'index.html')])
+        with open(os.path.join(self.public, 'index.html'), encoding='utf-8') as f:
+            self.assertIn('Welcome back', f.read())
+
+    def test_template_change_rebuilds_pages_only(self):
+        self.build()
+        before = self.mtimes()
+        self.write(self.template, TEMPLATE.replace('<body>', '<body class="x">'))
+        self.build()
+        after = self.mtimes()
+        self.assertNotEqual(after['index.html'], before['index.html'])
+        self.assertNotEqual(after[os.path.join('blog', 'index.html')], before[os.path.join('blog', 'index.html')])
+        self.assertEqual(after[os.path.join('blog', 'index.css')], before[os.path.join('blog', 'index.css')])
+
+    def test_template_and_base_path_changes_rebuild_pages(self):
+        # a root-relative link, so the page content depends on the base path
+        self.write(os.path.join(self.content, 'index.md'), '# Home\n\n[Posts](/blog)')
+        self.build()
+        before = self.mtimes()
+        self.build('/site/')
+        after = self.mtimes()
+        self.assertNotEqual(after['index.html'], before['index.html'])
+        self.assertEqual(after[os.path.join('blog', 'index.css')], before[os.path.join('blog', 'index.css')])
+
+    def test_strategy_change_replaces_assets(self):
+        self.build()
+        css = os.path.join(self.public, 'blog', 'index.css')
+        self.assertFalse(os.path.islink(css))
+        self.build(strategy = 'symlink')
+        self.assertEqual(os.readlink(css), os.path.join(self.content, 'blog', 'index.css'))
+
+    def test_deleted_sources_are_pruned(self):
+        self.build()
+        os.unlink(os.path.join(self.content, 'blog', 'index.md'))
+        os.unlink(os.path.join(self.content, 'blog', 'index.css'))
+        manifest = self.build()
+        self.assertEqual(sorted(manifest.removed_outputs()), [os.path.join(self.public, 'blog', 'index.css'),
+                                                              os.path.join(self.public, 'blog', 'index.html')])
+        self.assertFalse(os.path.exists(os.path.join(self.public, 'blog')))
+        self.assertTrue(os.path.exists(os.path.join(self.public, 'index.html')))
+
+    def test_renamed_outputs_are_explained(self):
+        self.build()
+        asset_links.plan(asset_tasks([], scan_files(self.content), self.public), self.public, hashed_names = True)
+        try:
+            manifest = BuildManifest.load(self.manifest_path, self.public, explain = True)
+            generate_pages_recursive(self.content, self.template, self.public, '/', manifest)
+            with self.assertLogs('src.manifest', 'INFO') as logs:
+                manifest.removed_outputs()
+        finally:
+            asset_links.configure()
+        self.assertEqual(logs.output, [f'INFO:src.manifest:Removing {os.path.join("blog", "index.css")}: no longer produced by this build'])
+
+if __name__ == '__main__':
+    unittest.main()
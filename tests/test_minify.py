@@ -0,0 +1,91 @@
+import os, unittest
+from src import minify
+from src.minify import Minifier, minifier, minify_css, minify_html
+from src.reporting import stats
+from src.site_operations import copy_file, generate_page
+from tests.helpers import TempDirTestCase
+
+PAGE = '''<!doctype html>
+<html>
+<head>
+    <title>Home</title>
+</head>
+<body>
+    <article><div>
+<h1>Title</h1>
+
+<p>Some <b>bold</b>   and
+<i>italic</i> text</p>
+
+<pre><code>
+def f():
+
+    return  1
+</code></pre>
+</div></article>
+</body>
+</html>
+'''
+
+class Test_Minify(TempDirTestCase):
+    def tearDown(self):
+        minifier.configure()
+        super().tearDown()
+
+    def test_minify_html(self):
+        self.assertEqual(minify_html(PAGE), (
+            '<!doctype html><html><head><title>Home</title></head><body><article><div><h1>Title</h1>'
+            '<p>Some <b>bold</b> and <i>italic</i> text</p>'
+            '<pre><code>\ndef f():\n\n    return  1\n</code></pre></div></article></body></html>'))
+
+    def test_minify_html_keeps_space_around_inline_elements(self):
+        self.assertEqual(minify_html('<p>a <textarea>b\n  c</textarea> d <script>e()</script> f</p>'),
+                         '<p>a <textarea>b\n  c</textarea> d <script>e()</script> f</p>')
+
+    def test_minify_css_leaves_strings_alone(self):
+        self.assertEqual(minify_css('a::after { content: ";}" ; }'), 'a::after{content:";}"}')
+
+    def test_minify_css(self):
+        css = '/* theme */\nh1,\nh2 {\n    color : #fff;\n    margin: 0 auto;\n}\n\na :hover > b { content: "a  ;  b"; width: calc(1px + 2px); }\n'
+        self.assertEqual(minify_css(css), 'h1,h2{color :#fff;margin:0 auto}a :hover>b{content:"a  ;  b";width:calc(1px + 2px)}')
+
+    def test_results_are_cached_on_disk(self):
+        directory = os.path.join(self.tmp.name, 'cache')
+        Minifier().configure(True, directory)
+        first = Minifier()
+        first.configure(True, directory)
+        expected = first.minify(PAGE, 'html')
+        second = Minifier()
+        second.configure(True, directory)
+        original = minify._MINIFIERS
+        minify._MINIFIERS = {} # any minification would fail
+        try:
+            self.assertEqual(second.minify(PAGE, 'html'), expected)
+        finally:
+            minify._MINIFIERS = original
+
+    def test_stylesheets_are_minified_on_copy(self):
+        src_file = self.write('index.css', 'body {\n    color: red;\n}\n')
+        dest_file = os.path.join(self.tmp.name, 'out.css')
+        copy_file(src_file, dest_file)
+        self.assertEqual(os.path.getsize(dest_file), os.path.getsize(src_file))
+        minifier.configure(True)
+        stats.reset()
+        copy_file(src_file, dest_file)
+        copy_file(src_file, dest_file)
+        with open(dest_file, encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'body{color:red}')
+        self.assertEqual((stats.copies, stats.unchanged), (1, 1))
+
+    def test_pages_are_minified(self):
+        minifier.configure(True)
+        source = self.write('index.md', '# Title\n\nSome\ntext\n\n```\na\n  b\n```')
+        template = self.write('template.html', '<html>\n  <body>\n    {{ Content }}\n  </body>\n</html>\n')
+        dest_path = os.path.join(self.tmp.name, 'index.html')
+        generate_page(source, template, dest_path)
+        with open(dest_path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), '<html><body><div><h1>Title</h1><p>Some text</p><pre><code>\na\n  b\n</code></pre></div></body></html>')
+
+
+if __name__ == '__main__':
+    unittest.main()
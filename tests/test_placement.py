@@ -0,0 +1,68 @@
+import os, tempfile, unittest
+from unittest import mock
+from src import placement
+from src.placement import place_file, matches_strategy, STRATEGIES
+
+class Test_Placement(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, 'image.png')
+        self.dest = os.path.join(self.tmp.name, 'public', 'image.png')
+        os.makedirs(os.path.dirname(self.dest))
+        with open(self.src, 'wb') as f:
+            f.write(b'\x89PNG' * 1000)
+        os.utime(self.src, ns=(1_000_000_000, 2_000_000_000))
+        placement._unsupported.clear()
+
+    def tearDown(self):
+        placement._unsupported.clear()
+        self.tmp.cleanup()
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_every_strategy_places_the_content(self):
+        for strategy in STRATEGIES:
+            with self.subTest(strategy = strategy):
+                place_file(self.src, self.dest, strategy)
+                self.assertEqual(self.read(self.dest), self.read(self.src))
+                self.assertTrue(matches_strategy(self.src, self.dest, strategy))
+                self.assertEqual(os.listdir(os.path.dirname(self.dest)), ['image.png'])
+
+    def test_copies_keep_mtime(self):
+        for strategy in ('copy', 'reflink'):
+            place_file(self.src, self.dest, strategy)
+            self.assertEqual(os.stat(self.dest).st_mtime_ns, 2_000_000_000)
+
+    def test_links(self):
+        self.assertEqual(place_file(self.src, self.dest, 'hardlink'), 'hardlink')
+        self.assertTrue(os.path.samefile(self.src, self.dest))
+        self.assertFalse(matches_strategy(self.src, self.dest, 'copy'))
+        self.assertEqual(place_file(self.src, self.dest, 'symlink'), 'symlink')
+        self.assertEqual(os.readlink(self.dest), self.src)
+        self.assertFalse(matches_strategy(self.src, self.dest, 'hardlink'))
+
+    def test_replacing_a_hardlink_leaves_the_source_alone(self):
+        place_file(self.src, self.dest, 'hardlink')
+        other = os.path.join(self.tmp.name, 'other.png')
+        with open(other, 'wb') as f:
+            f.write(b'other')
+        place_file(other, self.dest, 'copy')
+        self.assertEqual(self.read(self.src), b'\x89PNG' * 1000)
+
+    def test_fallback_when_unsupported(self):
+        with mock.patch('os.link', side_effect=OSError(18, 'Invalid cross-device link')):
+            self.assertIn(place_file(self.src, self.dest, 'hardlink'), ('reflink', 'copy'))
+            self.assertTrue(matches_strategy(self.src, self.dest, 'hardlink'))
+        with mock.patch('os.symlink', side_effect=OSError(1, 'Operation not permitted')):
+            self.assertEqual(place_file(self.src, self.dest, 'symlink'), 'copy')
+        self.assertEqual(self.read(self.dest), self.read(self.src))
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            place_file(self.src, self.dest, 'teleport')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import json, os, unittest
+from src import site_operations, transformation
+from src.profiler import BuildProfiler
+from src.site_operations import generate_pages_recursive
+from tests.helpers import SiteTestCase
+
+class Test_Profiler(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ['a', 'b']:
+            self.write(os.path.join(self.content, f'{name}.md'), f'# Page {name}\n\nSome **bold** text\n\n- item 1\n- item 2')
+
+    def test_uninstall_restores_functions(self):
+        originals = (site_operations.generate_page, transformation.text_to_text_nodes)
+        profiler = BuildProfiler().install()
+        self.assertIsNot(site_operations.generate_page, originals[0])
+        profiler.uninstall()
+        self.assertEqual((site_operations.generate_page, transformation.text_to_text_nodes), originals)
+
+    def test_stages_and_counters(self):
+        profiler = BuildProfiler(trace = True).install()
+        try:
+            generate_pages_recursive(self.content, self.template, self.public)
+        finally:
+            profiler.uninstall()
+        self.assertEqual(profiler.stages['page'][0], 2)
+        # the paragraph and list blocks of the second page come from the render cache
+        self.assertEqual(profiler.stages['parse_blocks'][0], 2)
+        self.assertEqual(profiler.stages['render_block'][0], 4)
+        self.assertEqual(profiler.counters['blocks: ulist'], 2)
+        self.assertEqual((profiler.counters['render cache hits'], profiler.counters['render cache misses']), (2, 4))
+        self.assertGreater(profiler.counters['bytes written'], 0)
+        # div, then per block its two spacers and element tree: h1 > text, p > 3 leaves, ul > 2 li and 3 newlines
+        self.assertEqual(profiler.counters['html nodes'], 2 * (1 + 4 + 6 + 8))
+        self.assertEqual(len(profiler.pages), 2)
+
+        report = profiler.report(top = 1)
+        self.assertIn('render + write', report)
+        self.assertIn('1 slowest pages:', report)
+
+        trace = os.path.join(self.tmp.name, 'trace.json')
+        profiler.write_trace(trace)
+        with open(trace, encoding='utf-8') as f:
+            events = json.load(f)['traceEvents']
+        self.assertEqual(sum(event['name'] == 'page' for event in events), 2)
+
+    def test_nested_blocks_are_counted_once(self):
+        self.write(os.path.join(self.content, 'a.md'), '# Nested\n\n- item\n  > quote\n  para')
+        os.unlink(os.path.join(self.content, 'b.md'))
+        profiler = BuildProfiler().install()
+        try:
+            generate_pages_recursive(self.content, self.template, self.public)
+        finally:
+            profiler.uninstall()
+        self.assertEqual(profiler.stages['parse_blocks'][0], 1)
+        self.assertEqual({name: count for name, count in profiler.counters.items() if name.startswith('blocks: ')},
+                         {'blocks: heading': 1, 'blocks: ulist': 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os, tempfile, unittest
+from src import transformation
+from src.render_cache import RenderCache, block_cache, block_key, node_from_data, node_to_data
+from src.htmlnode import LeafNode, ParentNode
+from src.transformation import markdown_to_html_node, render_block
+
+MARKDOWN = '# Title\n\nSome **bold** text\n\n- item 1\n- item 2\n\n```\ncode\n```\n\nSome **bold** text'
+
+class Test_Render_Cache(unittest.TestCase):
+    def setUp(self):
+        self.settings = (block_cache.maxsize, block_cache.directory)
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        block_cache.configure(*self.settings)
+        self.tmp.cleanup()
+
+    def test_cached_output_matches_uncached(self):
+        block_cache.configure(0)
+        expected = markdown_to_html_node(MARKDOWN).to_html()
+        block_cache.configure(16)
+        self.assertEqual(markdown_to_html_node(MARKDOWN).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(MARKDOWN).to_html(), expected)
+        # the repeated paragraph hits on the first render, every block on the second
+        self.assertEqual((block_cache.hits, block_cache.misses), (6, 4))
+
+    def test_hits_skip_block_work(self):
+        block_cache.configure(16)
+        markdown_to_html_node(MARKDOWN)
+        original = transformation.block_to_html_node
+        transformation.block_to_html_node = None # any call would fail
+        try:
+            markdown_to_html_node(MARKDOWN)
+        finally:
+            transformation.block_to_html_node = original
+
+    def test_lru_eviction(self):
+        cache = RenderCache(maxsize = 2)
+        for block in ['a', 'b', 'c']:
+            cache.put(block, render_block(block))
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+        cache.get('b')
+        cache.put('d', render_block('d'))
+        self.assertIsNone(cache.get('c'))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_disk_store_persists(self):
+        directory = os.path.join(self.tmp.name, 'blocks')
+        block_cache.configure(16, directory)
+        expected = markdown_to_html_node(MARKDOWN).to_html()
+        self.assertTrue(os.path.isfile(os.path.join(directory, block_key('Some **bold** text')[:2],
+                                                    block_key('Some **bold** text') + '.json')))
+        block_cache.configure(16, directory) # a new build: memory is empty, disk is not
+        self.assertEqual(markdown_to_html_node(MARKDOWN).to_html(), expected)
+        self.assertEqual(block_cache.misses, 0)
+
+    def test_disk_only(self):
+        cache = RenderCache(maxsize = 0, directory = os.path.join(self.tmp.name, 'blocks'))
+        cache.put('_x_', render_block('_x_'))
+        self.assertEqual(''.join(node.to_html() for node in cache.get('_x_')), '\n<p><i>x</i></p>\n')
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = RenderCache(directory = self.tmp.name)
+        path = cache._path('text')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{not json')
+        self.assertIsNone(cache.get('text'))
+
+    def test_node_data_round_trip(self):
+        node = ParentNode('ul', '\n', [LeafNode('li', 'one'), LeafNode('a', 'link', {'href': '/x'})])
+        self.assertEqual(node_from_data(node_to_data(node)).to_html(), node.to_html())
+
+
+if __name__ == '__main__':
+    unittest.main()
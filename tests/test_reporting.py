@@ -0,0 +1,48 @@
+import logging, os, unittest
+from src.main import parse_args
+from src.reporting import BuildStats, configure_logging, stats
+from src.site_operations import generate_pages_recursive
+from tests.helpers import SiteTestCase
+
+class Test_Reporting(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ['a', 'b']:
+            self.write(os.path.join(self.content, f'{name}.md'), f'# Page {name}\n\nSome text')
+        self.write(os.path.join(self.content, 'image.png'), b'png')
+        stats.reset()
+
+    def test_summary_counts(self):
+        generate_pages_recursive(self.content, self.template, self.public)
+        self.assertEqual((stats.pages, stats.copies, stats.failed), (2, 1, 0))
+        self.assertRegex(stats.summary(), r'^Built 2 pages, copied 1 files, 0 unchanged, 0 removed in [\d.]+ s \(\d+ files/s\); 3 outputs changed(; render cache .*)?$')
+
+    def test_per_file_detail_is_debug_only(self):
+        with self.assertLogs('src', level='DEBUG') as logs:
+            generate_pages_recursive(self.content, self.template, self.public)
+        self.assertTrue(logs.records)
+        self.assertEqual({record.levelno for record in logs.records}, {logging.DEBUG})
+
+    def test_summary_reports_failures(self):
+        build = BuildStats()
+        build.failed = 2
+        self.assertIn(', 2 failed;', build.summary())
+
+    def test_verbosity_levels(self):
+        logger = logging.getLogger('src')
+        settings = (logger.level, logger.handlers[:], logger.propagate)
+        try:
+            for argv, expected in [([], logging.INFO), (['-q'], logging.WARNING), (['--verbose'], logging.DEBUG)]:
+                configure_logging(parse_args(argv).verbosity)
+                self.assertEqual(logger.level, expected)
+        finally:
+            level, handlers, logger.propagate = settings
+            logger.setLevel(level)
+            logger.handlers[:] = handlers
+
+    def test_quiet_and_verbose_are_exclusive(self):
+        with self.assertRaises(SystemExit):
+            parse_args(['-q', '-v'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,12 @@
-import unittest
+import os, unittest
 from src.site_operations import (
-    extract_title
+    extract_title, collect_page_tasks, generate_pages_recursive, render_pages,
+    render_pages_pipelined, copy_contents, remove_orphans, write_output, write_page
 )
+from src.htmlnode import LeafNode, ParentNode
+from src.template import Template
+from src.reporting import stats
+from tests.helpers import SiteTestCase, TempDirTestCase, TEMPLATE
     
 # ------------------------------------------------------------------------
 # Test Title extraction
@@ -25,3 +30,171 @@ contents with paragraph here
 '''
         with self.assertRaises(ValueError):
             extract_title(markdown)
+
+# ------------------------------------------------------------------------
+# Test parallel page generation
+# ------------------------------------------------------------------------
+class Test_Parallel_Generation(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(6):
+            page_dir = os.path.join(self.content, f'page_{index}')
+            self.write(os.path.join(page_dir, 'index.md'), f'# Page {index}\n\nSome **bold** text and a [link](/page_{index})')
+            self.write(os.path.join(page_dir, 'index.css'), 'body {}')
+
+    def build(self, name, jobs, pipeline = False):
+        dest = os.path.join(self.tmp.name, name)
+        os.makedirs(dest)
+        generate_pages_recursive(self.content, self.template, dest, '/base/', jobs = jobs, pipeline = pipeline)
+        outputs = {}
+        for root, _, files in os.walk(dest):
+            for file_name in files:
+                with open(os.path.join(root, file_name), 'rb') as f:
+                    outputs[os.path.relpath(os.path.join(root, file_name), dest)] = f.read()
+        return outputs
+
+    def test_collect_page_tasks(self):
+        pages, copies = collect_page_tasks(self.content, os.path.join(self.tmp.name, 'public'))
+        self.assertEqual(len(pages), 6)
+        self.assertEqual(len(copies), 6)
+        self.assertTrue(all(dest.endswith('index.html') for _, dest in pages))
+
+    def test_parallel_output_matches_serial(self):
+        self.assertEqual(self.build('serial', 1), self.build('parallel', 3))
+
+    def test_parallel_errors_reported_per_page(self):
+        broken = os.path.join(self.content, 'page_2', 'index.md')
+        self.write(broken, 'no title here')
+        pages, _ = collect_page_tasks(self.content, os.path.join(self.tmp.name, 'public'))
+        failures = render_pages(pages, self.template, '/', jobs = 2)
+        self.assertEqual([from_path for from_path, _ in failures], [broken])
+        self.assertIn('no title found', failures[0][1])
+        self.assertEqual(sum(os.path.exists(dest) for _, dest in pages), 5)
+
+    def test_pipelined_output_matches_serial(self):
+        serial = self.build('serial', 1)
+        self.assertEqual(self.build('pipelined', 1, pipeline = True), serial)
+        self.assertEqual(self.build('pipelined_pool', 2, pipeline = True), serial)
+
+    def test_pipeline_backpressure(self):
+        # queues of one page and a single reader and writer still drain every page
+        pages, _ = collect_page_tasks(self.content, os.path.join(self.tmp.name, 'public'))
+        failures = render_pages_pipelined(pages, self.template, readers = 1, writers = 1, depth = 1)
+        self.assertEqual(failures, [])
+        self.assertTrue(all(os.path.exists(dest) for _, dest in pages))
+
+    def test_pipelined_errors_reported_per_page(self):
+        broken = os.path.join(self.content, 'page_2', 'index.md')
+        self.write(broken, 'no title here')
+        pages, _ = collect_page_tasks(self.content, os.path.join(self.tmp.name, 'public'))
+        pages.append((os.path.join(self.content, 'missing.md'), os.path.join(self.tmp.name, 'public', 'missing.html')))
+        for jobs in (1, 2):
+            failures = dict(render_pages_pipelined(pages, self.template, jobs = jobs, depth = 2))
+            self.assertEqual(set(failures), {broken, pages[-1][0]})
+            self.assertIn('no title found', failures[broken])
+            self.assertIn('FileNotFoundError', failures[pages[-1][0]])
+
+
+# ------------------------------------------------------------------------
+# Test delta sync of static files
+# ------------------------------------------------------------------------
+class Test_Static_Sync(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, 'static')
+        self.public = os.path.join(self.tmp.name, 'public')
+        os.makedirs(self.public)
+        self.write(os.path.join(self.static, 'index.css'), 'body {}')
+        self.write(os.path.join(self.static, 'images', 'a.png'), 'png')
+        stats.reset()
+
+    def test_copies_keep_source_mtime(self):
+        outputs = copy_contents(self.static, self.public)
+        self.assertEqual(sorted(outputs), sorted([os.path.join(self.public, 'index.css'), os.path.join(self.public, 'images', 'a.png')]))
+        self.assertEqual(os.stat(outputs[0]).st_mtime_ns, os.stat(os.path.join(self.static, os.path.relpath(outputs[0], self.public))).st_mtime_ns)
+        self.assertEqual(stats.copies, 2)
+
+    def test_unchanged_files_are_skipped(self):
+        copy_contents(self.static, self.public)
+        stats.reset()
+        copy_contents(self.static, self.public)
+        self.assertEqual((stats.copies, stats.unchanged), (0, 2))
+
+    def test_changed_file_is_copied(self):
+        copy_contents(self.static, self.public)
+        css = os.path.join(self.static, 'index.css')
+        self.write(css, 'body { color: red }')
+        stats.reset()
+        copy_contents(self.static, self.public)
+        self.assertEqual((stats.copies, stats.unchanged), (1, 1))
+        with open(os.path.join(self.public, 'index.css'), encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'body { color: red }')
+
+    def test_checksum_ignores_mtime(self):
+        copy_contents(self.static, self.public)
+        os.utime(os.path.join(self.static, 'index.css'), ns=(0, 0))
+        stats.reset()
+        copy_contents(self.static, self.public, checksum = True)
+        self.assertEqual((stats.copies, stats.unchanged), (0, 2))
+        copy_contents(self.static, self.public)
+        self.assertEqual(stats.copies, 1)
+
+    def test_remove_orphans(self):
+        outputs = copy_contents(self.static, self.public)
+        self.write(os.path.join(self.public, 'old', 'page.html'), '')
+        self.write(os.path.join(self.public, 'stray.txt'), '')
+        removed = remove_orphans(self.public, outputs)
+        self.assertEqual(len(removed), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.public, 'old')))
+        self.assertTrue(all(os.path.isfile(path) for path in outputs))
+
+# ------------------------------------------------------------------------
+# Test skip-if-identical atomic writes
+# ------------------------------------------------------------------------
+class Test_Output_Writes(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp.name, 'index.html')
+
+    def test_identical_content_is_not_rewritten(self):
+        self.assertTrue(write_output(self.path, '<p>é</p>'))
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(write_output(self.path, '<p>é</p>'))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+
+    def test_changed_content_replaces_the_file(self):
+        write_output(self.path, '<p>old</p>')
+        inode = os.stat(self.path).st_ino
+        self.assertTrue(write_output(self.path, '<p>new</p>'))
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), '<p>new</p>')
+        self.assertNotEqual(os.stat(self.path).st_ino, inode) # renamed into place, not rewritten
+        self.assertEqual(os.listdir(self.tmp.name), ['index.html'])
+
+    def test_streamed_page_is_written_once(self):
+        # more than one 64 KiB chunk of fragments, streamed straight into the file
+        node = ParentNode('div', children = [LeafNode('b', 'é' * 10) for _ in range(20000)])
+        template = Template(TEMPLATE)
+        self.assertTrue(write_page(self.path, template, 'Big', node))
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), template.render('Big', node.to_html()))
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(write_page(self.path, template, 'Big', node))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        self.assertEqual(os.listdir(self.tmp.name), ['index.html'])
+
+    def test_rebuild_reports_changed_pages(self):
+        content = os.path.join(self.tmp.name, 'content')
+        public = os.path.join(self.tmp.name, 'public')
+        template = self.write('template.html', TEMPLATE)
+        for name in ['a', 'b']:
+            self.write(os.path.join(content, f'{name}.md'), f'# Page {name}')
+        generate_pages_recursive(content, template, public)
+        for jobs, pipeline in [(1, False), (2, False), (1, True)]:
+            self.write(os.path.join(content, 'b.md'), f'# Page b, built with {jobs} job(s), pipeline {pipeline}')
+            stats.reset()
+            generate_pages_recursive(content, template, public, jobs = jobs, pipeline = pipeline)
+            self.assertEqual(stats.changed_outputs, [os.path.join(public, 'b.html')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import io, os, pickle, tempfile, unittest
+from src.htmlnode import ParentNode, LeafNode
+from src.template import Template, load_template, rebase_urls
+
+TEMPLATE = '''<html>
+<head><title>{{ Title }}</title><link href="/index.css" rel="stylesheet" /></head>
+<body><article>{{ Content }}</article></body>
+</html>'''
+
+class Test_Template(unittest.TestCase):
+    def test_compile_segments_and_slots(self):
+        template = Template(TEMPLATE)
+        self.assertEqual(template.slots, ['title', 'content'])
+        self.assertEqual(len(template.segments), 3)
+        self.assertEqual(template.segments[0], '<html>\n<head><title>')
+
+    def test_render_matches_replace(self):
+        template = Template(TEMPLATE)
+        content = '<div><a href="/contact">Contact</a><img src="/images/a.png" alt="a"></img></div>'
+        expected = TEMPLATE.replace('{{ Title }}', 'Home').replace('{{ Content }}', content)
+        self.assertEqual(template.render('Home', content), expected)
+
+    def test_render_with_base_path(self):
+        template = Template(TEMPLATE)
+        content = '<a href="/contact">Contact</a><img src="/images/a.png" alt="a"></img><a href="https://x.com">x</a>'
+        html = template.render('Home', content, '/site/')
+        self.assertIn('<link href="/site/index.css"', html)
+        self.assertIn('<a href="/site/contact">', html)
+        self.assertIn('<img src="/site/images/a.png"', html)
+        self.assertIn('<a href="https://x.com">', html)
+
+    def test_write_matches_render(self):
+        template = Template(TEMPLATE)
+        node = ParentNode('div', children = [LeafNode('a', 'Contact', {'href': '/contact'})])
+        for base_path in ['/', '/site/']:
+            fp = io.StringIO()
+            template.write(fp, 'Home', node, base_path)
+            self.assertEqual(fp.getvalue(), template.render('Home', node.to_html(), base_path))
+
+    def test_head_goes_before_the_closing_head_tag(self):
+        template = Template(TEMPLATE)
+        head = '<link rel="preload" href="/a.png" as="image" />'
+        html = template.render('Home', 'c', '/site/', head)
+        self.assertIn('rel="stylesheet" /><link rel="preload" href="/site/a.png" as="image" /></head>', html)
+        self.assertEqual(template.render('Home', 'c', '/site/', ''), template.render('Home', 'c', '/site/'))
+        fp = io.StringIO()
+        template.write(fp, 'Home', ParentNode('div', children = [LeafNode(None, 'c')]), '/site/', head)
+        self.assertEqual(fp.getvalue(), html.replace('c</article>', '<div>c</div></article>'))
+
+    def test_head_placeholder(self):
+        template = Template('<head>{{ Head }}<title>{{ Title }}</title></head>{{ Content }}')
+        self.assertEqual(template.render('t', 'c', head = '<meta />'), '<head><meta /><title>t</title></head>c')
+        self.assertEqual(template.render('t', 'c'), '<head><title>t</title></head>c')
+
+    def test_repeated_placeholders(self):
+        template = Template('{{ Title }}|{{ Title }}|{{ Content }}')
+        self.assertEqual(template.render('t', 'c'), 't|t|c')
+
+    def test_rebase_urls_root_is_identity(self):
+        html = '<a href="/x">x</a>'
+        self.assertIs(rebase_urls(html, '/'), html)
+
+    def test_pickle_round_trip(self):
+        template = pickle.loads(pickle.dumps(Template(TEMPLATE)))
+        self.assertEqual(template.render('t', 'c', '/b/'), Template(TEMPLATE).render('t', 'c', '/b/'))
+
+    def test_load_template_cached_by_mtime(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'template.html')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('<p>{{ Content }}</p>')
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('<div>{{ Content }}</div>')
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            second = load_template(path)
+            self.assertIsNot(second, first)
+            self.assertEqual(second.render('', 'x'), '<div>x</div>')
+
+
+if __name__ == '__main__':
+    unittest.main()
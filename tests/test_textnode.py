@@ -17,6 +17,10 @@ class Test_TextNode(unittest.TestCase):
         node_1 = TextNode('This is a text node', TextType.LINK, 'http://link2.com')
         self.assertNotEqual(node, node_1)
 
+    def test_testnodes_slots(self):
+        node = TextNode('This is a text node', TextType.LINK, 'http://link1.com')
+        self.assertFalse(hasattr(node, '__dict__'))
+        self.assertEqual(repr(node), 'TextNode(This is a text node, TextType.LINK, http://link1.com)')
 
 
 if __name__ == '__main__':
@@ -1,12 +1,11 @@
-import unittest
+import random, unittest
 from src.textnode import TextNode, TextType
 from src.htmlnode import block_to_block_type, BlockType
 from src.transformation import (
     text_node_to_html_leaf_node, split_text_into_nodes_delimiter,
     extract_markdown_links, extract_markdown_images, split_text_image_into_text_nodes,
-    split_text_links_into_text_nodes, text_to_text_nodes,
-    markdown_to_blocks, markdown_to_html_node, process_heading,
-    process_code, process_quotes, process_ulist, process_olist, process_paragraph
+    split_text_links_into_text_nodes, text_to_text_nodes, tokenize_inline, tokenize_inline_spans,
+    markdown_to_blocks, parse_blocks, Block, markdown_to_html_node, block_to_html_node, render_block
 )
 
 class test_transformations(unittest.TestCase):
@@ -300,6 +299,38 @@ class test_transformations(unittest.TestCase):
         ]
     )
 
+    def test_text_to_text_nodes_unbalanced_delimiters(self):
+        self.assertListEqual(text_to_text_nodes('a **b _c_ d'), [
+            TextNode('a **b ', TextType.TEXT),
+            TextNode('c', TextType.ITALIC),
+            TextNode(' d', TextType.TEXT),
+        ])
+        self.assertListEqual(text_to_text_nodes('At the end, there is **bolded_text**'), [
+            TextNode('At the end, there is ', TextType.TEXT),
+            TextNode('bolded_text', TextType.BOLD),
+        ])
+
+    def test_text_to_text_nodes_empty_spans(self):
+        with self.assertRaises(Exception):
+            text_to_text_nodes('****')
+
+    # Single-pass tokenizer matches the cascade of split_text_* passes
+    def test_tokenize_inline_matches_split_passes(self):
+        def split_passes(text):
+            nodes = [TextNode(text, TextType.TEXT)]
+            for delimiter in ['**', '_', '`']:
+                nodes = split_text_into_nodes_delimiter(nodes, delimiter)
+            if not nodes:
+                return nodes
+            nodes = split_text_image_into_text_nodes(nodes)
+            return split_text_links_into_text_nodes(nodes)
+
+        atoms = ['**', '*', '_', '`', '![a](b)', '[c](d)', 'x', 'y z', '!', '[', ']', '(', ')', '](', '\n', '[a_b](c_d)']
+        rng = random.Random(0)
+        for _ in range(2000):
+            text = ''.join(rng.choice(atoms) for _ in range(rng.randint(1, 12)))
+            self.assertListEqual(tokenize_inline(text), split_passes(text), text)
+
     # ------------------------------------------------------------------------
     # split blocks
     # ------------------------------------------------------------------------
@@ -330,6 +361,45 @@ This is the same paragraph on a new line
         with self.assertRaises(Exception):
             return markdown_to_blocks(md)
     
+    def test_parse_blocks_without_blank_lines(self):
+        md = "# Title\n- item 1\n- item 2\n> a quote\n>\n> more\nA paragraph\n1. first\n2. second\n## Next"
+        self.assertEqual(parse_blocks(md), [
+            Block(BlockType.HEADING, '# Title'),
+            Block(BlockType.ULIST, '- item 1\n- item 2'),
+            Block(BlockType.QUOTE, '> a quote\n>\n> more'),
+            Block(BlockType.PARAGRAPH, 'A paragraph'),
+            Block(BlockType.OLIST, '1. first\n2. second'),
+            Block(BlockType.HEADING, '## Next'),
+        ])
+
+    def test_parse_blocks_fenced_code_keeps_blank_lines(self):
+        md = "Intro\n```\ndef f():\n\n    return 1\n```\n```inline```\nAfter"
+        self.assertEqual(parse_blocks(md), [
+            Block(BlockType.PARAGRAPH, 'Intro'),
+            Block(BlockType.CODE, '```\ndef f():\n\n    return 1\n```'),
+            Block(BlockType.CODE, '```inline```'),
+            Block(BlockType.PARAGRAPH, 'After'),
+        ])
+        self.assertEqual(parse_blocks("```\nnever closed\n\ntext"), [Block(BlockType.PARAGRAPH, '```\nnever closed\n\ntext')])
+
+    def test_parse_blocks_ordered_lists(self):
+        self.assertEqual(parse_blocks("In 2024 we said\n2. things"), [Block(BlockType.PARAGRAPH, 'In 2024 we said\n2. things')])
+        self.assertEqual(parse_blocks("1. a\n3. b"), [Block(BlockType.PARAGRAPH, '1. a\n3. b')])
+        self.assertEqual(parse_blocks("3. a\n2. b\n1. c"), [Block(BlockType.OLIST, '3. a\n2. b\n1. c')])
+        self.assertEqual(parse_blocks("- a\n  - nested\n1. b"), [
+            Block(BlockType.ULIST, '- a\n  - nested'),
+            Block(BlockType.OLIST, '1. b'),
+        ])
+
+    def test_parse_blocks_types_match_classification(self):
+        md = "# T\n\nSome text\nmore\n\n- a\n- b\n\n1. x\n2. y\n\n> q\n\n```\ncode\n```\n\n####### not a heading"
+        for block in parse_blocks(md):
+            self.assertEqual(block_to_block_type(block.text), block.type, block.text)
+
+    def test_heading_followed_by_list(self):
+        html = markdown_to_html_node("## Steps\n- one\n- two\n```\na\n\nb\n```").to_html()
+        self.assertEqual(html, '<div>\n<h2>Steps</h2>\n\n<ul>\n<li>one</li>\n<li>two</li>\n</ul>\n\n<pre><code>\na\n\nb\n</code></pre>\n</div>')
+
     # ------------------------------------------------------------------------
     # block to block type
     # ------------------------------------------------------------------------
@@ -376,54 +446,18 @@ This is the same paragraph on a new line
         text = """3. This is a list item \n22. This another list item \n11. This is yet another one"""
         self.assertEqual(block_to_block_type(text), BlockType.PARAGRAPH)
 
+        # Single items: only 1 counts as a list
+        self.assertEqual(block_to_block_type('1. Only item'), BlockType.OLIST)
+        self.assertEqual(block_to_block_type('5. Only item'), BlockType.PARAGRAPH)
+
+        # Reverse order has to end at 1
+        text = """4. This is a list item \n3. This another list item \n2. This is yet another one"""
+        self.assertEqual(block_to_block_type(text), BlockType.PARAGRAPH)
+
     # ------------------------------------------------------------------------
     # md to html
     # ------------------------------------------------------------------------
 
-    def test_process_heading(self):
-        block = '# An h1 level heading'
-        self.assertEqual(process_heading(block), '<h1>An h1 level heading</h1>')
-
-        block = '###### An h6 level heading'
-        self.assertEqual(process_heading(block), '<h6>An h6 level heading</h6>')
-    
-    def test_process_code(self):
-        block = '''```Code block with
-codes```'''
-        self.assertEqual(process_code(block), '''<pre><code>Code block with
-codes</code></pre>''')
-
-    def test_process_quotes(self):
-        block = '''
-> quote 1
-> quote 2
-> quote 3
-'''
-        self.assertEqual(process_quotes(block), '''<blockquote>quote 1\nquote 2\nquote 3</blockquote>''')
-
-    def test_process_ulist(self):
-        block = '''
-- ulist_item_1
-- ulist_item_2
-- ulist_item_3
-'''
-        self.assertEqual(process_ulist(block), '''<ul>\n<li>ulist_item_1</li>\n<li>ulist_item_2</li>\n<li>ulist_item_3</li>\n</ul>''')
-    
-    def test_process_olist(self):
-        block = '''
-1. olist_item_1
-2. olist_item_2
-3. olist_item_3
-'''
-        self.assertEqual(process_olist(block), '''<ol>\n<li>olist_item_1</li>\n<li>olist_item_2</li>\n<li>olist_item_3</li>\n</ol>''')
-
-    def test_process_pargaraph(self):
-        block = '''A normal
-paragraph'''
-        self.assertEqual(process_paragraph(block), '''<p>A normal
-paragraph</p>''')
-
-
     def test_paragraphs(self):
         self.maxDiff = None
         md = """This is **bolded** paragraph
@@ -528,6 +562,95 @@ This is quote 3</blockquote>
 </div>''',
 )
 
-    
+    def test_nested_ulist(self):
+        md = """
+- item **one**
+- item two
+  - nested _a_
+  - nested b
+- item three
+"""
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            '''<div>
+<ul>
+<li>item <b>one</b></li>
+<li>item two
+<ul>
+<li>nested <i>a</i></li>
+<li>nested b</li>
+</ul>
+</li>
+<li>item three</li>
+</ul>
+</div>''',
+)
+
+    def test_olist_with_nested_ulist_and_text(self):
+        md = """
+1. first
+   continued
+2. second
+   - x
+"""
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            '''<div>
+<ol>
+<li>first
+continued</li>
+<li>second
+<ul>
+<li>x</li>
+</ul>
+</li>
+</ol>
+</div>''',
+)
+
+    def test_nested_quotes(self):
+        md = """
+> outer
+>> inner **bold**
+>> more
+> back
+"""
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            '''<div>
+<blockquote>outer
+<blockquote>inner <b>bold</b>
+more</blockquote>
+back</blockquote>
+</div>''',
+)
+
+    def test_list_subtree(self):
+        node = block_to_html_node('- a\n- **b**', BlockType.ULIST)
+        self.assertEqual(node.tag, 'ul')
+        items = [child for child in node.children if child.tag == 'li']
+        self.assertEqual(len(items), 2)
+        self.assertEqual(items[1].children[0].tag, 'b')
+
+    def test_inline_delimiters_stay_in_their_item(self):
+        self.assertEqual(
+            markdown_to_html_node('- **a\n- b**').to_html(),
+            '<div>\n<ul>\n<li>**a</li>\n<li>b**</li>\n</ul>\n</div>',
+        )
+
+    def test_tokenize_inline_spans(self):
+        text = '- **a\n- b** _c_'
+        self.assertListEqual(
+            tokenize_inline_spans(text, [(2, 5), (8, len(text))]),
+            [tokenize_inline('**a'), tokenize_inline('b** _c_')],
+        )
+
+    def test_render_untyped_block(self):
+        def html(block):
+            return ''.join(node.to_html() for node in render_block(block))
+        self.assertEqual(html('intro\n- a'), '\n<p>intro</p>\n\n<ul>\n<li>a</li>\n</ul>\n')
+        self.assertEqual(html('> a\nplain'), '\n<blockquote>a</blockquote>\n\n<p>plain</p>\n')
+        self.assertEqual(html('1. a\nfoo'), '\n<ol>\n<li>a</li>\n</ol>\n\n<p>foo</p>\n')
+
 if __name__ == '__main__':
     unittest.main()